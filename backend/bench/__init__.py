@@ -0,0 +1 @@
+# bench package
\ No newline at end of file
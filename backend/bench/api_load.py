@@ -0,0 +1,154 @@
+"""Teste de carga das rotas HTTP com o app FastAPI em processo.
+
+Uso (a partir da raiz do projeto, após `backend.bench.datagen`):
+
+    python -m backend.bench.api_load --db /tmp/load.db --clients 16 --duration 30
+    python -m backend.bench.api_load --db /tmp/load.db --endpoints stats,people --out load.json
+
+As requisições são enviadas direto à aplicação ASGI (sem socket), com
+`--clients` clientes concorrentes; o chat usa um LLM falso.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+from backend.bench.pipeline import percentile
+
+
+# Numera as perguntas de chat_llm: cada requisição é uma pergunta nova e passa
+# pelo LLM, em vez de cair no cache de respostas depois da primeira
+_request_seq = itertools.count(1)
+
+# nome -> (método, caminho, query, corpo JSON ou função nº da requisição -> corpo)
+ENDPOINTS: Dict[str, Tuple[str, str, dict, Union[None, dict, Callable[[int], dict]]]] = {
+    "health": ("GET", "/health", {}, None),
+    "current": ("GET", "/api/detections/current", {}, None),
+    "stats": ("GET", "/api/stats/", {}, None),
+    "stats_filtered": ("GET", "/api/stats/", {"color": "red", "action": "walking"}, None),
+    "people": ("GET", "/api/people/", {}, None),
+    "people_search": ("GET", "/api/people/search", {"top_color": "blue", "object": "cell phone"}, None),
+    "events": ("GET", "/api/events/", {"event_type": "enter_roi"}, None),
+    "chat_local": ("POST", "/api/chat/", {}, {"message": "How many people wore red today?"}),
+    "chat_llm": ("POST", "/api/chat/", {}, lambda n: {"message": f"Describe what happened in the last hour ({n})"}),
+    "chat_cached": ("POST", "/api/chat/", {}, {"message": "Describe what happened in the last hour"}),
+}
+DEFAULT_ENDPOINTS = ("health", "current", "stats", "stats_filtered", "people_search", "events", "chat_local", "chat_llm")
+
+
+async def asgi_request(app, method: str, path: str, query: dict, body: Optional[dict]) -> Tuple[int, int]:
+    """Executa uma requisição HTTP na aplicação ASGI; retorna (status, bytes)."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [(b"host", b"bench")]
+    if body is not None:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": urlencode(query).encode(), "headers": headers,
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    result = {"status": 0, "bytes": 0}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            result["bytes"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return result["status"], result["bytes"]
+
+
+async def _client(app, names: List[str], deadline: float, samples: Dict[str, List[float]],
+                  errors: Dict[str, int], sizes: Dict[str, int], offset: int) -> None:
+    i = offset
+    while time.perf_counter() < deadline:
+        name = names[i % len(names)]
+        i += 1
+        method, path, query, body = ENDPOINTS[name]
+        if callable(body):
+            body = body(next(_request_seq))
+        t0 = time.perf_counter()
+        try:
+            status, nbytes = await asgi_request(app, method, path, query, body)
+        except Exception:
+            status, nbytes = 0, 0
+        samples[name].append(time.perf_counter() - t0)
+        sizes[name] = nbytes
+        if status >= 400 or status == 0:
+            errors[name] += 1
+        # Sem socket, handlers async podem completar sem suspender; cede o loop
+        # como faria a E/S de rede, para os demais clientes avançarem
+        await asyncio.sleep(0)
+
+
+async def run_load(app, names: List[str], clients: int, duration: float) -> dict:
+    samples: Dict[str, List[float]] = {n: [] for n in names}
+    errors: Dict[str, int] = {n: 0 for n in names}
+    sizes: Dict[str, int] = {n: 0 for n in names}
+    deadline = time.perf_counter() + duration
+    t0 = time.perf_counter()
+    await asyncio.gather(*[_client(app, names, deadline, samples, errors, sizes, k) for k in range(clients)])
+    wall = time.perf_counter() - t0
+    report = {}
+    for n in names:
+        lat = samples[n]
+        report[n] = {
+            "requests": len(lat),
+            "errors": errors[n],
+            "rps": round(len(lat) / wall, 2),
+            "p50_ms": round(1000 * percentile(lat, 50), 2),
+            "p95_ms": round(1000 * percentile(lat, 95), 2),
+            "p99_ms": round(1000 * percentile(lat, 99), 2),
+            "response_bytes": sizes[n],
+        }
+    return {"clients": clients, "duration_s": round(wall, 2), "endpoints": report}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="SQLite gerado por backend.bench.datagen")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--endpoints", default=",".join(DEFAULT_ENDPOINTS),
+                        help=f"lista separada por vírgula entre: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--out", help="grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.endpoints.split(",") if n.strip()]
+    unknown = [n for n in names if n not in ENDPOINTS]
+    if unknown:
+        parser.error(f"endpoints desconhecidos: {', '.join(unknown)}")
+
+    # Precisa ser definido antes de importar backend.core
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+    from backend.main import app
+    from backend.services.chat_service import StubLLMClient, set_llm_client
+
+    set_llm_client(StubLLMClient())
+    report = asyncio.run(run_load(app, names, args.clients, args.duration))
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
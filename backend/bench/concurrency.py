@@ -0,0 +1,83 @@
+"""Latência dos endpoints leves com endpoints pesados em andamento.
+
+Uso (a partir da raiz do projeto, após `backend.bench.datagen`):
+
+    python -m backend.bench.concurrency --db /tmp/load.db --heavy-clients 16 --duration 20
+    python -m backend.bench.concurrency --db /tmp/load.db --llm-delay 2 --threadpool 8 --out conc.json
+
+Duas fases de `--duration` segundos: só clientes leves (`idle`), depois leves
+e pesados ao mesmo tempo (`loaded`). O relatório compara p50/p95/p99 dos leves
+nas duas fases e mostra o throughput dos pesados. O chat usa um LLM falso com
+`--llm-delay` segundos de latência e perguntas sempre novas (sem acerto no
+cache de respostas); `--threadpool` limita o pool de threads do
+Starlette (padrão 40) para simular um worker menor.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import List, Optional
+
+from backend.bench.api_load import ENDPOINTS, run_load
+
+
+LIGHT = ("health", "current")
+HEAVY = ("stats", "stats_filtered", "events", "chat_llm")
+
+
+async def run(app, light: List[str], heavy: List[str], light_clients: int, heavy_clients: int,
+              duration: float, threadpool: Optional[int]) -> dict:
+    if threadpool:
+        import anyio.to_thread
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threadpool
+    idle = await run_load(app, light, light_clients, duration)
+    loaded, heavy_report = await asyncio.gather(
+        run_load(app, light, light_clients, duration),
+        run_load(app, heavy, heavy_clients, duration),
+    )
+    return {
+        "light_clients": light_clients,
+        "heavy_clients": heavy_clients,
+        "threadpool": threadpool,
+        "light": {n: {"idle": idle["endpoints"][n], "loaded": loaded["endpoints"][n]} for n in light},
+        "heavy": heavy_report["endpoints"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="SQLite gerado por backend.bench.datagen")
+    parser.add_argument("--light", default=",".join(LIGHT))
+    parser.add_argument("--heavy", default=",".join(HEAVY))
+    parser.add_argument("--light-clients", type=int, default=4)
+    parser.add_argument("--heavy-clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--llm-delay", type=float, default=1.0, help="latência simulada do LLM (s)")
+    parser.add_argument("--threadpool", type=int, help="limite de threads do Starlette")
+    parser.add_argument("--out", help="grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    light = [n.strip() for n in args.light.split(",") if n.strip()]
+    heavy = [n.strip() for n in args.heavy.split(",") if n.strip()]
+    unknown = [n for n in light + heavy if n not in ENDPOINTS]
+    if unknown:
+        parser.error(f"endpoints desconhecidos: {', '.join(unknown)}")
+
+    # Precisa ser definido antes de importar backend.core
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+    from backend.main import app
+    from backend.services.chat_service import StubLLMClient, set_llm_client
+
+    set_llm_client(StubLLMClient(delay=args.llm_delay))
+    report = asyncio.run(run(app, light, heavy, args.light_clients, args.heavy_clients,
+                             args.duration, args.threadpool))
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Popula o SQLite com pessoas/eventos sintéticos em volume realista.
+
+Uso (a partir da raiz do projeto):
+
+    python -m backend.bench.datagen --db /tmp/load.db --people 1000000 --days 30
+
+Usa o schema da aplicação (init_db) e inserts em lote via DB-API.
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+from typing import List, Optional
+
+
+ACTIONS = ("walking", "stopped")
+HANDHELD = ("bottle", "cup", "cell phone", "remote", "book", "sports ball")
+
+
+def _ts(dt: datetime.datetime) -> str:
+    # Mesmo formato que o SQLAlchemy grava para DateTime no SQLite
+    return dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def generate(people: int, days: int = 30, events_per_person: int = 2, batch: int = 50000,
+             seed: int = 0, active_fraction: float = 0.001, log=print) -> None:
+    from backend.core.db import engine, init_db
+    from backend.utils.color import COLOR_TABLE
+
+    init_db()
+    rng = random.Random(seed)
+    colors = list(COLOR_TABLE.keys()) + ["unknown"]
+    end = datetime.datetime.now()
+    start = end - datetime.timedelta(days=days)
+    span = (end - start).total_seconds()
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=OFF")
+        base_track = (cur.execute("SELECT COALESCE(MAX(track_id), 0) FROM people").fetchone()[0] or 0) + 1
+        # ids explícitos para gravar person_objects no mesmo lote
+        base_id = (cur.execute("SELECT COALESCE(MAX(id), 0) FROM people").fetchone()[0] or 0) + 1
+        t0 = time.perf_counter()
+        done = 0
+        while done < people:
+            n = min(batch, people - done)
+            person_rows: List[tuple] = []
+            event_rows: List[tuple] = []
+            object_rows: List[tuple] = []
+            for i in range(n):
+                track_id = base_track + done + i
+                person_id = base_id + done + i
+                first = start + datetime.timedelta(seconds=rng.random() * span)
+                dwell = rng.expovariate(1 / 45.0)
+                last = None if rng.random() < active_fraction else first + datetime.timedelta(seconds=dwell)
+                holding = rng.random() < 0.2
+                names = sorted(rng.sample(HANDHELD, rng.choice((1, 1, 2)))) if holding else []
+                objs = ", ".join(names) if names else None
+                object_rows.extend((person_id, name) for name in names)
+                person_rows.append((
+                    person_id, track_id, _ts(first), _ts(last) if last else None,
+                    rng.choice(colors), rng.choice(colors), rng.choice(ACTIONS),
+                    rng.uniform(0, 640), rng.uniform(0, 480), holding, objs,
+                ))
+                for k in range(events_per_person):
+                    etype = "enter_roi" if k % 2 == 0 else "exit_roi"
+                    ets = first + datetime.timedelta(seconds=dwell * k / max(1, events_per_person))
+                    event_rows.append((_ts(ets), etype, track_id, "default", None))
+            cur.executemany(
+                "INSERT INTO people (id, track_id, first_seen, last_seen, top_color, bottom_color, last_action, "
+                "last_x, last_y, holding_object, object_description) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                person_rows,
+            )
+            cur.executemany("INSERT INTO person_objects (person_id, name) VALUES (?,?)", object_rows)
+            cur.executemany(
+                "INSERT INTO events (timestamp, event_type, track_id, roi_name, details) VALUES (?,?,?,?,?)",
+                event_rows,
+            )
+            raw.commit()
+            done += n
+            rate = done / max(time.perf_counter() - t0, 1e-9)
+            log(f"{done}/{people} pessoas ({rate:,.0f}/s)")
+        cur.execute("ANALYZE")
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="arquivo SQLite de destino")
+    parser.add_argument("--people", type=int, default=1_000_000)
+    parser.add_argument("--events-per-person", type=int, default=2)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--batch", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # Precisa ser definido antes de importar backend.core
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+    generate(args.people, args.days, args.events_per_person, args.batch, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
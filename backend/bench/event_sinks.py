@@ -0,0 +1,133 @@
+"""Throughput dos sinks do barramento de eventos (ring, sqlite, jsonl).
+
+Uso (a partir da raiz do projeto):
+
+    python -m backend.bench.event_sinks --events 200000 --per-frame 5 --out sinks.json
+    python -m backend.bench.event_sinks --sinks jsonl --log-max-mb 8
+
+Para cada sink, isolado num barramento próprio: publica `--events` eventos
+sintéticos (espaçados `--spacing` s), chamando `flush` a cada `--per-frame`
+eventos como o loop faz por frame, e mede eventos/s. Depois mede a leitura da
+janela "últimos `--window` s" (anel: busca binária; sqlite: consulta por
+timestamp; jsonl: leitor mmap) e, no jsonl, a varredura completa do log.
+Banco e log ficam num diretório temporário.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+
+EVENT_TYPES = ("enter_roi", "exit_roi", "dwell_roi")
+
+
+def _events(n: int, spacing: float, seed: int = 0):
+    rng = random.Random(seed)
+    start = time.time() - n * spacing
+    for i in range(n):
+        etype = rng.choice(EVENT_TYPES)
+        details = json.dumps({"seconds": round(rng.uniform(5, 60), 1)}) if etype == "dwell_roi" else None
+        yield start + i * spacing, etype, rng.randrange(1, 500), "default", details
+
+
+def _timed(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def bench_sink(name: str, n: int, per_frame: int, spacing: float, window: float, repeat: int) -> dict:
+    from backend.core.db import SessionLocal
+    from backend.models.event import Event
+    from backend.services.event_bus import EventBus, EventLogReader
+    from backend.core.config import settings
+
+    bus = EventBus([name])
+    t0 = time.perf_counter()
+    last = 0.0
+    for k, (ts, etype, track_id, roi, details) in enumerate(_events(n, spacing), 1):
+        bus.publish(etype, track_id, roi, details, ts)
+        if k % per_frame == 0:
+            bus.flush(ts)
+        last = ts
+    bus.flush(last, force=True)
+    write_s = time.perf_counter() - t0
+    report = {
+        "sink": name,
+        "events": n,
+        "write_s": round(write_s, 3),
+        "events_per_s": round(n / write_s) if write_s > 0 else None,
+    }
+
+    since = last - window
+    if name == "ring":
+        ring = bus.ring
+        got = len(ring.query(since))
+        report["retained"] = len(ring)
+        report["window_query_ms"] = round(1000 * _timed(lambda: ring.query(since), repeat), 3)
+    elif name == "sqlite":
+        def query():
+            db = SessionLocal()
+            try:
+                return db.query(Event).filter(Event.timestamp >= datetime.datetime.fromtimestamp(since)).all()
+            finally:
+                db.close()
+        got = len(query())
+        report["window_query_ms"] = round(1000 * _timed(query, repeat), 3)
+    else:
+        reader = EventLogReader(settings.event_log_dir)
+        got = sum(1 for _ in reader.read(since))
+        report["files"] = len(reader.files())
+        report["log_mb"] = round(sum(os.path.getsize(p) for p in reader.files()) / 1048576, 2)
+        report["window_query_ms"] = round(1000 * _timed(lambda: sum(1 for _ in reader.read(since)), repeat), 3)
+        t = _timed(lambda: sum(1 for _ in reader.read()), 1)
+        total = sum(1 for _ in reader.read())
+        report["full_scan_events_per_s"] = round(total / t) if t > 0 else None
+    report["window_events"] = got
+    bus.close()
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sinks", default="ring,sqlite,jsonl")
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--per-frame", type=int, default=5, help="eventos entre dois flush (um frame)")
+    parser.add_argument("--spacing", type=float, default=0.01, help="intervalo entre eventos (s)")
+    parser.add_argument("--window", type=float, default=300.0, help="janela de leitura (s)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--ring-size", type=int, default=50_000)
+    parser.add_argument("--db-batch", type=int, default=200)
+    parser.add_argument("--log-max-mb", type=float, default=64.0)
+    parser.add_argument("--out", help="grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    # Precisa ser definido antes de importar backend.core
+    tmpdir = tempfile.mkdtemp(prefix="event-sinks-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'events.db')}"
+    os.environ["EVENT_RING_SIZE"] = str(args.ring_size)
+    os.environ["EVENT_DB_BATCH"] = str(args.db_batch)
+    os.environ["EVENT_LOG_DIR"] = os.path.join(tmpdir, "log")
+    os.environ["EVENT_LOG_MAX_MB"] = str(args.log_max_mb)
+    from backend.core.db import init_db
+
+    init_db()
+    results = []
+    for name in [s.strip() for s in args.sinks.split(",") if s.strip()]:
+        r = bench_sink(name, args.events, args.per_frame, args.spacing, args.window, args.repeat)
+        print(json.dumps(r))
+        results.append(r)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""Benchmark fim-a-fim do DetectionService com replay sintético ou de vídeo.
+
+Uso (a partir da raiz do projeto):
+
+    python -m backend.bench.pipeline --scenario crowd_20 --frames 600 --out bench.json
+    python -m backend.bench.pipeline --video clip.mp4 --model real
+    python -m backend.bench.pipeline --scenario all --baseline baseline.json
+
+Sem câmera e sem servidor HTTP; o banco é um SQLite temporário.
+"""
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def rss_mb() -> Optional[float]:
+    """RSS atual (não o pico da vida do processo, que esconderia o custo de cada cenário)."""
+    from backend.services.memory_service import rss_bytes
+
+    rss = rss_bytes()
+    return round(rss / (1024 * 1024), 1) if rss is not None else None
+
+
+def require_scratch_db(engine) -> None:
+    """Os benchmarks apagam o banco: só aceitam um SQLite dentro do diretório temporário."""
+    db_path = engine.url.database or ""
+    tmp = os.path.realpath(tempfile.gettempdir())
+    if engine.url.get_backend_name() != "sqlite" or not db_path or \
+            os.path.commonpath([os.path.realpath(db_path), tmp]) != tmp:
+        raise RuntimeError(f"benchmark recusado: DATABASE_URL não é um SQLite temporário ({engine.url})")
+
+
+def run_scenario(name: str, frames: int, model: str, video: Optional[str], seed: int) -> dict:
+    from sqlalchemy import event
+
+    from backend.bench.synthetic import SCENARIOS, ReplayCapture, ScriptedDetector, SyntheticScene
+    from backend.core.db import engine, init_db
+    from backend.core.metrics import frame_seconds, stage_seconds
+    from backend.models.base import Base
+    from backend.services.detection_service import detection_service as svc
+
+    # Cada cenário começa com o banco vazio
+    require_scratch_db(engine)
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    writes = {"rows": 0}
+
+    def count_writes(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            writes["rows"] += max(cursor.rowcount, 1)
+
+    event.listen(engine, "after_cursor_execute", count_writes)
+
+    latencies: List[float] = []
+    observe = frame_seconds.observe
+
+    def record_frame(value: float, label_value: str = "") -> None:
+        latencies.append(value)
+        observe(value, label_value)
+
+    frame_seconds.observe = record_frame
+    stages_before = stage_seconds.snapshot()
+
+    def stop_loop():
+        svc.running = False
+
+    original_infer = svc._infer
+    if video:
+        capture = ReplayCapture.from_file(video, max_frames=frames, on_eof=stop_loop)
+    else:
+        scenario = dataclasses.replace(SCENARIOS[name], frames=frames)
+        id_to_name = svc.class_names if isinstance(svc.class_names, dict) else dict(enumerate(svc.class_names))
+        name_to_id = {str(v).lower(): int(k) for k, v in id_to_name.items()}
+        object_names = [n for n, cid in name_to_id.items() if cid in svc.allowed_object_class_ids]
+        scene = SyntheticScene(scenario, object_names, seed=seed)
+        capture = ReplayCapture(scene.frames(), on_eof=stop_loop)
+        if model == "scripted":
+            svc._infer = ScriptedDetector(scene, name_to_id)
+
+    rss_before = rss_mb()
+    try:
+        t0 = time.perf_counter()
+        svc.start(capture)
+        svc.thread.join()
+        wall = time.perf_counter() - t0
+        svc.stop()
+    finally:
+        svc._infer = original_infer
+        frame_seconds.observe = observe
+        event.remove(engine, "after_cursor_execute", count_writes)
+
+    rss_after = rss_mb()
+    stages_after = stage_seconds.snapshot()
+    processed = len(latencies)
+    stages_ms: Dict[str, float] = {}
+    for stage, after in stages_after.items():
+        before = stages_before.get(stage, {"count": 0, "sum": 0.0})
+        if stage == "jpeg_encode":
+            continue
+        if processed:
+            stages_ms[stage] = round(1000.0 * (after["sum"] - before["sum"]) / processed, 3)
+
+    return {
+        "scenario": "video" if video else name,
+        "model": "real" if video else model,
+        "frames_read": capture.frames_read,
+        "frames_processed": processed,
+        "wall_s": round(wall, 3),
+        "fps": round(processed / wall, 2) if wall > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(1000.0 * percentile(latencies, 50), 3),
+            "p95": round(1000.0 * percentile(latencies, 95), 3),
+            "p99": round(1000.0 * percentile(latencies, 99), 3),
+        },
+        "stages_ms_per_frame": stages_ms,
+        "db_writes_per_s": round(writes["rows"] / wall, 1) if wall > 0 else 0.0,
+        "rss_mb": {"before": rss_before, "after": rss_after,
+                   "delta": round(rss_after - rss_before, 1) if rss_before is not None else None},
+        "config": {"imgsz": svc.imgsz, "frame_skip": svc.frame_skip},
+    }
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    """Lista regressões (fps menor ou p95 maior que a baseline além da tolerância)."""
+    by_key = {(b["scenario"], b["model"]): b for b in baseline}
+    problems = []
+    for r in results:
+        b = by_key.get((r["scenario"], r["model"]))
+        if b is None:
+            continue
+        if r["fps"] < b["fps"] * (1 - tolerance):
+            problems.append(f"{r['scenario']}: fps {r['fps']} < baseline {b['fps']}")
+        if r["latency_ms"]["p95"] > b["latency_ms"]["p95"] * (1 + tolerance):
+            problems.append(f"{r['scenario']}: p95 {r['latency_ms']['p95']}ms > baseline {b['latency_ms']['p95']}ms")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="all", help="empty | one_person | crowd_20 | handheld_many | all")
+    parser.add_argument("--video", help="arquivo de vídeo gravado para replay (usa o modelo real)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--model", choices=("scripted", "real"), default="scripted",
+                        help="scripted: caixas verdadeiras da cena (isola o pipeline); real: YOLO")
+    parser.add_argument("--imgsz", type=int, help="sobrescreve IMG_SIZE")
+    parser.add_argument("--frame-skip", type=int, help="sobrescreve FRAME_SKIP")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="grava os resultados em JSON")
+    parser.add_argument("--baseline", help="JSON de resultados anteriores para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    # Banco descartável: precisa ser definido antes de importar backend.core
+    tmpdir = tempfile.mkdtemp(prefix="det-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    if args.imgsz:
+        os.environ["IMG_SIZE"] = str(args.imgsz)
+    if args.frame_skip:
+        os.environ["FRAME_SKIP"] = str(args.frame_skip)
+
+    from backend.bench.synthetic import SCENARIOS
+
+    names = [None] if args.video else (list(SCENARIOS) if args.scenario == "all" else [args.scenario])
+    results = [run_scenario(n, args.frames, args.model, args.video, args.seed) for n in names]
+    for r in results:
+        print(json.dumps(r))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            problems = compare(results, json.load(fh), args.tolerance)
+        for p in problems:
+            print(f"REGRESSION {p}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Re-identificação: fragmentação de pessoas com e sem re-ID, e custo do matching.
+
+Uso (a partir da raiz do projeto):
+
+    python -m backend.bench.reid --minutes 10 --people 12 --dropout 0.005 --out reid.json
+    python -m backend.bench.reid --skip-scene --gallery-sizes 64,256,1024,4096
+
+Cena: pessoas sintéticas que somem por `--dropout-frames` frames (mais que o
+`exit_timeout` e que o buffer do ByteTrack, então voltam com outro track_id),
+rodada duas vezes no `DetectionService` com relógio simulado: re-ID desligado e
+ligado. Compara com o número real de pessoas as linhas criadas em `people`, as
+sessões de permanência contadas e os `track_id` distintos nos eventos de zona
+(razão 1,0 = sem fragmentação; abaixo de 1,0 = pessoas diferentes unidas).
+
+Matching: tempo de uma chamada `ReidGallery.match` por tamanho de galeria e
+nº de tracks novos, com a galeria cheia e com 10% de ocupação.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+import numpy as np
+
+
+def run_scene(reid_on: bool, minutes: float, fps: float, people: int, churn: float, dropout: float,
+              dropout_frames: int, seed: int) -> dict:
+    from backend.bench.pipeline import require_scratch_db
+    from backend.bench.soak import SimClock
+    from backend.bench.synthetic import ReplayCapture, Scenario, ScriptedDetector, SyntheticScene
+    from backend.core.db import SessionLocal, engine, init_db
+    from backend.core.metrics import stage_seconds
+    from backend.models.base import Base
+    from backend.models.event import Event
+    from backend.models.person import Person
+    from backend.services.counters_service import counters
+    from backend.services.detection_service import detection_service as svc
+    from backend.services.reid_service import reid
+
+    require_scratch_db(engine)
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    frames = int(minutes * 60 * fps)
+    scenario = Scenario("reid", people=people, frames=frames, churn=churn, dropout=dropout,
+                        dropout_frames=dropout_frames)
+    id_to_name = svc.class_names if isinstance(svc.class_names, dict) else dict(enumerate(svc.class_names))
+    name_to_id = {str(v).lower(): int(k) for k, v in id_to_name.items()}
+    scene = SyntheticScene(scenario, [], seed=seed)
+    clock = SimClock(time.time(), 1.0 / fps)
+
+    def frames_with_clock():
+        for frame in scene.frames():
+            clock.tick()
+            yield frame
+
+    def stop_loop():
+        svc.running = False
+
+    original = svc._infer, svc.clock, reid.enabled
+    svc._infer = ScriptedDetector(scene, name_to_id)
+    svc.clock = clock.time
+    reid.enabled = reid_on
+    matches_before = reid.matches.value
+    sessions_before = counters.dwell_sessions
+    stages_before = stage_seconds.snapshot().get("reid", {"sum": 0.0})
+    try:
+        t0 = time.perf_counter()
+        svc.start(ReplayCapture(frames_with_clock(), on_eof=stop_loop))
+        svc.thread.join()
+        wall = time.perf_counter() - t0
+        svc.stop()
+    finally:
+        svc._infer, svc.clock, reid.enabled = original
+
+    db = SessionLocal()
+    try:
+        rows = db.query(Person).count()
+        event_keys = db.query(Event.track_id).filter(Event.track_id.isnot(None)).distinct().count()
+    finally:
+        db.close()
+    reid_s = stage_seconds.snapshot().get("reid", {"sum": 0.0})["sum"] - stages_before["sum"]
+    return {
+        "reid": reid_on,
+        "frames": frames,
+        "wall_s": round(wall, 1),
+        "true_people": scene.identities,
+        "people_rows": rows,
+        "rows_per_person": round(rows / scene.identities, 3) if scene.identities else None,
+        "dwell_sessions": counters.dwell_sessions - sessions_before,
+        "event_track_ids": event_keys,
+        "relinks": int(reid.matches.value - matches_before),
+        "reid_ms_per_frame": round(1000 * reid_s / frames, 3) if frames else 0.0,
+    }
+
+
+def bench_match(sizes: List[int], new_tracks: List[int], repeat: int, seed: int = 0) -> List[dict]:
+    from backend.services.reid_service import ReidGallery
+    from backend.utils.appearance import DESCRIPTOR_DIM
+
+    rng = np.random.default_rng(seed)
+
+    def descs(n: int) -> np.ndarray:
+        d = rng.random((n, DESCRIPTOR_DIM), dtype=np.float32)
+        return d / np.linalg.norm(d, axis=1, keepdims=True)
+
+    out = []
+    for size in sizes:
+        for fill in (0.1, 1.0):
+            gallery = ReidGallery(size, max_age=1e9, threshold=0.0)  # limiar 0: nada casa, galeria intacta
+            for key, d in enumerate(descs(max(1, int(size * fill)))):
+                gallery.add(key, d, 0.0)
+            for m in new_tracks:
+                q = descs(m)
+                t0 = time.perf_counter()
+                for _ in range(repeat):
+                    gallery.match(q, 1.0)
+                out.append({"gallery_size": size, "fill": fill, "new_tracks": m,
+                            "match_us": round(1e6 * (time.perf_counter() - t0) / repeat, 1)})
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=10.0, help="duração da cena em tempo simulado")
+    parser.add_argument("--fps", type=float, default=5.0)
+    parser.add_argument("--people", type=int, default=12)
+    parser.add_argument("--churn", type=float, default=0.01)
+    parser.add_argument("--dropout", type=float, default=0.005, help="prob. por frame de uma pessoa sumir")
+    parser.add_argument("--dropout-frames", type=int, default=40)
+    parser.add_argument("--skip-scene", action="store_true", help="só o microbenchmark do matching")
+    parser.add_argument("--gallery-sizes", default="64,256,1024,4096")
+    parser.add_argument("--new-tracks", default="1,5,20")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    # Banco descartável, sem clipes: precisa ser definido antes de importar backend.core
+    tmpdir = tempfile.mkdtemp(prefix="det-reid-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'reid.db')}"
+    os.environ["CLIP_EVENTS"] = ""
+
+    report = {"scene": [], "match": []}
+    if not args.skip_scene:
+        for reid_on in (False, True):
+            r = run_scene(reid_on, args.minutes, args.fps, args.people, args.churn, args.dropout,
+                          args.dropout_frames, args.seed)
+            print(json.dumps(r))
+            report["scene"].append(r)
+    sizes = [int(x) for x in args.gallery_sizes.split(",") if x]
+    new_tracks = [int(x) for x in args.new_tracks.split(",") if x]
+    for r in bench_match(sizes, new_tracks, args.repeat, args.seed):
+        print(json.dumps(r))
+        report["match"].append(r)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Custo de serialização das listagens grandes (/people), por caminho.
+
+Uso (a partir da raiz do projeto):
+
+    python -m backend.bench.serialization --rows 100000 --repeat 5 --out ser.json
+
+Compara, sobre as mesmas linhas sintéticas em memória (sem banco):
+
+- `pydantic`: caminho antigo (PersonOut por linha + response_model + json.dumps);
+- `orjson_rows`: mesmo formato de saída, tuplas -> dicts -> orjson;
+- `orjson_columnar`: `layout=columnar`, um array por campo.
+
+Cada caminho é medido com e sem gzip (nível `GZIP_LEVEL`). O relatório traz
+bytes e ms (mediana de `--repeat`) normalizados por 100k linhas.
+"""
+import argparse
+import datetime
+import gzip
+import json
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from backend.core.config import settings
+from backend.core.responses import dumps, rows_payload
+from backend.schemas.common import PersonOut
+from backend.routers.people import PERSON_FIELDS
+
+
+def make_rows(n: int, seed: int = 0) -> List[tuple]:
+    from backend.bench.datagen import ACTIONS, HANDHELD
+    from backend.utils.color import COLOR_TABLE
+
+    rng = random.Random(seed)
+    colors = list(COLOR_TABLE.keys()) + ["unknown"]
+    start = datetime.datetime.now() - datetime.timedelta(days=30)
+    rows = []
+    for i in range(n):
+        first = start + datetime.timedelta(seconds=rng.random() * 30 * 86400)
+        holding = rng.random() < 0.2
+        rows.append((
+            i + 1, i + 1, first, first + datetime.timedelta(seconds=rng.expovariate(1 / 45.0)),
+            rng.choice(colors), rng.choice(colors), rng.choice(ACTIONS),
+            holding, rng.choice(HANDHELD) if holding else None,
+        ))
+    return rows
+
+
+def _pydantic(rows: List[tuple]) -> bytes:
+    # Equivalente ao caminho anterior: modelo por linha, validação do response_model e json.dumps
+    from pydantic import TypeAdapter
+
+    items = [
+        PersonOut(
+            id=r[0], track_id=r[1], first_seen=r[2].isoformat() if r[2] else "",
+            last_seen=r[3].isoformat() if r[3] else None, top_color=r[4], bottom_color=r[5],
+            last_action=r[6], holding_object=r[7], object_description=r[8],
+        )
+        for r in rows
+    ]
+    adapter = TypeAdapter(List[PersonOut])
+    data = adapter.dump_python(adapter.validate_python(items), mode="json")
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+PATHS: Dict[str, Callable[[List[tuple]], bytes]] = {
+    "pydantic": _pydantic,
+    "orjson_rows": lambda rows: dumps(rows_payload(PERSON_FIELDS, rows, "rows")),
+    "orjson_columnar": lambda rows: dumps(rows_payload(PERSON_FIELDS, rows, "columnar")),
+}
+
+
+def _time(fn: Callable[[], bytes], repeat: int):
+    samples, out = [], b""
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), out
+
+
+def run(n: int, repeat: int, level: int) -> dict:
+    rows = make_rows(n)
+    scale = 100_000 / n
+    report = {"rows": n, "gzip_level": level, "per_100k_rows": {}}
+    for name, fn in PATHS.items():
+        ms, body = _time(lambda: fn(rows), repeat)
+        gz_ms, gz = _time(lambda: gzip.compress(fn(rows), compresslevel=level), repeat)
+        report["per_100k_rows"][name] = {
+            "ms": round(ms * scale, 1),
+            "bytes": round(len(body) * scale),
+            "gzip_ms": round(gz_ms * scale, 1),
+            "gzip_bytes": round(len(gz) * scale),
+        }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--gzip-level", type=int, default=settings.gzip_level)
+    parser.add_argument("--out", help="grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, args.repeat, args.gzip_level)
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
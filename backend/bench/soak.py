@@ -0,0 +1,184 @@
+"""Soak test: horas de tráfego sintético com rotatividade, em tempo simulado.
+
+Uso (a partir da raiz do projeto):
+
+    python -m backend.bench.soak --hours 2 --people 12 --churn 0.05 --budget-mb 8 --out soak.json
+    python -m backend.bench.soak --hours 0.25 --sample-minutes 1 --no-trace
+
+Roda o `DetectionService` com a cena sintética e o detector roteirizado (como
+`backend.bench.pipeline`), num SQLite temporário e com o relógio do loop
+avançando 1/`--fps` s por frame: o tempo simulado anda tão rápido quanto o
+pipeline processa frames (com tracemalloc, ~10 fps nesta cena).
+A cada `--sample-minutes` (simulados) e com o GC recolhido, registra RSS,
+memória do tracemalloc, objetos vivos e o tamanho das estruturas do detector
+(tracks, mapa de identidade da sessão, trajetórias, anel de clipes).
+
+Depois do aquecimento (`--warmup-minutes`) a memória deve ficar estável: sai
+com 1 se a memória rastreada (ou o RSS, com `--no-trace`) crescer além de
+`--budget-mb` até o fim, listando as linhas que mais cresceram.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Iterator, List, Optional
+
+
+class SimClock:
+    def __init__(self, start: float, step: float):
+        self.now = start
+        self.step = step
+
+    def time(self) -> float:
+        return self.now
+
+    def tick(self) -> None:
+        self.now += self.step
+
+
+def _slope_mb_per_hour(samples: List[dict], key: str) -> Optional[float]:
+    pts = [(s["sim_minutes"] / 60.0, s[key]) for s in samples if s.get(key) is not None]
+    if len(pts) < 2:
+        return None
+    n = len(pts)
+    mx = sum(x for x, _ in pts) / n
+    my = sum(y for _, y in pts) / n
+    var = sum((x - mx) ** 2 for x, _ in pts)
+    return round(sum((x - mx) * (y - my) for x, y in pts) / var, 3) if var else None
+
+
+def run(hours: float, fps: float, people: int, churn: float, sample_minutes: float, warmup_minutes: float,
+        budget_mb: float, trace: bool, seed: int, log=print) -> dict:
+    from backend.bench.synthetic import ReplayCapture, Scenario, ScriptedDetector, SyntheticScene
+    from backend.core.db import init_db
+    from backend.services.detection_service import detection_service as svc
+    from backend.services.memory_service import memory_monitor
+
+    init_db()
+    frames = int(hours * 3600 * fps)
+    scenario = Scenario("soak", people=people, objects_per_person=0.3, frames=frames, churn=churn)
+    id_to_name = svc.class_names if isinstance(svc.class_names, dict) else dict(enumerate(svc.class_names))
+    name_to_id = {str(v).lower(): int(k) for k, v in id_to_name.items()}
+    object_names = [n for n, cid in name_to_id.items() if cid in svc.allowed_object_class_ids]
+    scene = SyntheticScene(scenario, object_names, seed=seed)
+    clock = SimClock(time.time(), 1.0 / fps)
+
+    samples: List[dict] = []
+    state = {"baseline": None}
+    every = max(1, int(sample_minutes * 60 * fps))
+    warmup_frames = int(warmup_minutes * 60 * fps)
+
+    def sample(n: int) -> None:
+        # Roda na thread do loop, entre dois frames: estado consistente
+        gc.collect()
+        stats = memory_monitor.stats(objects=False)
+        s = {
+            "sim_minutes": round(n / fps / 60.0, 2),
+            "frames": n,
+            "rss_mb": stats["rss_mb"],
+            "traced_mb": stats["tracemalloc"].get("current_mb"),
+            "objects": len(gc.get_objects()),
+            **svc.memory_stats(),
+        }
+        samples.append(s)
+        log(json.dumps(s))
+
+    def frames_with_clock() -> Iterator:
+        n = 0
+        for frame in scene.frames():
+            clock.tick()
+            if n == warmup_frames:
+                sample(n)
+                state["baseline"] = samples[-1]
+                if trace:
+                    memory_monitor.baseline()
+            elif n % every == 0 or n == frames - 1:
+                sample(n)
+            n += 1
+            yield frame
+
+    def stop_loop():
+        svc.running = False
+
+    if trace:
+        memory_monitor.start_tracing(1)
+    original_infer, original_clock = svc._infer, svc.clock
+    svc._infer = ScriptedDetector(scene, name_to_id)
+    svc.clock = clock.time
+    capture = ReplayCapture(frames_with_clock(), on_eof=stop_loop)
+    try:
+        t0 = time.perf_counter()
+        svc.start(capture)
+        svc.thread.join()
+        wall = time.perf_counter() - t0
+        growth_sites = memory_monitor.top_growth(10) if trace else []
+        svc.stop()
+    finally:
+        svc._infer, svc.clock = original_infer, original_clock
+        if trace:
+            memory_monitor.stop_tracing()
+
+    base, last = state["baseline"] or samples[0], samples[-1]
+    key = "traced_mb" if trace else "rss_mb"
+    after_warmup = [s for s in samples if s["frames"] >= base["frames"]]
+    growth = round(last[key] - base[key], 2)
+    return {
+        "sim_hours": round(frames / fps / 3600.0, 2),
+        "frames": frames,
+        "wall_s": round(wall, 1),
+        "people": people,
+        "churn": churn,
+        "metric": key,
+        "baseline_mb": base[key],
+        "final_mb": last[key],
+        "growth_mb": growth,
+        "slope_mb_per_hour": _slope_mb_per_hour(after_warmup, key),
+        "budget_mb": budget_mb,
+        "ok": growth <= budget_mb,
+        "final": {k: last[k] for k in last if k not in ("sim_minutes", "frames")},
+        "growth_sites": growth_sites,
+        "samples": samples,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=2.0, help="duração em tempo simulado")
+    parser.add_argument("--fps", type=float, default=5.0, help="frames por segundo simulado")
+    parser.add_argument("--people", type=int, default=12, help="pessoas simultâneas na cena")
+    parser.add_argument("--churn", type=float, default=0.05, help="prob. por frame de uma pessoa ser trocada")
+    parser.add_argument("--sample-minutes", type=float, default=10.0)
+    parser.add_argument("--warmup-minutes", type=float, default=10.0)
+    parser.add_argument("--budget-mb", type=float, default=8.0, help="crescimento máximo após o aquecimento")
+    parser.add_argument("--no-trace", action="store_true", help="sem tracemalloc (mede só RSS, mais rápido)")
+    parser.add_argument("--clips", action="store_true", help="mantém a gravação de clipes ligada")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    # Banco e clipes descartáveis: precisa ser definido antes de importar backend.core
+    tmpdir = tempfile.mkdtemp(prefix="det-soak-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'soak.db')}"
+    os.environ["CLIP_DIR"] = os.path.join(tmpdir, "clips")
+    if not args.clips:
+        os.environ["CLIP_EVENTS"] = ""
+
+    report = run(args.hours, args.fps, args.people, args.churn, args.sample_minutes, args.warmup_minutes,
+                 args.budget_mb, not args.no_trace, args.seed, log=lambda line: print(line, file=sys.stderr))
+    summary = {k: v for k, v in report.items() if k != "samples"}
+    print(json.dumps(summary, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    if not report["ok"]:
+        print(f"MEMORY BUDGET EXCEEDED: {report['metric']} cresceu {report['growth_mb']} MB "
+              f"(orçamento {report['budget_mb']} MB)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
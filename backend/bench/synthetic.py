@@ -0,0 +1,186 @@
+"""Cenas sintéticas e replay de vídeo para rodar o DetectionService sem câmera."""
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from backend.utils.color import COLOR_TABLE
+
+
+@dataclass
+class Scenario:
+    name: str
+    people: int
+    objects_per_person: float = 0.0  # fração de pessoas segurando objeto
+    frames: int = 300
+    churn: float = 0.0  # probabilidade por frame de uma pessoa sair e outra entrar
+    dropout: float = 0.0  # probabilidade por frame de uma pessoa sumir (oclusão) e voltar depois
+    dropout_frames: int = 0  # por quantos frames ela fica invisível
+    width: int = 640
+    height: int = 480
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "empty": Scenario("empty", people=0),
+    "one_person": Scenario("one_person", people=1),
+    "crowd_20": Scenario("crowd_20", people=20),
+    "handheld_many": Scenario("handheld_many", people=8, objects_per_person=1.0),
+}
+
+
+@dataclass
+class _Walker:
+    x: float
+    y: float
+    vx: float
+    vy: float
+    top_bgr: Tuple[int, int, int]
+    bottom_bgr: Tuple[int, int, int]
+    holding: Optional[str] = None
+    identity: int = 0
+    hidden: int = 0  # frames restantes invisível
+    w: int = 40
+    h: int = 120
+
+
+@dataclass
+class FrameTruth:
+    people: List[Tuple[int, int, int, int]] = field(default_factory=list)
+    objects: List[Tuple[Tuple[int, int, int, int], str]] = field(default_factory=list)
+
+
+def _bgr(name: str) -> Tuple[int, int, int]:
+    r, g, b = COLOR_TABLE[name]
+    return (b, g, r)
+
+
+class SyntheticScene:
+    """Gera frames com pessoas (retângulos bicolores) andando e objetos na mão,
+    junto com as caixas verdadeiras de cada frame (`truth`)."""
+
+    def __init__(self, scenario: Scenario, object_names: List[str], seed: int = 0):
+        self.scenario = scenario
+        self.object_names = object_names or ["bottle"]
+        self.rng = random.Random(seed)
+        self.truth = FrameTruth()
+        self.identities = 0  # pessoas distintas geradas (verdade para medir fragmentação)
+        self.walkers = [self._spawn() for _ in range(scenario.people)]
+        self._background = np.full((scenario.height, scenario.width, 3), 90, dtype=np.uint8)
+
+    def _spawn(self) -> _Walker:
+        sc, rng = self.scenario, self.rng
+        colors = [c for c in COLOR_TABLE if c != "gray"]
+        holding = rng.choice(self.object_names) if rng.random() < sc.objects_per_person else None
+        speed = rng.choice((0.0, 0.5, 3.0))  # parado, quase parado, andando
+        self.identities += 1
+        return _Walker(
+            x=rng.uniform(0, sc.width - 40), y=rng.uniform(0, sc.height - 120),
+            vx=rng.uniform(-speed, speed), vy=rng.uniform(-speed / 2, speed / 2),
+            top_bgr=_bgr(rng.choice(colors)), bottom_bgr=_bgr(rng.choice(colors)),
+            holding=holding, identity=self.identities,
+        )
+
+    def frames(self) -> Iterator[np.ndarray]:
+        sc = self.scenario
+        for _ in range(sc.frames):
+            if self.walkers and sc.churn > 0 and self.rng.random() < sc.churn:
+                self.walkers[self.rng.randrange(len(self.walkers))] = self._spawn()
+            frame = self._background.copy()
+            truth = FrameTruth()
+            for p in self.walkers:
+                if p.hidden:
+                    p.hidden -= 1
+                elif sc.dropout > 0 and self.rng.random() < sc.dropout:
+                    p.hidden = sc.dropout_frames
+                p.x += p.vx
+                p.y += p.vy
+                if not 0 <= p.x <= sc.width - p.w:
+                    p.vx = -p.vx
+                    p.x = min(max(p.x, 0), sc.width - p.w)
+                if not 0 <= p.y <= sc.height - p.h:
+                    p.vy = -p.vy
+                    p.y = min(max(p.y, 0), sc.height - p.h)
+                if p.hidden:
+                    continue
+                x1, y1 = int(p.x), int(p.y)
+                x2, y2 = x1 + p.w, y1 + p.h
+                mid = y1 + p.h // 2
+                cv2.rectangle(frame, (x1, y1), (x2, mid), p.top_bgr, -1)
+                cv2.rectangle(frame, (x1, mid), (x2, y2), p.bottom_bgr, -1)
+                truth.people.append((x1, y1, x2, y2))
+                if p.holding:
+                    # Objeto pequeno na faixa da mão direita (ver _is_in_hand)
+                    ox1, oy1 = x2 - 8, y1 + int(p.h * 0.55)
+                    obox = (ox1, oy1, ox1 + 8, oy1 + 14)
+                    cv2.rectangle(frame, obox[:2], obox[2:], (20, 20, 20), -1)
+                    truth.objects.append((obox, p.holding))
+            self.truth = truth
+            yield frame
+
+
+class ScriptedDetector:
+    """Substitui `DetectionService._infer`: devolve as caixas verdadeiras da cena,
+    isolando o custo do pipeline (tracker, cor, banco, overlay) do modelo."""
+
+    def __init__(self, scene: SyntheticScene, name_to_class_id: Dict[str, int]):
+        self.scene = scene
+        self.name_to_class_id = name_to_class_id
+
+    def __call__(self, frame: np.ndarray) -> sv.Detections:
+        truth = self.scene.truth
+        boxes = list(truth.people) + [b for b, _ in truth.objects]
+        if not boxes:
+            return sv.Detections.empty()
+        class_ids = [0] * len(truth.people) + [self.name_to_class_id.get(n, -1) for _, n in truth.objects]
+        return sv.Detections(
+            xyxy=np.array(boxes, dtype=np.float32),
+            confidence=np.full(len(boxes), 0.9, dtype=np.float32),
+            class_id=np.array(class_ids, dtype=int),
+        )
+
+
+class ReplayCapture:
+    """Interface mínima de `cv2.VideoCapture` sobre um iterador de frames.
+
+    Ao esgotar os frames chama `on_eof` (ex.: para encerrar o loop de detecção).
+    """
+
+    def __init__(self, frames: Iterator[np.ndarray], on_eof: Optional[Callable[[], None]] = None):
+        self._frames = frames
+        self.on_eof = on_eof
+        self.frames_read = 0
+
+    @classmethod
+    def from_file(cls, path: str, max_frames: Optional[int] = None, on_eof=None) -> "ReplayCapture":
+        def gen():
+            cap = cv2.VideoCapture(path)
+            n = 0
+            try:
+                while max_frames is None or n < max_frames:
+                    ok, frame = cap.read()
+                    if not ok:
+                        break
+                    n += 1
+                    yield frame
+            finally:
+                cap.release()
+        return cls(gen(), on_eof)
+
+    def read(self):
+        try:
+            frame = next(self._frames)
+        except StopIteration:
+            if self.on_eof is not None:
+                self.on_eof()
+            return False, None
+        self.frames_read += 1
+        return True, frame
+
+    def set(self, *args) -> bool:
+        return True
+
+    def release(self) -> None:
+        pass
@@ -1,3 +1,4 @@
+import json
 import os
 from dataclasses import dataclass, field
 from typing import List, Tuple, Optional
@@ -8,12 +9,70 @@ from dotenv import load_dotenv
 load_dotenv("backend/.env")
 
 
+def _check_geometry(kind: str, items, min_points: int, max_points: Optional[int] = None) -> List[dict]:
+    """Valida nomes e pontos normalizados de zonas/linhas; ValueError com a causa."""
+    if not isinstance(items, list):
+        raise ValueError(f"{kind}s: esperada uma lista de objetos")
+    out, names = [], set()
+    for n, item in enumerate(items):
+        name = item.get("name") if isinstance(item, dict) else None
+        if not isinstance(name, str) or not name:
+            raise ValueError(f"{kind}[{n}]: 'name' ausente")
+        if name in names:
+            raise ValueError(f"{kind}s: nome repetido '{name}'")
+        names.add(name)
+        points = item.get("points")
+        if not isinstance(points, (list, tuple)) or len(points) < min_points or \
+                (max_points is not None and len(points) > max_points):
+            count = f"{min_points}" if max_points == min_points else f"ao menos {min_points}"
+            raise ValueError(f"{kind} '{name}': 'points' precisa de {count} pontos [x, y]")
+        try:
+            pts = [(float(x), float(y)) for x, y in points]
+        except (TypeError, ValueError):
+            raise ValueError(f"{kind} '{name}': pontos devem ser pares [x, y] numéricos")
+        if any(not (0.0 <= v <= 1.0) for p in pts for v in p):
+            raise ValueError(f"{kind} '{name}': pontos devem estar normalizados em 0-1")
+        out.append({"name": name, "points": pts, "dwell_seconds": item.get("dwell_seconds")})
+    return out
+
+
+def validate_zones(zones) -> List[dict]:
+    """Zonas `{name, points, dwell_seconds}`: polígono com 3+ vértices em 0-1, nomes únicos,
+    `dwell_seconds` None (sem evento de permanência) ou >= 0 (0 = assim que entrar)."""
+    out = _check_geometry("zona", zones, 3)
+    for z in out:
+        dwell = z["dwell_seconds"]
+        if dwell is not None and (isinstance(dwell, bool) or not isinstance(dwell, (int, float)) or dwell < 0):
+            raise ValueError(f"zona '{z['name']}': 'dwell_seconds' deve ser null ou um número >= 0")
+        z["dwell_seconds"] = float(dwell) if dwell is not None else None
+    return out
+
+
+def validate_lines(lines) -> List[dict]:
+    """Linhas `{name, points: [a, b]}` com extremidades em 0-1 e nomes únicos."""
+    return [{"name": ln["name"], "points": ln["points"]} for ln in _check_geometry("linha", lines, 2, 2)]
+
+
+def _json_env(name: str, validate):
+    raw = os.environ.get(name, "[]")
+    try:
+        value = json.loads(raw or "[]")
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"{name}: JSON inválido ({exc})") from None
+    try:
+        return validate(value)
+    except ValueError as exc:
+        raise ValueError(f"{name}: {exc}") from None
+
+
 # class Settings (adicionar o campo handheld_classes)
 @dataclass
 class Settings:
     host: str = os.environ.get("HOST", "0.0.0.0")
     port: int = int(os.environ.get("PORT", "8000"))
     database_url: str = os.environ.get("DATABASE_URL", "sqlite:///./backend/data.db")
+    # Threads dedicadas às consultas dos endpoints async (fora do pool padrão do Starlette)
+    db_workers: int = int(os.environ.get("DB_WORKERS", "4"))
     cors_origins: List[str] = field(
         default_factory=lambda: os.environ.get(
             "CORS_ORIGINS",
@@ -30,9 +89,72 @@ class Settings:
         float(os.environ.get("ROI_X2", "0.75")),
         float(os.environ.get("ROI_Y2", "0.75")),
     )
+    # Zonas poligonais nomeadas (JSON): [{"name", "points": [[x, y], ...] normalizados 0-1, "dwell_seconds"}]
+    # Vazio = usar roi_rect como zona "default"
+    # Validadas na carga (mesmas regras do POST /api/config): erro claro em vez de falhar no loop
+    zones: List[dict] = field(default_factory=lambda: _json_env("ZONES", validate_zones))
+    # Linhas virtuais de contagem (JSON): [{"name", "points": [[x1, y1], [x2, y2]] normalizados 0-1}]
+    lines: List[dict] = field(default_factory=lambda: _json_env("LINES", validate_lines))
     qr_stop_text: str = os.environ.get("QR_STOP_TEXT", "STOP_APP")
     qr_stop_any: bool = os.environ.get("QR_STOP_ANY", "0").lower() in ("1", "true", "yes", "y")
+    # Frequência máxima de mensagens por cliente do feed push (SSE)
+    feed_max_hz: float = float(os.environ.get("FEED_MAX_HZ", "5"))
+    # Heatmap de ocupação: grade (colunas x linhas) e duração de cada bucket persistido
+    heatmap_grid: Tuple[int, int] = tuple(int(v) for v in os.environ.get("HEATMAP_GRID", "64x48").split("x"))
+    heatmap_bucket_seconds: int = int(os.environ.get("HEATMAP_BUCKET_SECONDS", "300"))
+    # Trajetórias: intervalo mínimo entre pontos (s) e tolerância do Douglas-Peucker (normalizada)
+    trajectory_interval: float = float(os.environ.get("TRAJECTORY_INTERVAL", "0.5"))
+    trajectory_epsilon: float = float(os.environ.get("TRAJECTORY_EPSILON", "0.005"))
+    # Contadores ao vivo: duração e nº de intervalos guardados, janela da média móvel de permanência
+    # e intervalo entre checkpoints no banco (s)
+    counters_interval: int = int(os.environ.get("COUNTERS_INTERVAL", "60"))
+    counters_history: int = int(os.environ.get("COUNTERS_HISTORY", "1440"))
+    dwell_window: int = int(os.environ.get("DWELL_WINDOW", "200"))
+    counters_checkpoint_seconds: float = float(os.environ.get("COUNTERS_CHECKPOINT_SECONDS", "30"))
+    # Clipes de evento: eventos que disparam gravação (vazio desliga), pasta, pré/pós-roll (s),
+    # taxa de frames guardados, limite do anel em MB, profundidade da fila de codificação e qualidade JPEG
+    clip_events: List[str] = field(
+        default_factory=lambda: os.environ.get("CLIP_EVENTS", "enter_roi,stop_by_qr").split(",")
+    )
+    clip_dir: str = os.environ.get("CLIP_DIR", "backend/clips")
+    clip_pre_seconds: float = float(os.environ.get("CLIP_PRE_SECONDS", "5"))
+    clip_post_seconds: float = float(os.environ.get("CLIP_POST_SECONDS", "5"))
+    clip_max_seconds: float = float(os.environ.get("CLIP_MAX_SECONDS", "60"))
+    clip_fps: float = float(os.environ.get("CLIP_FPS", "10"))
+    clip_buffer_mb: float = float(os.environ.get("CLIP_BUFFER_MB", "32"))
+    clip_queue_depth: int = int(os.environ.get("CLIP_QUEUE_DEPTH", "4"))
+    clip_jpeg_quality: int = int(os.environ.get("CLIP_JPEG_QUALITY", "70"))
+    # Compressão das listagens grandes (/people, /events) quando o cliente aceita gzip
+    gzip_min_bytes: int = int(os.environ.get("GZIP_MIN_BYTES", "1024"))
+    gzip_level: int = int(os.environ.get("GZIP_LEVEL", "5"))
+    # tracemalloc na inicialização (nº de frames por traceback; 0 = desligado) e limite
+    # de objetos no mapa de identidade da sessão do loop antes de liberá-lo
+    memory_trace_frames: int = int(os.environ.get("MEMORY_TRACE_FRAMES", "0"))
+    session_identity_max: int = int(os.environ.get("SESSION_IDENTITY_MAX", "2000"))
+    # Barramento de eventos do detector: sinks ativos (ring, sqlite, jsonl) e seus limites
+    event_sinks: List[str] = field(
+        default_factory=lambda: os.environ.get("EVENT_SINKS", "sqlite,ring").split(",")
+    )
+    event_ring_size: int = int(os.environ.get("EVENT_RING_SIZE", "10000"))
+    event_db_batch: int = int(os.environ.get("EVENT_DB_BATCH", "200"))
+    event_db_flush_seconds: float = float(os.environ.get("EVENT_DB_FLUSH_SECONDS", "1"))
+    # Com o banco falhando: eventos retidos no máximo (os mais antigos são descartados)
+    # e espera máxima entre tentativas (dobra a cada falha, a partir de EVENT_DB_FLUSH_SECONDS)
+    event_db_max_pending: int = int(os.environ.get("EVENT_DB_MAX_PENDING", "50000"))
+    event_db_retry_max_seconds: float = float(os.environ.get("EVENT_DB_RETRY_MAX_SECONDS", "30"))
+    event_log_dir: str = os.environ.get("EVENT_LOG_DIR", "backend/events")
+    event_log_max_mb: float = float(os.environ.get("EVENT_LOG_MAX_MB", "64"))
+    event_log_backups: int = int(os.environ.get("EVENT_LOG_BACKUPS", "5"))
+    # Re-identificação por aparência: galeria (entradas, idade máx. em s após a saída),
+    # distância máxima (1 - Bhattacharyya) e a cada quantos frames o descritor do track é atualizado
+    reid_enabled: bool = os.environ.get("REID_ENABLED", "1") == "1"
+    reid_gallery_size: int = int(os.environ.get("REID_GALLERY_SIZE", "256"))
+    reid_max_age: float = float(os.environ.get("REID_MAX_AGE", "30"))
+    reid_threshold: float = float(os.environ.get("REID_THRESHOLD", "0.2"))
+    reid_refresh_frames: int = int(os.environ.get("REID_REFRESH_FRAMES", "5"))
     openai_api_key: Optional[str] = os.environ.get("OPENAI_API_KEY")
+    # Orçamento aproximado de tokens do contexto enviado ao LLM
+    chat_context_tokens: int = int(os.environ.get("CHAT_CONTEXT_TOKENS", "3000"))
     handheld_classes: List[str] = field(
         default_factory=lambda: [s.strip() for s in os.environ.get(
             "HANDHELD_CLASSES",
@@ -1,14 +1,71 @@
-from sqlalchemy import create_engine
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from backend.core.config import settings
+from backend.core.metrics import registry
 from backend.models.base import Base
 
 
 engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Contador de versão dos dados: incrementa a cada flush com alterações.
+# Usado como chave de cache por quem deriva informação do banco (ex.: chat).
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _bump_data_version(session, flush_context):
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
+
+
+def get_data_version() -> int:
+    return _data_version
+
+
+# Executor limitado para o acesso ao banco dos endpoints async: consultas lentas
+# esperam aqui sem ocupar o event loop nem o threadpool usado pelos demais handlers.
+_db_executor = ThreadPoolExecutor(max_workers=settings.db_workers, thread_name_prefix="db")
+_db_pending = 0
+
+
+def db_pending() -> int:
+    """Chamadas de banco em execução ou na fila do executor."""
+    return _db_pending
+
+
+registry.gauge("db_executor_pending", "Chamadas de banco em execução ou na fila do executor async", db_pending)
+
+
+async def run_db(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Executa `fn(db, *args, **kwargs)` com uma sessão própria no executor de banco."""
+    global _db_pending
+
+    def call():
+        db = SessionLocal()
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    _db_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_db_executor, call)
+    finally:
+        _db_pending -= 1
+
 
 def init_db():
+    # Garante que todos os modelos estejam registrados no metadata
+    from backend.models import counters, event, heatmap, person, trajectory  # noqa: F401
+
     # Cria tabelas se não existirem
     Base.metadata.create_all(bind=engine)
 
@@ -23,4 +80,48 @@ def init_db():
         if "holding_object" not in col_names:
             conn.exec_driver_sql("ALTER TABLE people ADD COLUMN holding_object INTEGER")
         if "object_description" not in col_names:
-            conn.exec_driver_sql("ALTER TABLE people ADD COLUMN object_description TEXT")
\ No newline at end of file
+            conn.exec_driver_sql("ALTER TABLE people ADD COLUMN object_description TEXT")
+
+        # Índices de busca em bancos antigos (create_all só cria índices de tabelas novas)
+        for col in ("first_seen", "top_color", "bottom_color", "last_action"):
+            conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_people_{col} ON people ({col})")
+        _migrate_person_objects(conn)
+        _migrate_event_timestamps(conn)
+
+
+def _migrate_person_objects(conn, batch: int = 50000) -> None:
+    """Preenche person_objects a partir de people.object_description (só com a tabela vazia)."""
+    if conn.exec_driver_sql("SELECT 1 FROM person_objects LIMIT 1").first() is not None:
+        return
+    result = conn.exec_driver_sql(
+        "SELECT id, object_description FROM people WHERE object_description IS NOT NULL AND object_description != ''"
+    )
+    while True:
+        chunk = result.fetchmany(batch)
+        if not chunk:
+            break
+        pairs = [(pid, name.strip()) for pid, desc in chunk for name in desc.split(",") if name.strip()]
+        if pairs:
+            conn.exec_driver_sql("INSERT OR IGNORE INTO person_objects (person_id, name) VALUES (?, ?)", pairs)
+
+
+# PRAGMA user_version: migrações de dados já aplicadas neste arquivo
+SCHEMA_EVENTS_LOCAL_TIME = 1
+
+
+def _migrate_event_timestamps(conn) -> None:
+    """Converte para hora local os eventos gravados pelo `server_default` (UTC).
+
+    Os eventos passaram a ser gravados com o horário local do detector, como
+    `people.first_seen` e os filtros de data. As linhas antigas vieram do
+    CURRENT_TIMESTAMP do SQLite ("AAAA-MM-DD HH:MM:SS", 19 caracteres, em UTC);
+    as do ORM sempre têm microssegundos. Roda uma vez por banco: o
+    `user_version` marca a conversão e evita varrer a tabela a cada inicialização.
+    """
+    if conn.exec_driver_sql("PRAGMA user_version").scalar() >= SCHEMA_EVENTS_LOCAL_TIME:
+        return
+    conn.exec_driver_sql(
+        "UPDATE events SET timestamp = datetime(timestamp, 'localtime') || '.000000' "
+        "WHERE length(timestamp) = 19"
+    )
+    conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_EVENTS_LOCAL_TIME}")
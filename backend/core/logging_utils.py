@@ -0,0 +1,42 @@
+import logging
+import os
+import time
+from typing import Dict, Tuple
+
+
+class RateLimitFilter(logging.Filter):
+    """Deixa passar no máximo `burst` registros por `interval` segundos para cada
+    (logger, nível, mensagem-modelo); os suprimidos são contados e reportados
+    no próximo registro aceito."""
+
+    def __init__(self, interval: float = 5.0, burst: int = 1):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self._windows: Dict[Tuple[str, int, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        win = self._windows.get(key)
+        if win is None or now - win[0] >= self.interval:
+            suppressed = win[2] if win else 0
+            self._windows[key] = [now, 1, 0]
+            if suppressed:
+                record.msg = f"{record.msg} (+{suppressed} suprimidas)"
+            return True
+        if win[1] < self.burst:
+            win[1] += 1
+            return True
+        win[2] += 1
+        return False
+
+
+def get_logger(name: str, interval: float | None = None) -> logging.Logger:
+    """Logger com nível de LOG_LEVEL e limitação de taxa por mensagem."""
+    logger = logging.getLogger(name)
+    if not any(isinstance(f, RateLimitFilter) for f in logger.filters):
+        logger.addFilter(RateLimitFilter(interval=interval if interval is not None
+                                         else float(os.environ.get("LOG_RATE_INTERVAL", "5"))))
+        logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    return logger
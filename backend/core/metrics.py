@@ -0,0 +1,154 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# Buckets (segundos) adequados a estágios de um frame: de 0,1 ms a 2,5 s
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+def _fmt_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return "{" + inner + "}"
+
+
+class Counter:
+    def __init__(self, name: str, doc: str):
+        self.name = name
+        self.doc = doc
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        # += em float sob o GIL é suficiente para contadores de diagnóstico
+        self.value += amount
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter", f"{self.name} {self.value}"]
+
+
+class Gauge:
+    """Gauge com valor definido explicitamente ou lido de uma função no scrape."""
+
+    def __init__(self, name: str, doc: str, fn: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.doc = doc
+        self.value = 0.0
+        self.fn = fn
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def render(self) -> List[str]:
+        value = self.value
+        if self.fn is not None:
+            try:
+                value = float(self.fn())
+            except Exception:
+                value = float("nan")
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+
+class Histogram:
+    """Histograma de buckets fixos, opcionalmente com um label (ex.: stage).
+
+    `label_values` cria as séries de antemão (zeradas), para que apareçam em
+    /metrics antes da primeira observação.
+    """
+
+    def __init__(self, name: str, doc: str, label: Optional[str] = None, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 label_values: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series: Dict[str, List] = {}  # label -> [counts..., sum, count]
+        self._lock = threading.Lock()
+        for value in label_values:
+            self._series_for(value)
+
+    def _series_for(self, key: str) -> List:
+        s = self._series.get(key)
+        if s is None:
+            with self._lock:
+                s = self._series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0, 0])
+        return s
+
+    def observe(self, value: float, label_value: str = "") -> None:
+        s = self._series_for(label_value)
+        s[bisect.bisect_left(self.buckets, value)] += 1
+        s[-2] += value
+        s[-1] += 1
+
+    @contextmanager
+    def time(self, label_value: str = ""):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, label_value)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        out = {}
+        for key, s in list(self._series.items()):
+            out[key] = {"count": s[-1], "sum": s[-2]}
+        return out
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        for key, s in sorted(self._series.items()):
+            base = {self.label: key} if self.label else {}
+            cumulative = 0
+            for bound, n in zip(self.buckets, s):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_fmt_labels({**base, 'le': repr(bound)})} {cumulative}")
+            cumulative += s[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_fmt_labels({**base, 'le': '+Inf'})} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(base)} {s[-2]}")
+            lines.append(f"{self.name}_count{_fmt_labels(base)} {s[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, doc: str) -> Counter:
+        return self.register(Counter(name, doc))
+
+    def gauge(self, name: str, doc: str, fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, doc, fn))
+
+    def histogram(self, name: str, doc: str, label: Optional[str] = None,
+                  buckets: Sequence[float] = DEFAULT_BUCKETS, label_values: Sequence[str] = ()) -> Histogram:
+        return self.register(Histogram(name, doc, label, buckets, label_values))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics.values():
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Métricas do pipeline de detecção
+STAGES = (
+    "capture_wait", "qr_decode", "predict", "tracker_update", "dedup",
+    "color_extraction", "reid", "db_flush", "overlay_draw", "clip_buffer", "jpeg_encode",
+)
+stage_seconds = registry.histogram(
+    "detection_stage_seconds", "Tempo gasto por estágio do pipeline de detecção", label="stage", label_values=STAGES
+)
+frame_seconds = registry.histogram("detection_frame_seconds", "Tempo total de processamento de um frame")
+frames_processed = registry.counter("detection_frames_processed_total", "Frames processados pelo detector")
+frames_dropped = registry.counter("detection_frames_dropped_total", "Frames descartados (falha de leitura ou FRAME_SKIP)")
@@ -0,0 +1,57 @@
+import gzip
+import json
+from typing import Iterable, Literal, Sequence
+
+from fastapi import Request, Response
+
+from backend.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # fallback: json da stdlib (mais lento, mesmo formato)
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _default(value):
+    # Mesmo formato do orjson para datetime (ISO 8601)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"tipo não serializável: {type(value).__name__}")
+
+
+Layout = Literal["rows", "columnar"]
+
+
+def rows_payload(fields: Sequence[str], rows: Iterable[Sequence], layout: Layout = "rows"):
+    """Tuplas -> lista de objetos (`rows`, formato dos schemas) ou um array por campo (`columnar`)."""
+    if layout == "columnar":
+        rows = list(rows)
+        columns = list(zip(*rows)) if rows else [()] * len(fields)
+        return {"count": len(rows), "columns": {f: list(col) for f, col in zip(fields, columns)}}
+    return [dict(zip(fields, r)) for r in rows]
+
+
+def accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+def fast_json(request: Request, payload, status_code: int = 200) -> Response:
+    """Resposta JSON serializada direto (sem validação por response_model), com gzip
+    negociado via Accept-Encoding a partir de `gzip_min_bytes`."""
+    body = dumps(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= settings.gzip_min_bytes and accepts_gzip(request):
+        body = gzip.compress(body, compresslevel=settings.gzip_level)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
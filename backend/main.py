@@ -2,15 +2,20 @@ import os
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from backend.core.config import settings
 from backend.core.db import init_db
+from backend.core.metrics import registry
 from backend.routers.detections import router as detections_router
 from backend.routers.events import router as events_router
 from backend.routers.chat import router as chat_router
 from backend.routers.config_router import router as config_router
 from backend.routers.people import router as people_router
 from backend.routers.stats import router as stats_router
+from backend.routers.admin import router as admin_router
+from backend.routers.heatmap import router as heatmap_router
+from backend.routers.tracks import router as tracks_router
 
 
 def create_app() -> FastAPI:
@@ -32,11 +37,19 @@ def create_app() -> FastAPI:
     app.include_router(config_router, prefix="/api")
     app.include_router(people_router, prefix="/api")
     app.include_router(stats_router, prefix="/api")
+    app.include_router(admin_router, prefix="/api")
+    app.include_router(heatmap_router, prefix="/api")
+    app.include_router(tracks_router, prefix="/api")
 
     @app.get("/health")
-    def health():
+    async def health():
         return {"status": "ok"}
 
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        # Formato de exposição texto do Prometheus
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
     return app
 
 
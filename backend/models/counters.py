@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from backend.models.base import Base
+
+
+class CounterCheckpoint(Base):
+    __tablename__ = "counter_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    data = Column(Text, nullable=False)  # JSON com totais, intervalos e janela de permanência
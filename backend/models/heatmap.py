@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, DateTime, Float, LargeBinary
+from backend.models.base import Base
+
+
+class HeatmapBucket(Base):
+    __tablename__ = "heatmap_buckets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Pode haver mais de uma linha por bucket (captura parada e reiniciada); as consultas somam
+    bucket_start = Column(DateTime(timezone=True), index=True)
+    # Segundos cobertos pelo bucket (para normalizar) e dimensões da grade
+    seconds = Column(Float, nullable=False, default=0.0)
+    grid_w = Column(Integer, nullable=False)
+    grid_h = Column(Integer, nullable=False)
+    # float32 (grid_h x grid_w) em ordem C: pessoa-segundos por célula
+    data = Column(LargeBinary, nullable=False)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from backend.models.base import Base
 
@@ -8,14 +9,28 @@ class Person(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     track_id = Column(Integer, unique=True, index=True)
-    first_seen = Column(DateTime(timezone=True), server_default=func.now())
+    first_seen = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     # last_seen deve ser preenchido explicitamente quando a pessoa sair do campo
     last_seen = Column(DateTime(timezone=True), nullable=True)
-    top_color = Column(String, nullable=True)
-    bottom_color = Column(String, nullable=True)
-    last_action = Column(String, nullable=True)
+    top_color = Column(String, nullable=True, index=True)
+    bottom_color = Column(String, nullable=True, index=True)
+    last_action = Column(String, nullable=True, index=True)
     last_x = Column(Float, nullable=True)
     last_y = Column(Float, nullable=True)
     # Indicação de objetos próximos/segurados e sua descrição
     holding_object = Column(Boolean, nullable=True)
-    object_description = Column(Text, nullable=True)
\ No newline at end of file
+    # Texto "a, b" mantido por compatibilidade; a busca usa person_objects
+    object_description = Column(Text, nullable=True)
+
+    objects = relationship("PersonObject", cascade="all, delete-orphan", lazy="select")
+
+
+class PersonObject(Base):
+    """Objeto associado a uma pessoa (uma linha por nome), indexado para busca."""
+
+    __tablename__ = "person_objects"
+
+    person_id = Column(Integer, ForeignKey("people.id", ondelete="CASCADE"), primary_key=True)
+    name = Column(String, primary_key=True)
+
+    __table_args__ = (Index("ix_person_objects_name_person", "name", "person_id"),)
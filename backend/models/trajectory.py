@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, DateTime, LargeBinary
+from backend.models.base import Base
+
+
+class Trajectory(Base):
+    __tablename__ = "trajectories"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Mesmo track_id de people (já com prefixo do processo)
+    track_id = Column(Integer, index=True)
+    start_ts = Column(DateTime(timezone=True), index=True)
+    end_ts = Column(DateTime(timezone=True))
+    n_points = Column(Integer)
+    # float32 (n_points x 3) em ordem C: [segundos desde start_ts, x, y] com x/y normalizados 0-1
+    points = Column(LargeBinary)
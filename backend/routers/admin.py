@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from backend.services.detection_service import detection_service
+from backend.services.memory_service import memory_monitor
+from backend.services.profiling_service import loop_profiler
+
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+class ProfileIn(BaseModel):
+    seconds: float = 10.0
+    mode: str = "sampling"  # "sampling" | "deterministic"
+    top_n: int = 20
+
+
+@router.post("/profile")
+def profile_loop(body: ProfileIn):
+    try:
+        return loop_profiler.run(detection_service, body.seconds, mode=body.mode, top_n=body.top_n)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+class MemoryTraceIn(BaseModel):
+    enabled: bool = True
+    frames: int = 1  # profundidade do traceback por alocação
+
+
+@router.get("/memory")
+def memory_stats(top: int = Query(15, ge=1, le=100), objects: bool = True):
+    """RSS, tracemalloc (se ligado), objetos vivos por tipo e estruturas do detector.
+
+    `objects=false` evita a passada por todos os objetos do heap.
+    """
+    return {"process": memory_monitor.stats(top, objects=objects), "detector": detection_service.memory_stats()}
+
+
+@router.post("/memory/trace")
+def memory_trace(body: MemoryTraceIn):
+    """Liga (com um snapshot de referência para `growth`) ou desliga o tracemalloc."""
+    if body.enabled:
+        memory_monitor.start_tracing(body.frames)
+        memory_monitor.baseline()
+    else:
+        memory_monitor.stop_tracing()
+    return {"tracing": memory_monitor.tracing}
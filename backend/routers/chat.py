@@ -1,9 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
 
-from backend.core.db import SessionLocal
-from backend.services.chat_service import ask_llm
+from backend.services.chat_service import ask_llm, chat_stats
+from backend.services.chat_context import context_builder
 
 
 router = APIRouter(prefix="/chat", tags=["chat"])
@@ -13,15 +12,17 @@ class ChatIn(BaseModel):
     message: str
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+@router.post("/")
+async def chat(body: ChatIn):
+    answer = await ask_llm(body.message)
+    return {"answer": answer}
 
 
-@router.post("/")
-def chat(body: ChatIn, db: Session = Depends(get_db)):
-    answer = ask_llm(db, body.message)
-    return {"answer": answer}
\ No newline at end of file
+@router.get("/context-stats")
+def context_stats():
+    return context_builder.stats()
+
+
+@router.get("/stats")
+def stats():
+    return {"answers": chat_stats.as_dict(), "context": context_builder.stats()}
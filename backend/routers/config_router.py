@@ -1,14 +1,38 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
 
-from backend.core.config import settings
+from backend.core.config import settings, validate_lines, validate_zones
+from backend.services.detection_service import detection_service
+from backend.utils.zones import effective_zones
 
 
 router = APIRouter(prefix="/config", tags=["config"])
 
 
+class ZoneIn(BaseModel):
+    name: str
+    # Vértices normalizados (0-1) do polígono
+    points: list[tuple[float, float]] = Field(min_length=3)
+    # None = sem evento de permanência; 0 = dispara ao entrar
+    dwell_seconds: float | None = Field(default=None, ge=0)
+
+
+class LineIn(BaseModel):
+    name: str
+    # Extremidades normalizadas (0-1); "forward" = cruzar da esquerda para a direita de a->b
+    points: list[tuple[float, float]] = Field(min_length=2, max_length=2)
+
+
+class ModelIn(BaseModel):
+    yolo_model: str
+    imgsz: int | None = Field(default=None, ge=64, le=2048)
+
+
 class ConfigIn(BaseModel):
     roi_rect: tuple[float, float, float, float] | None = None
+    # Lista vazia volta a usar roi_rect como zona "default"
+    zones: list[ZoneIn] | None = None
+    lines: list[LineIn] | None = None
     qr_stop_text: str | None = None
     qr_stop_any: bool | None = None
     conf_threshold: float | None = None
@@ -20,16 +44,30 @@ class ConfigIn(BaseModel):
 def get_config():
     return {
         "roi_rect": settings.roi_rect,
+        "zones": effective_zones(),
+        "lines": settings.lines,
         "qr_stop_text": settings.qr_stop_text,
         "qr_stop_any": settings.qr_stop_any,
         "conf_threshold": settings.conf_threshold,
         "iou_threshold": settings.iou_threshold,
         "handheld_classes": settings.handheld_classes,
+        "yolo_model": detection_service.model_name,
+        "imgsz": detection_service.imgsz,
     }
 
 
 @router.post("/")
 def update_config(body: ConfigIn):
+    # Mesmas regras da carga de ZONES/LINES do ambiente; valida tudo antes de aplicar
+    try:
+        zones = validate_zones([z.model_dump() for z in body.zones]) if body.zones is not None else None
+        lines = validate_lines([ln.model_dump() for ln in body.lines]) if body.lines is not None else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if zones is not None:
+        settings.zones = zones
+    if lines is not None:
+        settings.lines = lines
     if body.roi_rect:
         settings.roi_rect = body.roi_rect
     if body.qr_stop_text:
@@ -42,4 +80,20 @@ def update_config(body: ConfigIn):
         settings.iou_threshold = body.iou_threshold
     if body.handheld_classes is not None:
         settings.handheld_classes = body.handheld_classes
-    return get_config()
\ No newline at end of file
+        detection_service.refresh_class_filter()
+    return get_config()
+
+
+@router.get("/model")
+def get_model():
+    return detection_service.model_status()
+
+
+@router.post("/model", status_code=202)
+def swap_model(body: ModelIn):
+    """Troca pesos/imgsz sem reiniciar: o modelo novo é carregado e aquecido em background
+    e entra entre dois frames; acompanhe por GET /api/config/model."""
+    try:
+        return detection_service.swap_model(body.yolo_model, body.imgsz)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
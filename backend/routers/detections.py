@@ -1,9 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
-from typing import List
+from typing import List, Optional
 
 from backend.schemas.common import DetectionItem
 from backend.services.detection_service import detection_service
+from backend.services.feed_service import detection_feed
 
 
 router = APIRouter(prefix="/detections", tags=["detections"])
@@ -29,11 +30,22 @@ def stream():
     )
 
 
+@router.get("/feed")
+async def feed(request: Request, max_hz: Optional[float] = None, deltas: bool = True):
+    """Server-Sent Events com detecções e status (substitui polling de /current e /status)."""
+    return StreamingResponse(
+        detection_feed(request, max_hz=max_hz, deltas=deltas),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Leituras em memória: async para rodar no event loop, sem depender do threadpool
 @router.get("/current", response_model=List[DetectionItem])
-def current():
+async def current():
     return detection_service.get_detections()
 
 
 @router.get("/status")
-def status():
+async def status():
     return {"running": detection_service.running, "stopped_by_qr": detection_service.stopped_by_qr}
\ No newline at end of file
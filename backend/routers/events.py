@@ -1,33 +1,46 @@
+import time
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Query, Request
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from backend.core.db import SessionLocal
+from backend.core.config import settings
+from backend.core.db import run_db
+from backend.core.responses import Layout, fast_json, rows_payload
 from backend.models.event import Event
-from backend.schemas.common import EventOut
+from backend.schemas.common import EventOut, RecentEventOut
+from backend.services.event_bus import EventLogReader, event_bus
 
 
 router = APIRouter(prefix="/events", tags=["events"])
 
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+EVENT_FIELDS = tuple(EventOut.model_fields)
+RECENT_FIELDS = tuple(RecentEventOut.model_fields)
 
 
 @router.get("/", response_model=List[EventOut])
-def list_events(
+async def list_events(
+    request: Request,
     event_type: Optional[str] = None,
     track_id: Optional[int] = None,
     start: Optional[str] = None,
     end: Optional[str] = None,
-    db: Session = Depends(get_db),
+    layout: Layout = "rows",
 ):
-    q = db.query(Event)
+    """Eventos mais recentes primeiro. `layout=columnar` devolve `{"count", "columns": {campo: [...]}}`."""
+    return fast_json(request, await run_db(_list_events, event_type, track_id, start, end, layout))
+
+
+def _list_events(
+    db: Session,
+    event_type: Optional[str],
+    track_id: Optional[int],
+    start: Optional[str],
+    end: Optional[str],
+    layout: Layout = "rows",
+):
+    q = db.query(*(getattr(Event, f) for f in EVENT_FIELDS))
     if event_type:
         q = q.filter(Event.event_type == event_type)
     if track_id:
@@ -37,14 +50,59 @@ def list_events(
     if end:
         q = q.filter(Event.timestamp <= datetime.fromisoformat(end))
     rows = q.order_by(Event.timestamp.desc()).all()
-    return [
-        EventOut(
-            id=r.id,
-            timestamp=r.timestamp.isoformat(),
-            event_type=r.event_type,
-            track_id=r.track_id,
-            roi_name=r.roi_name,
-            details=r.details,
-        )
-        for r in rows
-    ]
\ No newline at end of file
+    return rows_payload(EVENT_FIELDS, rows, layout)
+
+
+@router.get("/recent", response_model=List[RecentEventOut])
+async def recent_events(
+    request: Request,
+    seconds: float = Query(300, gt=0, le=86400),
+    event_type: Optional[str] = None,
+    track_id: Optional[int] = None,
+):
+    """Eventos dos últimos `seconds` segundos, mais recentes primeiro.
+
+    Servidos pelo anel em memória quando ele cobre a janela; senão pelo log
+    JSONL (se ativo e se a rotação não tiver descartado o começo da janela) e
+    por último pelo banco. O header `X-Event-Source` indica a origem.
+    """
+    since = time.time() - seconds
+    ring = event_bus.ring
+    if ring is not None and since > ring.covered_from:
+        rows = [(datetime.fromtimestamp(r.ts), r.event_type, r.track_id, r.roi_name, r.details)
+                for r in reversed(ring.query(since, event_type=event_type, track_id=track_id))]
+        source = "ring"
+    else:
+        rows = None
+        if event_bus.sink("jsonl") is not None:
+            rows = await run_in_threadpool(_recent_from_log, since, event_type, track_id)
+            source = "log"
+        if rows is None:
+            rows = await run_db(_recent_from_db, datetime.fromtimestamp(since), event_type, track_id)
+            source = "db"
+    response = fast_json(request, rows_payload(RECENT_FIELDS, rows))
+    response.headers["X-Event-Source"] = source
+    return response
+
+
+def _recent_from_log(since: float, event_type: Optional[str], track_id: Optional[int]) -> Optional[List[tuple]]:
+    """None quando a rotação já descartou o começo da janela (o banco responde)."""
+    reader = EventLogReader(settings.event_log_dir)
+    if not reader.covers(since):
+        return None
+    rows = [
+        (datetime.fromtimestamp(r["ts"]), r["event_type"], r["track_id"], r["roi_name"], r["details"])
+        for r in reader.read(since, event_type=event_type)
+        if track_id is None or r["track_id"] == track_id
+    ]
+    rows.reverse()
+    return rows
+
+
+def _recent_from_db(db: Session, since: datetime, event_type: Optional[str], track_id: Optional[int]) -> List[tuple]:
+    q = db.query(*(getattr(Event, f) for f in RECENT_FIELDS)).filter(Event.timestamp >= since)
+    if event_type:
+        q = q.filter(Event.event_type == event_type)
+    if track_id:
+        q = q.filter(Event.track_id == track_id)
+    return q.order_by(Event.timestamp.desc()).all()
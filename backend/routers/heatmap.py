@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Response
+
+from backend.core.db import run_db
+from backend.services.occupancy_service import heatmap, render_heatmap_png
+
+
+router = APIRouter(prefix="/heatmap", tags=["heatmap"])
+
+
+@router.get("/")
+async def get_heatmap(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    format: str = "png",
+    width: int = 640,
+):
+    """Ocupação acumulada em [start, end) (padrão: última hora) como PNG ou grade JSON."""
+    if format not in ("png", "json"):
+        raise HTTPException(status_code=400, detail="format deve ser 'png' ou 'json'")
+    try:
+        end_dt = datetime.fromisoformat(end) if end else datetime.now()
+        start_dt = datetime.fromisoformat(start) if start else end_dt - timedelta(hours=1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start/end devem estar em ISO 8601")
+    if start_dt >= end_dt:
+        raise HTTPException(status_code=400, detail="start deve ser anterior a end")
+
+    grid, seconds = await run_db(heatmap.window, start_dt, end_dt)
+    if format == "json":
+        return {
+            "start": start_dt.isoformat(),
+            "end": end_dt.isoformat(),
+            "bucket_seconds": heatmap.bucket_seconds,
+            "seconds": round(seconds, 2),
+            "grid_w": heatmap.grid_w,
+            "grid_h": heatmap.grid_h,
+            "person_seconds": [[round(float(v), 3) for v in row] for row in grid],
+        }
+    return Response(content=render_heatmap_png(grid, max(16, min(width, 2048))), media_type="image/png")
@@ -1,39 +1,97 @@
-from typing import List
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
 
-from backend.core.db import SessionLocal
-from backend.models.person import Person
-from backend.schemas.common import PersonOut
+from backend.core.db import run_db
+from backend.core.responses import Layout, fast_json, rows_payload
+from backend.models.person import Person, PersonObject
+from backend.schemas.common import PersonOut, PeoplePageOut
 
 
 router = APIRouter(prefix="/people", tags=["people"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _person_out(p: Person) -> PersonOut:
+    return PersonOut(
+        id=p.id,
+        track_id=p.track_id,
+        first_seen=p.first_seen.isoformat() if p.first_seen else "",
+        last_seen=p.last_seen.isoformat() if p.last_seen else None,
+        top_color=p.top_color,
+        bottom_color=p.bottom_color,
+        last_action=p.last_action,
+        holding_object=p.holding_object,
+        object_description=p.object_description,
+    )
+
+
+PERSON_FIELDS = tuple(PersonOut.model_fields)
+
+
+def _list_people(db: Session, layout: Layout):
+    # Tuplas direto do banco, sem instanciar Person/PersonOut por linha
+    rows = db.query(*(getattr(Person, f) for f in PERSON_FIELDS)).all()
+    rows = (r if r[2] is not None else (*r[:2], "", *r[3:]) for r in rows)
+    return rows_payload(PERSON_FIELDS, rows, layout)
 
 
 @router.get("/", response_model=List[PersonOut])
-def list_people(db: Session = Depends(get_db)):
-    rows = db.query(Person).all()
-    result = []
-    for p in rows:
-        result.append(
-            PersonOut(
-                id=p.id,
-                track_id=p.track_id,
-                first_seen=p.first_seen.isoformat() if p.first_seen else "",
-                last_seen=p.last_seen.isoformat() if p.last_seen else None,
-                top_color=p.top_color,
-                bottom_color=p.bottom_color,
-                last_action=p.last_action,
-                holding_object=p.holding_object,
-                object_description=p.object_description,
-            )
-        )
-    return result
\ No newline at end of file
+async def list_people(request: Request, layout: Layout = "rows"):
+    """Lista todas as pessoas. `layout=columnar` devolve `{"count", "columns": {campo: [...]}}`."""
+    return fast_json(request, await run_db(_list_people, layout))
+
+
+@router.get("/search", response_model=PeoplePageOut)
+async def search_people(
+    color: Optional[str] = None,             # parte de cima OU de baixo
+    top_color: Optional[str] = None,
+    bottom_color: Optional[str] = None,
+    action: Optional[str] = None,            # "walking" | "standing"
+    object: Optional[List[str]] = Query(None),  # repetível: todos precisam estar associados
+    holding_object: Optional[bool] = None,
+    time_from: Optional[str] = None,         # ISO, sobre first_seen
+    time_to: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = None,
+):
+    """Busca por atributos com filtros combináveis, servida pelos índices de people/person_objects.
+
+    Ordem: mais recentes primeiro (id decrescente), paginação por cursor (keyset).
+    """
+    try:
+        start_dt = datetime.fromisoformat(time_from) if time_from else None
+        end_dt = datetime.fromisoformat(time_to) if time_to else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="time_from/time_to devem estar em ISO 8601")
+    return await run_db(_search_people, color, top_color, bottom_color, action, object or [], holding_object,
+                        start_dt, end_dt, limit, cursor)
+
+
+def _search_people(db: Session, color, top_color, bottom_color, action, objects, holding_object,
+                   start_dt, end_dt, limit, cursor) -> PeoplePageOut:
+    q = db.query(Person)
+    if color:
+        q = q.filter(or_(Person.top_color == color, Person.bottom_color == color))
+    if top_color:
+        q = q.filter(Person.top_color == top_color)
+    if bottom_color:
+        q = q.filter(Person.bottom_color == bottom_color)
+    if action:
+        # "standing" na UI é "stopped" no banco
+        q = q.filter(Person.last_action == ("stopped" if action.lower() == "standing" else action.lower()))
+    for name in objects:
+        q = q.filter(Person.id.in_(select(PersonObject.person_id).where(PersonObject.name == name.strip().lower())))
+    if holding_object is not None:
+        q = q.filter(Person.holding_object == holding_object)
+    if start_dt:
+        q = q.filter(Person.first_seen >= start_dt)
+    if end_dt:
+        q = q.filter(Person.first_seen <= end_dt)
+    if cursor is not None:
+        q = q.filter(Person.id < cursor)
+
+    rows = q.order_by(Person.id.desc()).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return PeoplePageOut(items=[_person_out(p) for p in rows[:limit]], next_cursor=next_cursor)
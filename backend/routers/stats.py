@@ -1,107 +1,109 @@
 from datetime import datetime
 from typing import Optional, Dict
-from fastapi import APIRouter, Depends
-from sqlalchemy import or_
+from fastapi import APIRouter
+from sqlalchemy import and_, case, func, or_
 from sqlalchemy.orm import Session
 
-from backend.core.db import SessionLocal
+from backend.core.config import settings
+from backend.core.db import run_db
 from backend.models.person import Person
 from backend.schemas.stats import StatsOut, TimeSeriesOut
+from backend.services.counters_service import counters
 
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/", response_model=StatsOut)
-def get_stats(
+async def get_stats(
     color: Optional[str] = None,
     action: Optional[str] = None,            # "walking" | "standing"
     holding_object: Optional[bool] = None,   # true | false
     time_from: Optional[str] = None,         # ISO string
     time_to: Optional[str] = None,           # ISO string
-    db: Session = Depends(get_db),
 ):
-    q = db.query(Person)
-
+    # Consulta no executor de banco: não segura o event loop nem o threadpool
+    return await run_db(_stats, color, action, holding_object, time_from, time_to)
+
+
+def _stats(
+    db: Session,
+    color: Optional[str],
+    action: Optional[str],
+    holding_object: Optional[bool],
+    time_from: Optional[str],
+    time_to: Optional[str],
+) -> StatsOut:
     # Filtros (mesma semântica da UI)
+    conds = []
     if color:
-        q = q.filter(or_(Person.top_color == color, Person.bottom_color == color))
+        conds.append(or_(Person.top_color == color, Person.bottom_color == color))
     if action:
         # "standing" na UI é "stopped" no banco
         action_db = "stopped" if action.lower() == "standing" else action.lower()
-        q = q.filter(Person.last_action == action_db)
+        conds.append(Person.last_action == action_db)
     if holding_object is not None:
-        q = q.filter(Person.holding_object == holding_object)
+        conds.append(Person.holding_object == holding_object)
     if time_from:
         try:
-            start_dt = datetime.fromisoformat(time_from)
-            q = q.filter(Person.first_seen >= start_dt)
+            conds.append(Person.first_seen >= datetime.fromisoformat(time_from))
         except Exception:
             pass
     if time_to:
         try:
-            end_dt = datetime.fromisoformat(time_to)
-            q = q.filter(Person.first_seen <= end_dt)
+            conds.append(Person.first_seen <= datetime.fromisoformat(time_to))
         except Exception:
             pass
 
-    rows = q.all()
+    # Agregações no SQLite: nenhuma linha de `people` é carregada
+    duration = (func.julianday(Person.last_seen) - func.julianday(Person.first_seen)) * 86400.0
+    finished = and_(Person.first_seen.isnot(None), Person.last_seen.isnot(None), Person.last_seen >= Person.first_seen)
+    total, holding_count, active_in_frame, total_seconds, finished_sessions = (
+        db.query(
+            func.count(Person.id),
+            func.coalesce(func.sum(case((Person.holding_object == True, 1), else_=0)), 0),  # noqa: E712
+            # Active in frame: sem last_seen
+            func.coalesce(func.sum(case((Person.last_seen.is_(None), 1), else_=0)), 0),
+            # Tempo médio (first_seen -> last_seen) das linhas já encerradas
+            func.coalesce(func.sum(case((finished, func.round(duration)), else_=0)), 0),
+            func.coalesce(func.sum(case((finished, 1), else_=0)), 0),
+        )
+        .filter(*conds)
+        .one()
+    )
 
-    # Agregações
-    total = len(rows)
     actions_count: Dict[str, int] = {"walking": 0, "standing": 0}
-    colors_count: Dict[str, int] = {}
-    holding_count = 0
-    active_in_frame = 0
-    total_seconds = 0
-    finished_sessions = 0
+    for value, n in db.query(Person.last_action, func.count(Person.id)).filter(*conds).group_by(Person.last_action):
+        if value == "walking":
+            actions_count["walking"] += n
+        elif value == "stopped":
+            actions_count["standing"] += n
 
-    buckets: Dict[str, int] = {}
-
-    for p in rows:
-        # Actions
-        if p.last_action == "walking":
-            actions_count["walking"] += 1
-        elif p.last_action == "stopped":
-            actions_count["standing"] += 1
-
-        # Colors: somar top e bottom (ignorando None/unknown)
-        for c in (p.top_color, p.bottom_color):
+    # Colors: somar top e bottom (ignorando None/unknown)
+    colors_count: Dict[str, int] = {}
+    for col in (Person.top_color, Person.bottom_color):
+        for c, n in db.query(col, func.count(Person.id)).filter(*conds).group_by(col):
             if c and c.strip() and c.strip().lower() != "unknown":
-                colors_count[c] = (colors_count.get(c, 0) + 1)
-
-        # Holding
-        if bool(p.holding_object):
-            holding_count += 1
-
-        # Active in frame: sem last_seen
-        if p.last_seen is None:
-            active_in_frame += 1
-
-        # Tempo médio (first_seen -> last_seen)
-        if p.first_seen and p.last_seen:
-            start = p.first_seen.timestamp()
-            end = p.last_seen.timestamp()
-            if end >= start:
-                total_seconds += int(round(end - start))
-                finished_sessions += 1
-
-        # Série temporal: por minuto com base no first_seen
-        if p.first_seen:
-            label = p.first_seen.strftime("%Y-%m-%d %H:%M")
-            buckets[label] = (buckets.get(label, 0) + 1)
+                colors_count[c] = colors_count.get(c, 0) + n
+
+    # Série temporal: por minuto com base no first_seen
+    minute = func.strftime("%Y-%m-%d %H:%M", Person.first_seen)
+    series = (
+        db.query(minute, func.count(Person.id))
+        .filter(Person.first_seen.isnot(None), *conds)
+        .group_by(minute)
+        .order_by(minute)
+        .all()
+    )
 
     avg_time = int(round(total_seconds / finished_sessions)) if finished_sessions > 0 else 0
-    labels = sorted(buckets.keys())
-    data = [buckets[l] for l in labels]
+    if not any((color, action, holding_object is not None, time_from, time_to)):
+        # Sem filtros: valores mantidos pelo detector (ativos agora e permanência média).
+        # A permanência aqui é por sessão (um retorno re-identificado continua a
+        # sessão), não por linha de `people` como no caso filtrado.
+        counters.restore(db)
+        active_in_frame = counters.active
+        avg_time = int(round(counters.avg_dwell()))
 
     return StatsOut(
         total=total,
@@ -110,5 +112,13 @@ def get_stats(
         avgTime=avg_time,
         actionsCount=actions_count,
         colorsCount=colors_count,
-        timeSeries=TimeSeriesOut(labels=labels, data=data),
-    )
\ No newline at end of file
+        timeSeries=TimeSeriesOut(labels=[label for label, _ in series], data=[n for _, n in series]),
+    )
+
+
+@router.get("/live")
+async def live_stats(intervals: int = 60):
+    """Contadores ao vivo: ocupação por zona, permanência, entradas/saídas e cruzamentos de linha."""
+    if not counters.restored:
+        await run_db(counters.restore)
+    return counters.snapshot(max(0, min(intervals, settings.counters_history)))
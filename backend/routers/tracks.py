@@ -0,0 +1,43 @@
+from datetime import datetime
+
+import numpy as np
+from fastapi import APIRouter, HTTPException
+from sqlalchemy.orm import Session
+
+from backend.core.db import run_db
+from backend.models.trajectory import Trajectory
+from backend.services.occupancy_service import trajectories
+
+
+router = APIRouter(prefix="/tracks", tags=["tracks"])
+
+
+def _points(start_ts: float, pts: np.ndarray) -> list:
+    # [timestamp epoch, x, y] com x/y normalizados 0-1
+    return [[round(start_ts + float(t), 2), round(float(x), 4), round(float(y), 4)] for t, x, y in pts]
+
+
+def _stored_segments(db: Session, track_id: int) -> list:
+    rows = db.query(Trajectory).filter(Trajectory.track_id == track_id).order_by(Trajectory.start_ts).all()
+    segments = []
+    for r in rows:
+        pts = np.frombuffer(r.points, dtype=np.float32).reshape(-1, 3)
+        segments.append({
+            "start": r.start_ts.isoformat(),
+            "end": r.end_ts.isoformat() if r.end_ts else None,
+            "points": _points(r.start_ts.timestamp(), pts),
+        })
+    return segments
+
+
+@router.get("/{track_id}/path")
+async def track_path(track_id: int):
+    """Trajetória do track (mesmo track_id de /people): segmentos gravados + o segmento em andamento."""
+    segments = await run_db(_stored_segments, track_id)
+    live = trajectories.live(track_id)
+    if live is not None:
+        start_ts, pts = live
+        segments.append({"start": datetime.fromtimestamp(start_ts).isoformat(), "end": None, "live": True, "points": _points(start_ts, pts)})
+    if not segments:
+        raise HTTPException(status_code=404, detail="Trajetória não encontrada")
+    return {"track_id": track_id, "segments": segments}
@@ -16,7 +16,16 @@ class EventOut(BaseModel):
     id: int
     timestamp: str
     event_type: str
-    track_id: int
+    track_id: int | None  # None em eventos do sistema (system_stopped, stop_by_qr)
+    roi_name: str | None
+    details: str | None
+
+
+class RecentEventOut(BaseModel):
+    # Eventos recentes podem vir do anel em memória/log, sem id do banco
+    timestamp: str
+    event_type: str
+    track_id: int | None
     roi_name: str | None
     details: str | None
 
@@ -30,4 +39,10 @@ class PersonOut(BaseModel):
     bottom_color: str | None
     last_action: str | None
     holding_object: bool | None = None
-    object_description: str | None = None
\ No newline at end of file
+    object_description: str | None = None
+
+
+class PeoplePageOut(BaseModel):
+    items: List[PersonOut]
+    # Passar como ?cursor= para a próxima página; None = fim
+    next_cursor: int | None = None
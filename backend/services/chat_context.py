@@ -0,0 +1,325 @@
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, or_
+from sqlalchemy.orm import Session
+
+from backend.core.config import settings
+from backend.core.db import SessionLocal, get_data_version
+from backend.models.event import Event
+from backend.models.person import Person
+from backend.services.event_bus import event_bus
+from backend.utils.color import COLOR_TABLE
+
+
+# Estimativa grosseira: ~4 caracteres por token (sem depender de tokenizer)
+CHARS_PER_TOKEN = 4
+ACTION_TERMS = ("walking", "stopped")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _split_objects(desc: Optional[str]) -> List[str]:
+    if not desc:
+        return []
+    return [s.strip().lower() for s in desc.split(",") if s.strip()]
+
+
+def _hour_of(dt) -> Optional[int]:
+    return dt.hour if dt is not None else None
+
+
+class ContextAggregates:
+    """Contagens pré-agregadas de pessoas/eventos mantidas incrementalmente.
+
+    Semeadas uma vez com GROUP BY e depois atualizadas a cada flush
+    (via listener em SessionLocal), sem reler o histórico.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seeded = False
+        self.people = 0
+        self.holding = 0
+        self.top_colors: Counter = Counter()
+        self.bottom_colors: Counter = Counter()
+        self.actions: Counter = Counter()
+        self.objects: Counter = Counter()
+        self.hours: Counter = Counter()
+        self.event_types: Counter = Counter()
+
+    def reset(self):
+        with self._lock:
+            self.seeded = False
+
+    def seed(self, db: Session):
+        with self._lock:
+            self.people = db.query(func.count(Person.id)).scalar() or 0
+            self.holding = db.query(func.count(Person.id)).filter(Person.holding_object.is_(True)).scalar() or 0
+            self.top_colors = Counter({c: n for c, n in db.query(Person.top_color, func.count()).group_by(Person.top_color) if c})
+            self.bottom_colors = Counter({c: n for c, n in db.query(Person.bottom_color, func.count()).group_by(Person.bottom_color) if c})
+            self.actions = Counter({a: n for a, n in db.query(Person.last_action, func.count()).group_by(Person.last_action) if a})
+            self.objects = Counter()
+            for desc, n in db.query(Person.object_description, func.count()).group_by(Person.object_description):
+                for o in _split_objects(desc):
+                    self.objects[o] += n
+            # SQLite: hora local do first_seen
+            hour_col = func.strftime("%H", Person.first_seen)
+            self.hours = Counter({int(h): n for h, n in db.query(hour_col, func.count()).group_by(hour_col) if h is not None})
+            self.event_types = Counter({t: n for t, n in db.query(Event.event_type, func.count()).group_by(Event.event_type) if t})
+            self.seeded = True
+
+    def _apply_person(self, values: Tuple, sign: int):
+        top, bottom, action, holding, desc, hour = values
+        self.people += sign
+        if holding:
+            self.holding += sign
+        if top:
+            self.top_colors[top] += sign
+        if bottom:
+            self.bottom_colors[bottom] += sign
+        if action:
+            self.actions[action] += sign
+        for o in _split_objects(desc):
+            self.objects[o] += sign
+        if hour is not None:
+            self.hours[hour] += sign
+
+    def apply_changes(self, added: Iterable[Tuple], removed: Iterable[Tuple], events: Iterable[str]):
+        with self._lock:
+            if not self.seeded:
+                return
+            for values in removed:
+                self._apply_person(values, -1)
+            for values in added:
+                self._apply_person(values, +1)
+            for etype in events:
+                if etype:
+                    self.event_types[etype] += 1
+
+    def summary_lines(self) -> List[str]:
+        def fmt(counter: Counter) -> str:
+            return ", ".join(f"{k}={v}" for k, v in sorted(counter.items(), key=lambda kv: str(kv[0])) if v > 0)
+
+        with self._lock:
+            return [
+                f"People count: {self.people}",
+                f"Holding objects: {self.holding}",
+                f"Allowed object classes: {', '.join(settings.handheld_classes)}",
+                f"Top colors: {fmt(self.top_colors)}",
+                f"Bottom colors: {fmt(self.bottom_colors)}",
+                f"Actions: {fmt(self.actions)}",
+                f"Objects summary: {fmt(self.objects)}",
+                f"People by hour of first_seen: {fmt(self.hours)}",
+                f"Events by type: {fmt(self.event_types)}",
+            ]
+
+
+_PERSON_FIELDS = ("top_color", "bottom_color", "last_action", "holding_object", "object_description", "first_seen")
+
+
+def _person_values(p: Person) -> Tuple:
+    return (p.top_color, p.bottom_color, p.last_action, bool(p.holding_object), p.object_description, _hour_of(p.first_seen))
+
+
+def _person_old_values(p: Person) -> Optional[Tuple]:
+    # Valores anteriores ao flush a partir do histórico de atributos;
+    # None se algum valor antigo não estiver disponível (atributo expirado)
+    state = inspect(p)
+    old = {}
+    for name in _PERSON_FIELDS:
+        hist = state.attrs[name].history
+        if hist.deleted:
+            old[name] = hist.deleted[0]
+        elif hist.unchanged:
+            old[name] = hist.unchanged[0]
+        elif hist.added:
+            return None
+        else:
+            old[name] = getattr(p, name)
+    return (old["top_color"], old["bottom_color"], old["last_action"], bool(old["holding_object"]),
+            old["object_description"], _hour_of(old["first_seen"]))
+
+
+class ChatContextBuilder:
+    """Monta o contexto do chat dentro de um orçamento de tokens.
+
+    Resumo agregado sempre presente; linhas de detalhe (pessoas e eventos
+    mais recentes, priorizando as que casam com termos da pergunta) até
+    esgotar o orçamento. O texto renderizado é cacheado pela versão dos dados.
+    """
+
+    def __init__(self, token_budget: Optional[int] = None, cache_size: int = 32):
+        self.token_budget = token_budget
+        self.aggregates = ContextAggregates()
+        self._cache: Dict[Tuple, str] = {}
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.last_build_ms = 0.0
+        self.last_tokens = 0
+        self.last_detail_rows = 0
+
+    # --- listener de sessão ---------------------------------------------
+    def on_before_flush(self, session, flush_context, instances):
+        added: List[Tuple] = []
+        removed: List[Tuple] = []
+        events: List[str] = []
+        for obj in session.new:
+            if isinstance(obj, Person):
+                added.append(_person_values(obj))
+            elif isinstance(obj, Event):
+                events.append(obj.event_type)
+        for obj in session.dirty:
+            if isinstance(obj, Person) and session.is_modified(obj):
+                old = _person_old_values(obj)
+                if old is None:
+                    self.aggregates.reset()
+                    return
+                removed.append(old)
+                added.append(_person_values(obj))
+        for obj in session.deleted:
+            if isinstance(obj, Person):
+                old = _person_old_values(obj)
+                if old is None:
+                    self.aggregates.reset()
+                    return
+                removed.append(old)
+        if added or removed or events:
+            self.aggregates.apply_changes(added, removed, events)
+            session.info["ctx_pending"] = True
+
+    def on_commit(self, session):
+        session.info.pop("ctx_pending", None)
+
+    def on_rollback(self, session, previous_transaction):
+        # Mudanças já contabilizadas podem ter sido desfeitas: ressemeia
+        if session.info.pop("ctx_pending", None):
+            self.aggregates.reset()
+
+    # --- construção -------------------------------------------------------
+    def _budget(self) -> int:
+        return self.token_budget if self.token_budget is not None else settings.chat_context_tokens
+
+    @staticmethod
+    def relevant_terms(message: str) -> Tuple[str, ...]:
+        text = (message or "").lower()
+        vocab = set(COLOR_TABLE.keys()) | set(ACTION_TERMS) | {c.lower().strip() for c in settings.handheld_classes}
+        return tuple(sorted(t for t in vocab if t and t in text))
+
+    def build(self, db: Session, message: str = "") -> str:
+        terms = self.relevant_terms(message)
+        key = (get_data_version(), event_bus.version, terms, self._budget())
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
+
+        t0 = time.perf_counter()
+        if not self.aggregates.seeded:
+            self.aggregates.seed(db)
+        lines = self.aggregates.summary_lines()
+        budget = self._budget()
+        used = sum(estimate_tokens(l) + 1 for l in lines)
+        remaining = max(0, budget - used)
+        # 60% para pessoas, restante para eventos
+        people_lines = self._people_lines(db, terms, int(remaining * 0.6))
+        used += sum(estimate_tokens(l) + 1 for l in people_lines)
+        event_lines = self._event_lines(db, max(0, budget - used))
+        if people_lines:
+            lines.append("Recent people:")
+            lines.extend(people_lines)
+        if event_lines:
+            lines.append("Recent events:")
+            lines.extend(event_lines)
+        ctx = "\n".join(lines)
+
+        with self._lock:
+            self.last_build_ms = (time.perf_counter() - t0) * 1000.0
+            self.last_tokens = estimate_tokens(ctx)
+            self.last_detail_rows = len(people_lines) + len(event_lines)
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            self._cache[key] = ctx
+        return ctx
+
+    @staticmethod
+    def _fill(rows, fmt, budget: int, seen: set, out: List[str]) -> int:
+        used = 0
+        for r in rows:
+            if r.id in seen:
+                continue
+            line = fmt(r)
+            cost = estimate_tokens(line) + 1
+            if used + cost > budget:
+                return -1
+            seen.add(r.id)
+            out.append(line)
+            used += cost
+        return used
+
+    def _people_lines(self, db: Session, terms: Tuple[str, ...], budget: int) -> List[str]:
+        def fmt(p: Person) -> str:
+            return (f"Person track {p.track_id}: first_seen={p.first_seen}, last_seen={p.last_seen}, "
+                    f"top_color={p.top_color}, bottom_color={p.bottom_color}, last_action={p.last_action}, "
+                    f"holding_object={bool(p.holding_object)}, objects={p.object_description or ''}")
+
+        out: List[str] = []
+        seen: set = set()
+        # Limite de linhas lidas: nunca mais do que cabe no orçamento
+        max_rows = max(1, budget // 20)
+        if terms:
+            conds = []
+            for t in terms:
+                conds.extend([Person.top_color == t, Person.bottom_color == t, Person.last_action == t,
+                              Person.object_description.like(f"%{t}%")])
+            rows = db.query(Person).filter(or_(*conds)).order_by(Person.id.desc()).limit(max_rows).all()
+            if self._fill(rows, fmt, budget, seen, out) < 0:
+                return out
+        used = sum(estimate_tokens(l) + 1 for l in out)
+        rows = db.query(Person).order_by(Person.id.desc()).limit(max_rows).all()
+        self._fill(rows, fmt, budget - used, seen, out)
+        return out
+
+    def _event_lines(self, db: Session, budget: int) -> List[str]:
+        def fmt(e: Event) -> str:
+            return f"{e.timestamp} type={e.event_type} track={e.track_id} details={e.details}"
+
+        out: List[str] = []
+        max_rows = max(1, budget // 12)
+        ring = event_bus.ring
+        if ring is not None and len(ring) >= max_rows:
+            # O anel já tem os max_rows eventos mais recentes (e os ainda não gravados no banco)
+            rows = list(reversed(ring.latest(max_rows)))
+        else:
+            rows = db.query(Event).order_by(Event.id.desc()).limit(max_rows).all()
+        self._fill(rows, fmt, budget, set(), out)
+        # Ordem cronológica para leitura do modelo
+        out.reverse()
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "token_budget": self._budget(),
+                "last_build_ms": round(self.last_build_ms, 3),
+                "last_tokens": self.last_tokens,
+                "last_detail_rows": self.last_detail_rows,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "data_version": get_data_version(),
+            }
+
+
+# Singleton
+context_builder = ChatContextBuilder()
+event.listen(SessionLocal, "before_flush", context_builder.on_before_flush)
+event.listen(SessionLocal, "after_commit", context_builder.on_commit)
+event.listen(SessionLocal, "after_soft_rollback", context_builder.on_rollback)
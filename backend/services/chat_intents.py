@@ -0,0 +1,252 @@
+import datetime
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from backend.core.config import settings
+from backend.models.event import Event
+from backend.models.person import Person
+from backend.utils.color import COLOR_TABLE
+
+
+# Vocabulário (sem acentos) -> valor gravado no banco
+COLOR_ALIASES = {
+    "vermelho": "red", "vermelha": "red", "vermelhos": "red", "vermelhas": "red",
+    "azul": "blue", "azuis": "blue",
+    "verde": "green", "verdes": "green",
+    "preto": "black", "preta": "black", "pretos": "black", "pretas": "black",
+    "branco": "white", "branca": "white", "brancos": "white", "brancas": "white",
+    "cinza": "gray", "grey": "gray", "cinzas": "gray",
+    "laranja": "orange",
+    "amarelo": "yellow", "amarela": "yellow", "amarelos": "yellow", "amarelas": "yellow",
+    "roxo": "purple", "roxa": "purple", "roxos": "purple", "roxas": "purple",
+    "marrom": "brown", "marrons": "brown",
+}
+ACTION_ALIASES = {
+    "walking": "walking", "andando": "walking", "caminhando": "walking",
+    "stopped": "stopped", "standing": "stopped", "parado": "stopped", "parada": "stopped",
+    "parados": "stopped", "paradas": "stopped",
+}
+OBJECT_ALIASES = {
+    "garrafa": "bottle", "garrafas": "bottle",
+    "copo": "cup", "copos": "cup", "xicara": "cup", "caneca": "cup",
+    "celular": "cell phone", "celulares": "cell phone", "telefone": "cell phone", "phone": "cell phone",
+    "controle": "remote", "livro": "book", "livros": "book",
+    "bola": "sports ball", "ball": "sports ball",
+}
+TOP_WORDS = ("top", "shirt", "camisa", "camiseta", "blusa", "parte de cima")
+BOTTOM_WORDS = ("bottom", "pants", "trousers", "calca", "short", "saia", "parte de baixo")
+HOLDING_WORDS = ("holding", "segurando", "com objeto", "com objetos", "carregando", "with object", "with objects", "with an object")
+PEOPLE_WORDS = ("people", "person", "persons", "pessoa", "pessoas", "alguem", "individuos")
+COLOR_WORDS = ("color", "colour", "colors", "colours", "cor", "cores", "wore", "wearing", "dressed", "vestindo", "vestida", "vestido")
+COUNT_PATTERN = re.compile(r"\b(how many|quantas|quantos|numero de|number of|count)\b")
+COLOR_SUMMARY_PATTERN = re.compile(r"\b(which colou?rs?|what colou?rs?|quais (as )?cores|cor(es)? mais comu(m|ns)|most common colou?r)\b")
+OBJECT_SUMMARY_PATTERN = re.compile(r"\b(which objects|what objects|quais (os )?objetos|objetos? mais comu(m|ns)|most common objects?)\b")
+# Perguntas abertas ficam com o LLM
+OPEN_QUESTION_PATTERN = re.compile(r"\b(why|explain|describe|por que|porque|explique|descreva|resuma|summarize)\b")
+ROI_WORDS = ("roi", "zona", "zone", "area", "region", "regiao")
+ENTER_WORDS = ("enter", "entered", "entries", "entrada", "entradas", "entraram", "entrou")
+EXIT_WORDS = ("exit", "exited", "exits", "left", "saida", "saidas", "sairam", "saiu")
+PT_MARKERS = ("quantas", "quantos", "quais", "hoje", "ontem", "pessoas", "cor", "cores", "objetos", "entre")
+BETWEEN_PATTERN = re.compile(r"\b(?:between|entre)\s+(\d{1,2})(?:[:h](\d{2})?)?\s*(?:and|e)\s+(\d{1,2})(?:[:h](\d{2})?)?")
+LAST_MINUTES_PATTERN = re.compile(r"\b(?:last|ultimos?)\s+(\d+)\s*(?:minutes?|minutos?|min)\b")
+
+
+def normalize_question(text: str) -> str:
+    """Minúsculas, sem acentos/pontuação e com espaços colapsados."""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii").lower()
+    text = re.sub(r"[^a-z0-9: ]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _has_word(text: str, words) -> bool:
+    return any(re.search(rf"\b{re.escape(w)}\b", text) for w in words)
+
+
+@dataclass
+class Intent:
+    kind: str  # "count_people" | "count_events" | "color_summary" | "object_summary"
+    colors: List[str] = field(default_factory=list)
+    color_part: Optional[str] = None  # "top" | "bottom" | None (qualquer)
+    action: Optional[str] = None
+    objects: List[str] = field(default_factory=list)
+    holding: bool = False
+    event_type: Optional[str] = None
+    time_from: Optional[datetime.datetime] = None
+    time_to: Optional[datetime.datetime] = None
+    portuguese: bool = False
+
+
+def _parse_time_range(text: str, now: datetime.datetime) -> Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]:
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    m = BETWEEN_PATTERN.search(text)
+    if m:
+        h1, m1, h2, m2 = int(m.group(1)), int(m.group(2) or 0), int(m.group(3)), int(m.group(4) or 0)
+        if h1 < 24 and h2 < 24 and m1 < 60 and m2 < 60:
+            day = midnight - datetime.timedelta(days=1) if _has_word(text, ("yesterday", "ontem")) else midnight
+            return day.replace(hour=h1, minute=m1), day.replace(hour=h2, minute=m2)
+    m = LAST_MINUTES_PATTERN.search(text)
+    if m:
+        return now - datetime.timedelta(minutes=int(m.group(1))), None
+    if _has_word(text, ("last hour", "ultima hora")):
+        return now - datetime.timedelta(hours=1), None
+    if _has_word(text, ("today", "hoje")):
+        return midnight, None
+    if _has_word(text, ("yesterday", "ontem")):
+        return midnight - datetime.timedelta(days=1), midnight
+    return None, None
+
+
+def parse_intent(message: str, now: Optional[datetime.datetime] = None) -> Optional[Intent]:
+    """Reconhece perguntas estruturadas; None se a pergunta deve ir ao LLM."""
+    text = normalize_question(message)
+    if not text or OPEN_QUESTION_PATTERN.search(text):
+        return None
+    now = now or datetime.datetime.now()
+    portuguese = _has_word(text, PT_MARKERS)
+    time_from, time_to = _parse_time_range(text, now)
+
+    if COLOR_SUMMARY_PATTERN.search(text):
+        return Intent(kind="color_summary", time_from=time_from, time_to=time_to, portuguese=portuguese)
+    if OBJECT_SUMMARY_PATTERN.search(text):
+        return Intent(kind="object_summary", time_from=time_from, time_to=time_to, portuguese=portuguese)
+    if not COUNT_PATTERN.search(text):
+        return None
+
+    if _has_word(text, ROI_WORDS) or _has_word(text, ENTER_WORDS + EXIT_WORDS):
+        if _has_word(text, ENTER_WORDS):
+            etype = "enter_roi"
+        elif _has_word(text, EXIT_WORDS):
+            etype = "exit_roi"
+        else:
+            return None
+        return Intent(kind="count_events", event_type=etype, time_from=time_from, time_to=time_to, portuguese=portuguese)
+
+    colors = sorted({c for c in COLOR_TABLE if _has_word(text, (c,))} |
+                    {v for k, v in COLOR_ALIASES.items() if _has_word(text, (k,))})
+    actions = {v for k, v in ACTION_ALIASES.items() if _has_word(text, (k,))}
+    # Combinações ambíguas ("red or blue", "andando ou parado") ficam com o LLM
+    if len(actions) > 1 or len(colors) > 1:
+        return None
+    handheld = {c.lower().strip() for c in settings.handheld_classes}
+    objects = sorted(({o for o in handheld if o and _has_word(text, (o,))} |
+                      {v for k, v in OBJECT_ALIASES.items() if _has_word(text, (k,))}) & handheld)
+    holding = _has_word(text, HOLDING_WORDS)
+    # Filtro mencionado mas não reconhecido (ex.: cor fora da tabela): deixa com o LLM
+    if _has_word(text, COLOR_WORDS) and not colors:
+        return None
+    if not (_has_word(text, PEOPLE_WORDS) or colors or actions or objects or holding):
+        return None
+    color_part = None
+    if colors:
+        top = _has_word(text, TOP_WORDS)
+        bottom = _has_word(text, BOTTOM_WORDS)
+        if top != bottom:
+            color_part = "top" if top else "bottom"
+    return Intent(
+        kind="count_people",
+        colors=colors,
+        color_part=color_part,
+        action=next(iter(actions), None),
+        objects=objects,
+        holding=holding,
+        time_from=time_from,
+        time_to=time_to,
+        portuguese=portuguese,
+    )
+
+
+def _people_query(db: Session, intent: Intent, *cols):
+    q = db.query(*cols) if cols else db.query(Person)
+    if intent.time_from is not None:
+        q = q.filter(Person.first_seen >= intent.time_from)
+    if intent.time_to is not None:
+        q = q.filter(Person.first_seen <= intent.time_to)
+    return q
+
+
+def _describe_filters(intent: Intent) -> str:
+    parts = []
+    if intent.colors:
+        where = {"top": " (top)", "bottom": " (bottom)"}.get(intent.color_part or "", "")
+        parts.append("/".join(intent.colors) + where)
+    if intent.action:
+        parts.append(intent.action)
+    if intent.objects:
+        parts.append("+".join(intent.objects))
+    elif intent.holding:
+        parts.append("holding")
+    if intent.time_from is not None or intent.time_to is not None:
+        start = intent.time_from.strftime("%Y-%m-%d %H:%M") if intent.time_from else "..."
+        end = intent.time_to.strftime("%Y-%m-%d %H:%M") if intent.time_to else "..."
+        parts.append(f"{start} -> {end}")
+    return ", ".join(parts)
+
+
+def answer_intent(db: Session, intent: Intent) -> str:
+    pt = intent.portuguese
+    if intent.kind == "count_people":
+        q = _people_query(db, intent, func.count(Person.id))
+        for c in intent.colors:
+            if intent.color_part == "top":
+                q = q.filter(Person.top_color == c)
+            elif intent.color_part == "bottom":
+                q = q.filter(Person.bottom_color == c)
+            else:
+                q = q.filter(or_(Person.top_color == c, Person.bottom_color == c))
+        if intent.action:
+            q = q.filter(Person.last_action == intent.action)
+        for o in intent.objects:
+            q = q.filter(Person.object_description.like(f"%{o}%"))
+        if intent.holding and not intent.objects:
+            q = q.filter(Person.holding_object.is_(True))
+        n = q.scalar() or 0
+        filters = _describe_filters(intent)
+        suffix = f" [{filters}]" if filters else ""
+        return f"{n} pessoa(s){suffix}." if pt else f"{n} people{suffix}."
+
+    if intent.kind == "count_events":
+        q = db.query(func.count(Event.id)).filter(Event.event_type == intent.event_type)
+        if intent.time_from is not None:
+            q = q.filter(Event.timestamp >= intent.time_from)
+        if intent.time_to is not None:
+            q = q.filter(Event.timestamp <= intent.time_to)
+        n = q.scalar() or 0
+        filters = _describe_filters(intent)
+        suffix = f" [{filters}]" if filters else ""
+        return f"{n} evento(s) {intent.event_type}{suffix}." if pt else f"{n} {intent.event_type} events{suffix}."
+
+    if intent.kind == "color_summary":
+        counts = {}
+        for col in (Person.top_color, Person.bottom_color):
+            for c, n in _people_query(db, intent, col, func.count()).group_by(col):
+                if c and c != "unknown":
+                    counts[c] = counts.get(c, 0) + n
+        if not counts:
+            return "Nenhuma cor registrada." if pt else "No colours recorded."
+        ranked = ", ".join(f"{c}={n}" for c, n in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])))
+        return f"Cores (top+bottom): {ranked}." if pt else f"Colours (top+bottom): {ranked}."
+
+    if intent.kind == "object_summary":
+        counts = {}
+        q = _people_query(db, intent, Person.object_description, func.count()).group_by(Person.object_description)
+        for desc, n in q:
+            for o in [s.strip().lower() for s in (desc or "").split(",") if s.strip()]:
+                counts[o] = counts.get(o, 0) + n
+        if not counts:
+            return "Nenhum objeto registrado." if pt else "No objects recorded."
+        ranked = ", ".join(f"{o}={n}" for o, n in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])))
+        return f"Objetos: {ranked}." if pt else f"Objects: {ranked}."
+
+    raise ValueError(f"intent desconhecido: {intent.kind}")
+
+
+def answer_locally(db: Session, message: str) -> Optional[str]:
+    intent = parse_intent(message)
+    if intent is None:
+        return None
+    return answer_intent(db, intent)
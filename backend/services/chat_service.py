@@ -1,58 +1,170 @@
-import os
-from typing import List
-from openai import OpenAI
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+from openai import AsyncOpenAI
 from sqlalchemy.orm import Session
-from collections import Counter
 from backend.core.config import settings
-from backend.models.event import Event
-from backend.models.person import Person
-from backend.schemas.common import DetectionItem
-
-def _build_context(db: Session) -> str:
-    people = db.query(Person).all()
-    events = db.query(Event).order_by(Event.timestamp.asc()).all()
-
-    # Agregado de objetos
-    obj_counter = Counter()
-    holding_count = 0
-    for p in people:
-        if bool(p.holding_object):
-            holding_count += 1
-        if p.object_description:
-            for o in [s.strip().lower() for s in p.object_description.split(",") if s.strip()]:
-                obj_counter[o] += 1
-
-    context = [
-        f"People count: {len(people)}",
-        f"Holding objects: {holding_count}",
-        f"Allowed object classes: {', '.join(settings.handheld_classes)}",
-    ]
-    for p in people:
-        context.append(
-            f"Person track {p.track_id}: top_color={p.top_color}, bottom_color={p.bottom_color}, last_action={p.last_action}, holding_object={bool(p.holding_object)}, objects={p.object_description or ''}"
-        )
-    context.append("Events:")
-    for e in events:
-        context.append(
-            f"{e.timestamp} type={e.event_type} track={e.track_id} details={e.details}"
-        )
-    if obj_counter:
-        summary = ", ".join([f"{k}={obj_counter[k]}" for k in sorted(obj_counter.keys())])
-        context.append(f"Objects summary: {summary}")
-    return "\n".join(context)
-
-def ask_llm(db: Session, message: str) -> str:
+from backend.core.db import get_data_version, run_db
+from backend.services.chat_context import context_builder, estimate_tokens
+from backend.services.chat_intents import answer_locally, normalize_question
+
+
+class StubLLMClient:
+    """Cliente falso com a mesma interface de `AsyncOpenAI().chat.completions`.
+
+    Útil em testes/benchmarks: registra as chamadas e devolve uma resposta fixa
+    (ou calculada por `responder(messages)`), sem acesso à rede. `delay` simula
+    a latência da chamada (sem bloquear o event loop).
+    """
+
+    def __init__(self, answer: str = "stub answer", responder=None, delay: float = 0.0):
+        self.answer = answer
+        self.responder = responder
+        self.delay = delay
+        self.calls: List[dict] = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model: str, messages: list, **kwargs):
+        self.calls.append({"model": model, "messages": messages, **kwargs})
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+        content = self.responder(messages) if self.responder else self.answer
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+_llm_client = None
+_openai_client = None
+
+
+def set_llm_client(client) -> None:
+    """Substitui o cliente LLM (ex.: StubLLMClient); None volta ao OpenAI."""
+    global _llm_client
+    _llm_client = client
+
+
+def _get_client():
+    global _openai_client
+    if _llm_client is not None:
+        return _llm_client
     if not settings.openai_api_key:
+        return None
+    # Um cliente por processo: reaproveita o pool de conexões HTTP entre perguntas
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+    return _openai_client
+
+
+class AnswerCache:
+    """LRU de respostas do LLM por (pergunta normalizada, versão dos dados)."""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._items: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, int]) -> Optional[str]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple[str, int], value: str) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+answer_cache = AnswerCache()
+
+
+class ChatStats:
+    """Contadores por caminho de resposta (local, cache, LLM)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.local_answers = 0
+        self.cache_hits = 0
+        self.llm_calls = 0
+        self.llm_prompt_tokens = 0  # estimativa, para custo
+        self.local_ms_total = 0.0
+        self.llm_ms_total = 0.0
+
+    def record(self, path: str, ms: float, prompt_tokens: int = 0):
+        with self._lock:
+            if path == "local":
+                self.local_answers += 1
+                self.local_ms_total += ms
+            elif path == "cache":
+                self.cache_hits += 1
+            else:
+                self.llm_calls += 1
+                self.llm_ms_total += ms
+                self.llm_prompt_tokens += prompt_tokens
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "local_answers": self.local_answers,
+                "cache_hits": self.cache_hits,
+                "llm_calls": self.llm_calls,
+                "llm_prompt_tokens": self.llm_prompt_tokens,
+                "avg_local_ms": round(self.local_ms_total / self.local_answers, 3) if self.local_answers else 0.0,
+                "avg_llm_ms": round(self.llm_ms_total / self.llm_calls, 3) if self.llm_calls else 0.0,
+                "cache_size": len(answer_cache),
+            }
+
+
+chat_stats = ChatStats()
+
+
+def _build_context(db: Session, message: str = "") -> str:
+    return context_builder.build(db, message)
+
+
+async def ask_llm(message: str) -> str:
+    # Perguntas estruturadas (contagens, cores, objetos, ações, períodos) são
+    # respondidas direto por SQL; o restante segue para o LLM.
+    # O SQL roda no executor de banco e a chamada ao LLM é async: nenhuma
+    # thread fica presa durante a ida e volta à OpenAI.
+    t0 = time.perf_counter()
+    local = await run_db(answer_locally, message)
+    if local is not None:
+        chat_stats.record("local", (time.perf_counter() - t0) * 1000.0)
+        return local
+
+    cache_key = (normalize_question(message), get_data_version())
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        chat_stats.record("cache", 0.0)
+        return cached
+
+    client = _get_client()
+    if client is None:
         return "OPENAI_API_KEY não definido. Configure para habilitar o chat."
 
-    client = OpenAI(api_key=settings.openai_api_key)
     system_prompt = (
         "Você é um assistente que responde perguntas sobre eventos, pessoas e objetos detectados. "
         "Use o contexto factual abaixo para responder com precisão."
     )
-    ctx = _build_context(db)
+    ctx = await run_db(_build_context, message)
 
-    completion = client.chat.completions.create(
+    completion = await client.chat.completions.create(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": system_prompt},
@@ -60,4 +172,9 @@ def ask_llm(db: Session, message: str) -> str:
         ],
         temperature=0,
     )
-    return completion.choices[0].message.content
\ No newline at end of file
+    answer = completion.choices[0].message.content
+    chat_stats.record("llm", (time.perf_counter() - t0) * 1000.0,
+                      estimate_tokens(system_prompt) + estimate_tokens(ctx) + estimate_tokens(message))
+    if answer:
+        answer_cache.put(cache_key, answer)
+    return answer
@@ -0,0 +1,199 @@
+import atexit
+import datetime
+import os
+import queue
+import threading
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from backend.core.config import settings
+from backend.core.logging_utils import get_logger
+from backend.core.metrics import registry
+
+logger = get_logger(__name__)
+
+
+class FrameRing:
+    """Frames recentes como JPEG, limitados por bytes e por idade (pré-roll)."""
+
+    def __init__(self, max_bytes: int, max_age: float):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._frames: Deque[Tuple[float, bytes]] = deque()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def push(self, ts: float, jpeg: bytes) -> None:
+        self._frames.append((ts, jpeg))
+        self.nbytes += len(jpeg)
+        while self._frames and (self.nbytes > self.max_bytes or ts - self._frames[0][0] > self.max_age):
+            self.nbytes -= len(self._frames.popleft()[1])
+
+    def since(self, ts: float) -> List[Tuple[float, bytes]]:
+        return [f for f in self._frames if f[0] >= ts]
+
+    def clear(self) -> None:
+        self._frames.clear()
+        self.nbytes = 0
+
+
+class _PendingClip:
+    __slots__ = ("path", "started", "until", "frames", "nbytes")
+
+    def __init__(self, path: str, started: float, until: float, frames: List[Tuple[float, bytes]]):
+        self.path = path
+        self.started = started
+        self.until = until
+        self.frames = frames
+        self.nbytes = sum(len(f[1]) for f in frames)
+
+    def append(self, ts: float, jpeg: bytes) -> None:
+        self.frames.append((ts, jpeg))
+        self.nbytes += len(jpeg)
+
+
+class ClipRecorder:
+    """Grava clipes (pré-roll + pós-roll) de eventos configurados.
+
+    A thread de detecção só comprime o frame em JPEG (à taxa `clip_fps`) e
+    guarda os bytes no anel; ao disparar, o clipe acumula os frames seguintes
+    até o fim do pós-roll e vai para uma fila limitada. Um worker decodifica e
+    escreve com `cv2.VideoWriter`. Fila cheia = clipe descartado (contado).
+    Disparos durante um clipe em andamento estendem esse clipe, até
+    `clip_max_seconds` de duração ou `clip_buffer_mb` de JPEG; passado o teto,
+    o clipe é fechado e o disparo abre outro.
+    """
+
+    def __init__(self):
+        self.events = {e.strip() for e in settings.clip_events if e.strip()}
+        self.output_dir = settings.clip_dir
+        self.pre_seconds = settings.clip_pre_seconds
+        self.post_seconds = settings.clip_post_seconds
+        self.max_seconds = settings.clip_max_seconds
+        self.fps = settings.clip_fps
+        self.max_bytes = int(settings.clip_buffer_mb * 1024 * 1024)
+        self.ring = FrameRing(self.max_bytes, self.pre_seconds)
+        self._queue: "queue.Queue[Optional[_PendingClip]]" = queue.Queue(maxsize=settings.clip_queue_depth)
+        self._pending: Optional[_PendingClip] = None
+        self._last_clip_ts = float("-inf")  # último frame do clipe anterior (sem repetir no próximo)
+        self._last_push = 0.0
+        self._worker: Optional[threading.Thread] = None
+        self.written = registry.counter("clips_written_total", "Clipes de evento gravados em disco")
+        self.dropped = registry.counter("clips_dropped_total", "Clipes descartados por fila cheia ou erro de escrita")
+        registry.gauge("clip_buffer_bytes", "Bytes JPEG no anel de pré-roll", lambda: self.ring.nbytes)
+        registry.gauge("clip_buffer_frames", "Frames no anel de pré-roll", lambda: len(self.ring))
+        registry.gauge("clip_queue_depth", "Clipes aguardando codificação", self._queue.qsize)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.events) and self.fps > 0
+
+    def push(self, frame: np.ndarray, now: float) -> None:
+        """Chamado por frame processado; comprime só à taxa `clip_fps`."""
+        if not self.enabled or now - self._last_push < 1.0 / self.fps:
+            return
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, settings.clip_jpeg_quality])
+        if not ok:
+            return
+        self._last_push = now
+        data = jpeg.tobytes()
+        self.ring.push(now, data)
+        pending = self._pending
+        if pending is not None:
+            pending.append(now, data)
+            if now >= pending.until or pending.nbytes >= self.max_bytes:
+                self._submit()
+
+    def trigger(self, event_type: str, now: float) -> Optional[str]:
+        """Dispara (ou estende) um clipe; devolve o caminho do arquivo ou None."""
+        if not self.enabled or event_type not in self.events:
+            return None
+        pending = self._pending
+        if pending is not None:
+            if now + self.post_seconds <= pending.started + self.max_seconds:
+                pending.until = max(pending.until, now + self.post_seconds)
+                return pending.path
+            self._submit()  # teto atingido: fecha este e abre outro
+        stamp = datetime.datetime.fromtimestamp(now).strftime("%Y%m%d-%H%M%S-%f")
+        path = os.path.join(self.output_dir, f"{event_type}-{stamp}.mp4")
+        frames = [f for f in self.ring.since(now - self.pre_seconds) if f[0] > self._last_clip_ts]
+        self._pending = _PendingClip(path, frames[0][0] if frames else now, now + self.post_seconds, frames)
+        return path
+
+    def flush(self) -> None:
+        """Encerra o clipe em andamento com os frames que já tem (ex.: parada da captura)."""
+        if self._pending is not None:
+            self._submit()
+        self.ring.clear()
+        self._last_clip_ts = float("-inf")
+
+    def _submit(self) -> None:
+        clip, self._pending = self._pending, None
+        if not clip.frames:
+            return
+        self._last_clip_ts = clip.frames[-1][0]
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(clip)
+        except queue.Full:
+            self.dropped.inc()
+            logger.warning("fila de clipes cheia; descartando %s", clip.path)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Espera a fila de clipes esvaziar e encerra o worker (na saída do processo)."""
+        worker = self._worker
+        if worker is None or not worker.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        worker.join(timeout)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="clip-writer", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            clip = self._queue.get()
+            if clip is None:
+                return
+            try:
+                self._write(clip)
+                self.written.inc()
+            except Exception:
+                self.dropped.inc()
+                logger.exception("falha ao gravar clipe %s", clip.path)
+
+    def _write(self, clip: _PendingClip) -> None:
+        os.makedirs(os.path.dirname(clip.path) or ".", exist_ok=True)
+        # Taxa real dos frames guardados (o loop pode ficar abaixo de clip_fps)
+        span = clip.frames[-1][0] - clip.frames[0][0]
+        fps = min(self.fps, (len(clip.frames) - 1) / span) if span > 0 else self.fps
+        writer = None
+        try:
+            for _, data in clip.frames:
+                img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if img is None:
+                    continue
+                if writer is None:
+                    h, w = img.shape[:2]
+                    writer = cv2.VideoWriter(clip.path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+                elif img.shape[:2] != (h, w):
+                    img = cv2.resize(img, (w, h))
+                writer.write(img)
+        finally:
+            if writer is not None:
+                writer.release()
+
+
+clip_recorder = ClipRecorder()
+# Não matar o worker no meio de um VideoWriter ao encerrar o processo
+atexit.register(clip_recorder.close)
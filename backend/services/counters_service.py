@@ -0,0 +1,273 @@
+import json
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.core.config import settings
+from backend.models.counters import CounterCheckpoint
+from backend.models.person import Person
+
+
+CHECKPOINT_NAME = "live"
+
+Line = Tuple[str, float, float, float, float]  # nome, ax, ay, bx, by (normalizados)
+
+
+def crossing_direction(px: float, py: float, qx: float, qy: float, line: Line) -> int:
+    """+1 se o deslocamento p->q cruza a linha a->b da esquerda para a direita
+    (coordenadas de imagem, y para baixo), -1 no sentido oposto, 0 se não cruza."""
+    _, ax, ay, bx, by = line
+    dx, dy = bx - ax, by - ay
+    d1 = dx * (py - ay) - dy * (px - ax)
+    d2 = dx * (qy - ay) - dy * (qx - ax)
+    if d1 * d2 >= 0:
+        return 0
+    mx, my = qx - px, qy - py
+    d3 = mx * (ay - py) - my * (ax - px)
+    d4 = mx * (by - py) - my * (bx - px)
+    if d3 * d4 >= 0:
+        return 0
+    return 1 if d2 > 0 else -1
+
+
+class LiveCounters:
+    """Contadores mantidos pelo detector, atualizados em O(1) por evento de track.
+
+    - ocupação atual por zona e tracks ativos;
+    - entradas/saídas por zona e cruzamentos por linha (totais e por intervalo);
+    - permanência (first_seen -> last_seen): média móvel das últimas sessões e média geral.
+
+    Totais, intervalos e permanência são gravados periodicamente em
+    `counter_checkpoints` e restaurados na inicialização; a ocupação é só ao vivo.
+    """
+
+    def __init__(self, interval: int = None, history: int = None, dwell_window: int = None):
+        self.interval = interval or settings.counters_interval
+        self._lock = threading.Lock()
+        self.active = 0
+        self.occupancy: Dict[str, int] = {}
+        self._zone_gen = -1
+        self.zone_totals: Dict[str, List[int]] = {}  # nome -> [entradas, saídas]
+        self.line_totals: Dict[str, List[int]] = {}  # nome -> [forward, backward]
+        self._intervals: Deque[dict] = deque(maxlen=history or settings.counters_history)
+        window = dwell_window or settings.dwell_window
+        self._dwell = array("d", bytes(8 * window))
+        self._dwell_idx = 0
+        self._dwell_count = 0
+        self._dwell_sum = 0.0
+        self.dwell_total_seconds = 0.0
+        self.dwell_sessions = 0
+        self._lines_key = None
+        self._lines: List[Line] = []
+        self._restored = False
+        self._dirty = False
+        self._last_checkpoint = 0.0
+
+    # --- atualização (thread de detecção) ---
+
+    def _bucket(self, now: float) -> dict:
+        start = now - now % self.interval
+        if not self._intervals or self._intervals[-1]["start"] != start:
+            self._intervals.append({"start": start, "zones": {}, "lines": {}})
+        return self._intervals[-1]
+
+    def _count(self, totals: Dict[str, List[int]], kind: str, name: str, slot: int, now: float) -> None:
+        totals.setdefault(name, [0, 0])[slot] += 1
+        self._bucket(now)[kind].setdefault(name, [0, 0])[slot] += 1
+        self._dirty = True
+
+    def sync_zones(self, generation: int, names: Iterable[str]) -> None:
+        """Zonas reconstruídas: zera a ocupação; os tracks são recontados via `zone_present`."""
+        if generation == self._zone_gen:
+            return
+        with self._lock:
+            self._zone_gen = generation
+            self.occupancy = {n: 0 for n in names}
+
+    def zone_enter(self, name: str, now: float) -> None:
+        with self._lock:
+            self.occupancy[name] = self.occupancy.get(name, 0) + 1
+            self._count(self.zone_totals, "zones", name, 0, now)
+
+    def zone_exit(self, name: str, now: float) -> None:
+        with self._lock:
+            self.occupancy[name] = max(0, self.occupancy.get(name, 0) - 1)
+            self._count(self.zone_totals, "zones", name, 1, now)
+
+    def zone_present(self, name: str) -> None:
+        # Track já dentro da zona quando ela foi reconfigurada: ocupa sem contar entrada
+        with self._lock:
+            self.occupancy[name] = self.occupancy.get(name, 0) + 1
+
+    def track_started(self) -> None:
+        with self._lock:
+            self.active += 1
+
+    def _push_dwell(self, seconds: float) -> None:
+        n = len(self._dwell)
+        if self._dwell_count == n:
+            self._dwell_sum -= self._dwell[self._dwell_idx]
+        else:
+            self._dwell_count += 1
+        self._dwell[self._dwell_idx] = seconds
+        self._dwell_sum += seconds
+        self._dwell_idx = (self._dwell_idx + 1) % n
+        self.dwell_total_seconds += seconds
+        self.dwell_sessions += 1
+        self._dirty = True
+
+    def track_ended(self, dwell_seconds: float, zone_names: Iterable[str], now: float) -> None:
+        """Track expirado: fecha a permanência e conta saída das zonas em que estava."""
+        with self._lock:
+            self._leave(zone_names, now)
+            self._push_dwell(max(0.0, dwell_seconds))
+
+    def track_paused(self, zone_names: Iterable[str], now: float) -> None:
+        """Track expirado que pode voltar pelo re-ID: sai das zonas e dos ativos, mas a
+        sessão (permanência) só fecha em `session_ended` se ele não for religado."""
+        with self._lock:
+            self._leave(zone_names, now)
+
+    def track_resumed(self) -> None:
+        """Track religado pelo re-ID: volta aos ativos sem abrir sessão nova."""
+        with self._lock:
+            self.active += 1
+
+    def session_ended(self, dwell_seconds: float) -> None:
+        with self._lock:
+            self._push_dwell(max(0.0, dwell_seconds))
+
+    def _leave(self, zone_names: Iterable[str], now: float) -> None:
+        self.active = max(0, self.active - 1)
+        for name in zone_names:
+            self.occupancy[name] = max(0, self.occupancy.get(name, 0) - 1)
+            self._count(self.zone_totals, "zones", name, 1, now)
+
+    def end_all(self, dwell_seconds: Iterable[float], now: float) -> None:
+        """Captura parada: todos os tracks saem (permanência e saídas das zonas)."""
+        with self._lock:
+            for seconds in dwell_seconds:
+                self._push_dwell(max(0.0, seconds))
+            for name, n in self.occupancy.items():
+                for _ in range(n):
+                    self._count(self.zone_totals, "zones", name, 1, now)
+            self.occupancy = {n: 0 for n in self.occupancy}
+            self.active = 0
+
+    def lines(self) -> List[Line]:
+        key = repr(settings.lines)
+        if key != self._lines_key:
+            self._lines = [(ln["name"], *ln["points"][0], *ln["points"][1]) for ln in settings.lines]
+            self._lines_key = key
+        return self._lines
+
+    def track_moved(self, px: float, py: float, qx: float, qy: float, now: float) -> None:
+        """Deslocamento normalizado de um track entre dois frames; conta cruzamentos de linha."""
+        for line in self.lines():
+            direction = crossing_direction(px, py, qx, qy, line)
+            if direction:
+                with self._lock:
+                    self._count(self.line_totals, "lines", line[0], 0 if direction > 0 else 1, now)
+
+    # --- leitura ---
+
+    @property
+    def restored(self) -> bool:
+        return self._restored
+
+    def avg_dwell(self) -> float:
+        return self.dwell_total_seconds / self.dwell_sessions if self.dwell_sessions else 0.0
+
+    def snapshot(self, intervals: int = 60) -> dict:
+        with self._lock:
+            recent = list(self._intervals)[-intervals:] if intervals > 0 else []
+            return {
+                "active": self.active,
+                "occupancy": dict(self.occupancy),
+                "dwell": {
+                    "rolling_avg_seconds": round(self._dwell_sum / self._dwell_count, 1) if self._dwell_count else 0.0,
+                    "window": self._dwell_count,
+                    "avg_seconds": round(self.avg_dwell(), 1),
+                    "sessions": self.dwell_sessions,
+                },
+                "zones": {n: {"entries": v[0], "exits": v[1]} for n, v in self.zone_totals.items()},
+                "lines": {n: {"forward": v[0], "backward": v[1]} for n, v in self.line_totals.items()},
+                "interval_seconds": self.interval,
+                "intervals": [
+                    {
+                        "start": b["start"],
+                        "zones": {n: {"entries": v[0], "exits": v[1]} for n, v in b["zones"].items()},
+                        "lines": {n: {"forward": v[0], "backward": v[1]} for n, v in b["lines"].items()},
+                    }
+                    for b in recent
+                ],
+            }
+
+    # --- persistência ---
+
+    def _state(self) -> dict:
+        n = self._dwell_count
+        # Janela de permanência da mais antiga para a mais recente
+        order = [(self._dwell_idx - n + k) % len(self._dwell) for k in range(n)]
+        return {
+            "zone_totals": self.zone_totals,
+            "line_totals": self.line_totals,
+            "intervals": list(self._intervals),
+            "dwell_window": [self._dwell[i] for i in order],
+            "dwell_total_seconds": self.dwell_total_seconds,
+            "dwell_sessions": self.dwell_sessions,
+        }
+
+    def restore(self, db: Session) -> None:
+        """Carrega o último checkpoint (uma vez). Sem checkpoint, semeia a permanência a partir de people."""
+        if self._restored:
+            return
+        row = db.query(CounterCheckpoint).filter(CounterCheckpoint.name == CHECKPOINT_NAME).first()
+        with self._lock:
+            if self._restored:
+                return
+            if row is not None:
+                state = json.loads(row.data)
+                self.zone_totals = {k: list(v) for k, v in state.get("zone_totals", {}).items()}
+                self.line_totals = {k: list(v) for k, v in state.get("line_totals", {}).items()}
+                self._intervals.extend(state.get("intervals", []))
+                for seconds in state.get("dwell_window", []):
+                    self._push_dwell(seconds)
+                self.dwell_total_seconds = state.get("dwell_total_seconds", 0.0)
+                self.dwell_sessions = state.get("dwell_sessions", 0)
+            else:
+                sessions = (
+                    db.query(Person.first_seen, Person.last_seen)
+                    .filter(Person.first_seen.isnot(None), Person.last_seen.isnot(None))
+                    .order_by(Person.last_seen)
+                    .all()
+                )
+                for first, last in sessions:
+                    seconds = last.timestamp() - first.timestamp()
+                    if seconds >= 0:
+                        self._push_dwell(float(round(seconds)))
+            self._restored = True
+            self._dirty = False
+
+    def checkpoint(self, db: Session, now: float = None, force: bool = False) -> bool:
+        """Adiciona à sessão o checkpoint se houve mudança e o intervalo venceu; o commit é do chamador."""
+        now = now if now is not None else time.time()
+        if not self._dirty or (not force and now - self._last_checkpoint < settings.counters_checkpoint_seconds):
+            return False
+        with self._lock:
+            data = json.dumps(self._state())
+            self._dirty = False
+        self._last_checkpoint = now
+        row = db.query(CounterCheckpoint).filter(CounterCheckpoint.name == CHECKPOINT_NAME).first()
+        if row is None:
+            db.add(CounterCheckpoint(name=CHECKPOINT_NAME, data=data))
+        else:
+            row.data = data
+        return True
+
+
+counters = LiveCounters()
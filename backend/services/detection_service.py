@@ -1,7 +1,8 @@
 import threading
 import time
-from typing import Dict, List, Tuple, Set
+from typing import List, Tuple, Set
 import datetime
+import json
 import os
 
 import cv2
@@ -11,22 +12,26 @@ import supervision as sv
 
 from backend.core.config import settings
 from backend.core.db import SessionLocal
-from backend.models.person import Person
-from backend.models.event import Event
+from backend.core.logging_utils import get_logger
+from backend.core.metrics import registry, stage_seconds, frame_seconds, frames_processed, frames_dropped
+from backend.models.person import Person, PersonObject
 from backend.schemas.common import DetectionItem
 from backend.utils.color import dominant_color
 from backend.utils.actions import classify_action
+from backend.utils.zones import ZoneSet, zones_for_frame
 from backend.services.qr_service import decode_qr_text
+from backend.services.track_state import TrackTable
+from backend.services.occupancy_service import heatmap, trajectories
+from backend.services.counters_service import counters
+from backend.services.clip_service import clip_recorder
+from backend.services.event_bus import event_bus
+from backend.services.reid_service import reid
+from backend.utils.appearance import appearance_descriptor, blend_descriptor
 
-# Função auxiliar para verificar se um bbox está dentro da ROI
-def inside_roi(bbox: Tuple[int, int, int, int], width: int, height: int) -> bool:
-    x1, y1, x2, y2 = bbox
-    rx1, ry1, rx2, ry2 = settings.roi_rect
-    rX1, rY1, rX2, rY2 = int(rx1 * width), int(ry1 * height), int(rx2 * width), int(ry2 * height)
-    cx = (x1 + x2) // 2
-    cy = (y1 + y2) // 2
-    return rX1 <= cx <= rX2 and rY1 <= cy <= rY2
+logger = get_logger(__name__)
 
+# Espera máxima (s) pelo frame em andamento ao parar a captura
+STOP_JOIN_TIMEOUT = 5.0
 
 # Serviço de detecção de pessoas
 class DetectionService:
@@ -38,29 +43,107 @@ class DetectionService:
         self.running = False
         self.last_frame = None
         self.current_detections: List[DetectionItem] = []
-        self.track_inside_roi: Dict[int, bool] = {}
         self.stopped_by_qr = False
+        # Incrementa a cada mudança de detecções/status (usado pelo feed push)
+        self.state_version: int = 0
+        self.model_name: str = settings.yolo_model
+        self.refresh_class_filter()
+        self.exit_timeout: float = 1.0  # segundos sem detecção para marcar saída
+        # Estado por track (posição, velocidades, ROI) com expiração agendada
+        self.tracks = TrackTable(self.exit_timeout)
+        # Ajustes de performance
+        self.imgsz: int = int(os.environ.get("IMG_SIZE", "512"))
+        # Troca de modelo em runtime: carregado/aquecido em background e aplicado entre frames
+        self._swap_lock = threading.Lock()
+        self._staged_model = None  # (modelo, nome, imgsz) pronto para entrar no próximo frame
+        self.model_swap: dict = {"state": "idle", "model": None, "imgsz": None, "error": None}
+        self.frame_skip: int = int(os.environ.get("FRAME_SKIP", "1"))
+        self._frame_count: int = 0
+        self.stream_subscribers: int = 0
+        # Hook de profiling chamado no início de cada frame (None = desligado)
+        self._profile_hook = None
+        # Relógio do loop (epoch em s); o soak test troca por tempo simulado
+        self.clock = time.time
+        # Sessão de longa duração do _loop (None quando parado)
+        self._session = None
+        registry.gauge("detection_active_tracks", "Tracks ativos no detector", lambda: len(self.tracks))
+        registry.gauge("detection_track_table_bytes", "Memória aproximada da tabela de tracks", self.tracks.memory_bytes)
+        registry.gauge("detection_stream_subscribers", "Clientes conectados ao stream MJPEG", lambda: self.stream_subscribers)
+        self._db_queue_depth = registry.gauge("detection_db_queue_depth", "Objetos pendentes na sessão antes do commit")
+        registry.gauge("detection_session_identity_map", "Objetos no mapa de identidade da sessão do loop",
+                       lambda: len(self._session.identity_map) if self._session is not None else 0)
+
+    @staticmethod
+    def _class_filter(model) -> Tuple[dict, Set[int], List[int]]:
+        """(nomes das classes, ids de objetos de mão, classes passadas ao predict) para um modelo."""
         # Mapear ids->nomes de classes para detecção (COCO)
         try:
-            self.class_names = self.model.names
+            class_names = model.names
         except Exception:
-            self.class_names = {}
+            class_names = {}
         # Mapear nomes->ids de forma robusta
-        if isinstance(self.class_names, dict):
-            id_to_name = {int(k): str(v).lower().strip() for k, v in self.class_names.items()}
+        if isinstance(class_names, dict):
+            id_to_name = {int(k): str(v).lower().strip() for k, v in class_names.items()}
         else:
-            id_to_name = {i: str(n).lower().strip() for i, n in enumerate(self.class_names)}
+            id_to_name = {i: str(n).lower().strip() for i, n in enumerate(class_names)}
         allowed_names = {n.lower().strip() for n in settings.handheld_classes}
-        self.allowed_object_class_ids = {cid for cid, name in id_to_name.items() if name in allowed_names}
+        allowed_ids = {cid for cid, name in id_to_name.items() if name in allowed_names}
         # Sempre incluir pessoa (id 0) na inferência
-        self.allowed_classes_for_predict = sorted({0, *self.allowed_object_class_ids})
-        self.prev_speeds: Dict[int, List[float]] = {}
-        self.last_seen_times: Dict[int, float] = {}
-        self.exit_timeout: float = 1.0  # segundos sem detecção para marcar saída
-        # Ajustes de performance
-        self.imgsz: int = int(os.environ.get("IMG_SIZE", "512"))
-        self.frame_skip: int = int(os.environ.get("FRAME_SKIP", "1"))
-        self._frame_count: int = 0
+        return class_names, allowed_ids, sorted({0, *allowed_ids})
+
+    def refresh_class_filter(self) -> None:
+        """Recalcula o filtro de classes (chamar a cada mudança de `handheld_classes`)."""
+        class_names, allowed_ids, predict_classes = self._class_filter(self.model)
+        # Atribuições simples: o loop lê um conjunto consistente no frame seguinte
+        self.class_names = class_names
+        self.allowed_object_class_ids = allowed_ids
+        self.allowed_classes_for_predict = predict_classes
+
+    def swap_model(self, weights: str, imgsz: int | None = None) -> dict:
+        """Carrega e aquece `weights` em background; a troca acontece entre dois frames,
+        sem reiniciar a câmera nem o tracker. Levanta RuntimeError se já houver troca em curso."""
+        imgsz = imgsz or self.imgsz
+        with self._swap_lock:
+            if self.model_swap["state"] == "loading":
+                raise RuntimeError("troca de modelo já em andamento")
+            self.model_swap = {"state": "loading", "model": weights, "imgsz": imgsz, "error": None}
+        threading.Thread(target=self._load_model, args=(weights, imgsz), name="model-swap", daemon=True).start()
+        return self.model_status()
+
+    def _load_model(self, weights: str, imgsz: int) -> None:
+        try:
+            t0 = time.perf_counter()
+            model = YOLO(weights)
+            # Aquecimento: a primeira inferência aloca buffers/fusões e seria um pico no loop
+            warm = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+            model.predict(warm, verbose=False, imgsz=imgsz, classes=[0])
+            logger.info("modelo %s carregado e aquecido em %.2fs", weights, time.perf_counter() - t0)
+        except Exception as exc:
+            logger.exception("falha ao carregar modelo %s", weights)
+            with self._swap_lock:
+                self.model_swap = {"state": "error", "model": weights, "imgsz": imgsz, "error": str(exc)}
+            return
+        with self._swap_lock:
+            self._staged_model = (model, weights, imgsz)
+            self.model_swap["state"] = "ready"
+        if not self.running:
+            self._apply_staged_model()
+
+    def _apply_staged_model(self) -> None:
+        with self._swap_lock:
+            staged, self._staged_model = self._staged_model, None
+            if staged is None:
+                return
+            self.model, self.model_name, self.imgsz = staged
+            settings.yolo_model = self.model_name
+            self.refresh_class_filter()
+            self.model_swap["state"] = "idle"
+        self.state_version += 1
+        logger.info("modelo ativo: %s (imgsz=%s)", self.model_name, self.imgsz)
+
+    def model_status(self) -> dict:
+        with self._swap_lock:
+            return {"model": self.model_name, "imgsz": self.imgsz, "swap": dict(self.model_swap)}
 
     def _iou(self, a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
         #Calcula Intersection over Union (IoU) entre dois bboxes.
@@ -133,19 +216,106 @@ class DetectionService:
                 keep.append(i)
         return keep
 
-    def start(self, src: int | str = 0):
+    def _person_track_id(self, track_id: int) -> int:
+        # track_id do ByteTrack reinicia por processo; prefixa com o pid para não colidir
+        return track_id + os.getpid() * 100000
+
+    @staticmethod
+    def _body_halves(frame: np.ndarray, bbox, width: int, height: int):
+        """Recorte central da pessoa (evita fundo) dividido em metade de cima e de baixo; None se vazio."""
+        x1, y1, x2, y2 = bbox
+        w = max(0, x2 - x1)
+        h = max(0, y2 - y1)
+        if w <= 0 or h <= 0:
+            return None
+        # margem de 15% nas laterais e 10% no topo/rodapé
+        mx = int(w * 0.15)
+        my = int(h * 0.10)
+        cx1 = max(x1 + mx, 0)
+        cy1 = max(y1 + my, 0)
+        cx2 = min(x2 - mx, width)
+        cy2 = min(y2 - my, height)
+        # recorte central
+        if cx2 <= cx1 or cy2 <= cy1:
+            central = frame[y1:y2, x1:x2]
+        else:
+            central = frame[cy1:cy2, cx1:cx2]
+        if central.size == 0:
+            return None
+        ch = central.shape[0]
+        return central[: ch // 2], central[ch // 2 :]
+
+    @staticmethod
+    def _zone_names(bits: int, zone_set: ZoneSet) -> List[str]:
+        return [name for i, name in enumerate(zone_set.names) if bits >> i & 1]
+
+    def _zone_events(self, rec, bits: int, zone_set: ZoneSet, now: float) -> None:
+        """Eventos de entrada/saída/permanência por zona a partir da bitmask atual."""
+        if rec.zone_gen != zone_set.generation:
+            if rec.zone_gen != -1:
+                # Zonas reconfiguradas: rebaseia sem gerar eventos espúrios
+                rec.zones, rec.zone_since, rec.dwell_fired = bits, None, 0
+                for name in self._zone_names(bits, zone_set):
+                    counters.zone_present(name)
+            rec.zone_gen = zone_set.generation
+        changed = bits ^ rec.zones
+        while changed:
+            low = changed & -changed
+            changed ^= low
+            i = low.bit_length() - 1
+            name = zone_set.names[i]
+            if bits & low:
+                clip = clip_recorder.trigger("enter_roi", now)
+                event_bus.publish("enter_roi", rec.person_key, name, json.dumps({"clip": clip}) if clip else None, now)
+                counters.zone_enter(name, now)
+                if zone_set.dwell[i] is not None:
+                    if rec.zone_since is None:
+                        rec.zone_since = {}
+                    rec.zone_since[i] = now
+            else:
+                event_bus.publish("exit_roi", rec.person_key, name, None, now)
+                counters.zone_exit(name, now)
+                if rec.zone_since:
+                    rec.zone_since.pop(i, None)
+                rec.dwell_fired &= ~low
+        rec.zones = bits
+        if rec.zone_since:
+            for i, since in rec.zone_since.items():
+                low = 1 << i
+                if not rec.dwell_fired & low and now - since >= zone_set.dwell[i]:
+                    rec.dwell_fired |= low
+                    event_bus.publish("dwell_roi", rec.person_key, zone_set.names[i],
+                                      json.dumps({"seconds": round(now - since, 1)}), now)
+
+    def _infer(self, frame: np.ndarray) -> sv.Detections:
+        results = self.model.predict(
+            frame,
+            conf=settings.conf_threshold,
+            iou=settings.iou_threshold,
+            verbose=False,
+            classes=self.allowed_classes_for_predict,
+            imgsz=self.imgsz,  # reduz custo de inferência
+        )
+        return sv.Detections.from_ultralytics(results[0])
+
+    def start(self, src=0):
+        """Inicia a captura. `src` pode ser índice/URL da câmera ou um objeto já
+        aberto com a interface de `cv2.VideoCapture` (ex.: replay no benchmark)."""
         if self.running:
             return
         # Reinicia flag de parada por QR em novas sessões
         self.stopped_by_qr = False
-        # No Windows, usar DirectShow para evitar erros MSMF ao capturar
-        try:
-            if isinstance(src, int) and os.name == 'nt':
-                self.cap = cv2.VideoCapture(src, cv2.CAP_DSHOW)
-            else:
+        if hasattr(src, "read"):
+            self.cap = src
+        else:
+            # No Windows, usar DirectShow para evitar erros MSMF ao capturar
+            try:
+                if isinstance(src, int) and os.name == 'nt':
+                    self.cap = cv2.VideoCapture(src, cv2.CAP_DSHOW)
+                else:
+                    self.cap = cv2.VideoCapture(src)
+            except Exception:
                 self.cap = cv2.VideoCapture(src)
-        except Exception:
-            self.cap = cv2.VideoCapture(src)
 
         # Ajustes da câmera para reduzir travamento
         try:
@@ -162,77 +332,117 @@ class DetectionService:
 
         # Reset de estados e tracker para evitar sobreposição de pessoas de sessões anteriores
         self.tracker = sv.ByteTrack()
-        self.prev_speeds.clear()
-        self.last_seen_times.clear()
-        self.track_inside_roi.clear()
+        self.tracks.clear()
+        self.tracks.timeout = self.exit_timeout
+        reid.clear()
         self._frame_count = 0
 
         self.running = True
+        self.state_version += 1
         self.thread = threading.Thread(target=self._loop, daemon=True)
         self.thread.start()
 
     def stop(self):
         self.running = False
+        self.state_version += 1
+        # Espera o frame em andamento terminar: o teardown abaixo mexe em estruturas do loop
+        thread = self.thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(STOP_JOIN_TIMEOUT)
+            if thread.is_alive():
+                logger.warning("loop de detecção não encerrou em %.0f s; finalizando mesmo assim", STOP_JOIN_TIMEOUT)
         if self.cap is not None:
             self.cap.release()
         self.cap = None
-        # Marcar saída em todas as pessoas sem horário de saída
+        now = self.clock()
+        db = SessionLocal()
+        try:
+            # Marcar saída em todas as pessoas sem horário de saída
+            try:
+                now_dt = datetime.datetime.fromtimestamp(now)
+                for p in db.query(Person).filter(Person.last_seen.is_(None)).all():
+                    p.last_seen = now_dt
+                # Tracks ainda ativos saem dos contadores; checkpoint imediato
+                counters.end_all([r.last_seen - r.first_seen for r in self.tracks] + reid.drain_sessions(), now)
+                self.tracks.clear()
+                counters.checkpoint(db, force=True)
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception("falha ao fechar pessoas e contadores na parada")
+            # Persiste o bucket de heatmap corrente e as trajetórias em aberto
+            try:
+                bucket = heatmap.flush()
+                if bucket is not None:
+                    db.add(bucket)
+                db.add_all(trajectories.finish_all())
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception("falha ao gravar heatmap/trajetórias na parada")
+        finally:
+            db.close()
         try:
-            db = SessionLocal()
-            now_dt = datetime.datetime.now()
-            rows = db.query(Person).filter(Person.last_seen.is_(None)).all()
-            for p in rows:
-                p.last_seen = now_dt
-            db.commit()
             # Registrar evento de parada do sistema quando não for por QR
             if not self.stopped_by_qr:
-                try:
-                    db.add(Event(event_type="system_stopped", track_id=None, roi_name=None, details=None))
-                    db.commit()
-                except Exception:
-                    pass
+                event_bus.publish("system_stopped", ts=now)
+            event_bus.flush(now, force=True)
         except Exception:
-            pass
+            logger.exception("falha ao publicar a parada no barramento de eventos")
 
     def _loop(self):
-        db = SessionLocal()
-        prev_centers: Dict[int, Tuple[float, float]] = {}
-        prev_timestamps: Dict[int, float] = {}
+        db = self._session = SessionLocal()
+        perf = time.perf_counter
+        try:
+            counters.restore(db)
+        except Exception:
+            logger.exception("falha ao restaurar contadores")
         while self.running and self.cap is not None:
+            if self._profile_hook is not None:
+                self._profile_hook()
+            if self._staged_model is not None:
+                self._apply_staged_model()
+            t_read = perf()
             ret, frame = self.cap.read()
+            t_frame = perf()
+            stage_seconds.observe(t_frame - t_read, "capture_wait")
             if not ret:
+                frames_dropped.inc()
                 time.sleep(0.01)
                 continue
 
             self._frame_count += 1
             if self.frame_skip > 1 and (self._frame_count % self.frame_skip != 0):
                 # pula detecção neste frame para aliviar CPU
+                frames_dropped.inc()
                 self.last_frame = frame
                 continue
 
             # QR stop
             qr_text = decode_qr_text(frame)
+            t = perf()
+            stage_seconds.observe(t - t_frame, "qr_decode")
             should_stop = (qr_text is not None and settings.qr_stop_any) or (qr_text and qr_text == settings.qr_stop_text)
             if should_stop:
                 try:
-                    db.add(Event(event_type="stop_by_qr", track_id=None, roi_name=None, details=f"qr={qr_text}"))
+                    details = {"qr": qr_text}
+                    now = self.clock()
+                    clip = clip_recorder.trigger("stop_by_qr", now)
+                    if clip:
+                        details["clip"] = clip
+                    event_bus.publish("stop_by_qr", details=json.dumps(details), ts=now)
                     db.commit()
                 except Exception:
                     pass
                 self.stopped_by_qr = True
+                self.state_version += 1
                 self.stop()
                 break
 
             height, width = frame.shape[:2]
-            results = self.model.predict(
-                frame,
-                conf=settings.conf_threshold,
-                iou=settings.iou_threshold,
-                verbose=False,
-                classes=self.allowed_classes_for_predict,
-                imgsz=self.imgsz,  # reduz custo de inferência
-            )
-            det_all = sv.Detections.from_ultralytics(results[0])
+            det_all = self._infer(frame)
+            t_prev, t = t, perf()
+            stage_seconds.observe(t - t_prev, "predict")
 
             # filtra somente pessoas (id 0)
             mask = det_all.class_id == 0
@@ -245,68 +455,97 @@ class DetectionService:
                 non_person = non_person[allowed_mask]
 
             tracked = self.tracker.update_with_detections(det)
+            t_prev, t = t, perf()
+            stage_seconds.observe(t - t_prev, "tracker_update")
             # Deduplicação de pessoas no mesmo frame
             keep_idx = self._dedup_boxes(tracked.xyxy, getattr(tracked, "confidence", None), iou_thresh=0.85)
+            t_prev, t = t, perf()
+            stage_seconds.observe(t - t_prev, "dedup")
+            color_time = 0.0
 
-            items: List[DetectionItem] = []
-            now = time.time()
+            # Pertinência às zonas de todos os tracks numa passada vetorizada
+            zone_set = zones_for_frame(width, height)
+            counters.sync_zones(zone_set.generation, zone_set.names)
+            kept = tracked.xyxy[keep_idx].astype(int) if keep_idx else np.empty((0, 4), dtype=int)
+            zone_bits = zone_set.membership((kept[:, 0] + kept[:, 2]) // 2, (kept[:, 1] + kept[:, 3]) // 2)
 
-            present_ids: Set[int] = set()
-            for i in keep_idx:  # i é o índice na detecção deduplicada
+            items: List[DetectionItem] = []
+            now = self.clock()
+
+            # Re-identificação: tracks novos do frame comparados de uma vez com a galeria
+            # de quem saiu há pouco; quem casar herda a pessoa anterior
+            t_reid = perf()
+            halves = {}
+            links = {}
+            if reid.enabled:
+                new_ids, new_descs = [], []
+                for k, i in enumerate(keep_idx):
+                    tid = int(tracked.tracker_id[i]) if tracked.tracker_id is not None else -1
+                    if tid >= 0 and tid not in self.tracks:
+                        halves[k] = self._body_halves(frame, kept[k], width, height)
+                        if halves[k] is not None:
+                            new_ids.append(tid)
+                            new_descs.append(appearance_descriptor(*halves[k]))
+                for tid, desc, key in zip(new_ids, new_descs, reid.match(new_descs, now)):
+                    links[tid] = (key, desc)
+            reid_time = perf() - t_reid
+
+            for k, i in enumerate(keep_idx):  # i é o índice na detecção deduplicada
                 bbox = tracked.xyxy[i].astype(int)
                 x1, y1, x2, y2 = bbox
                 track_id = int(tracked.tracker_id[i]) if tracked.tracker_id is not None else -1
                 conf = float(tracked.confidence[i]) if tracked.confidence is not None else 0.0
                 valid_id = track_id >= 0
-                if valid_id:
-                    present_ids.add(track_id)
 
                 # extração de cor com recorte central para evitar fundo
-                w = max(0, x2 - x1)
-                h = max(0, y2 - y1)
-                if w <= 0 or h <= 0:
+                t_color = perf()
+                body = halves[k] if k in halves else self._body_halves(frame, bbox, width, height)
+                if body is None:
                     top_color = bottom_color = None
                 else:
-                    # margem de 15% nas laterais e 10% no topo/rodapé
-                    mx = int(w * 0.15)
-                    my = int(h * 0.10)
-                    cx1 = max(x1 + mx, 0)
-                    cy1 = max(y1 + my, 0)
-                    cx2 = min(x2 - mx, width)
-                    cy2 = min(y2 - my, height)
-                    # recorte central
-                    if cx2 <= cx1 or cy2 <= cy1:
-                        central = frame[y1:y2, x1:x2]
-                    else:
-                        central = frame[cy1:cy2, cx1:cx2]
-
-                    if central.size == 0:
-                        top_color = bottom_color = None
-                    else:
-                        ch = central.shape[0]
-                        top_color = dominant_color(central[: ch // 2])
-                        bottom_color = dominant_color(central[ch // 2 :])
+                    top_color = dominant_color(body[0])
+                    bottom_color = dominant_color(body[1])
+                color_time += perf() - t_color
 
                 # estimativa de ação com suavização
                 center = ((x1 + x2) / 2.0, (y1 + y2) / 2.0)
-                dt = now - prev_timestamps.get(track_id, now)
-                if valid_id and track_id in prev_centers and dt > 0:
-                    dx = center[0] - prev_centers[track_id][0]
-                    dy = center[1] - prev_centers[track_id][1]
-                    speed = float(np.hypot(dx, dy) / dt)
-                    speeds = self.prev_speeds.get(track_id, [])
-                    speeds.append(speed)
-                    if len(speeds) > 5:
-                        speeds = speeds[-5:]
-                    self.prev_speeds[track_id] = speeds
-                    avg_speed = sum(speeds) / len(speeds)
+                rec = self.tracks.get(track_id) if valid_id else None
+                dt = now - rec.last_seen if rec is not None else 0.0
+                if rec is not None and dt > 0:
+                    speed = float(np.hypot(center[0] - rec.cx, center[1] - rec.cy) / dt)
+                    avg_speed = rec.push_speed(speed)
                     action = "walking" if avg_speed > 25.0 else "stopped"
                 else:
                     action = "stopped"
                 if valid_id:
-                    prev_centers[track_id] = center
-                    prev_timestamps[track_id] = now
-                    self.last_seen_times[track_id] = now
+                    is_new = rec is None
+                    session_start = None
+                    if is_new:
+                        # Religado pelo re-ID: continua a sessão da pessoa, sem contar outra
+                        key = links.get(track_id, (None, None))[0]
+                        session_start = reid.resume(key) if key is not None else None
+                        if session_start is None:
+                            counters.track_started()
+                        else:
+                            counters.track_resumed()
+                    else:
+                        counters.track_moved(rec.cx / width, rec.cy / height, center[0] / width, center[1] / height, now)
+                    rec = self.tracks.touch(track_id, center[0], center[1], now)
+                    if session_start is not None:
+                        rec.first_seen = session_start
+                    if reid.enabled and body is not None:
+                        t_reid = perf()
+                        if is_new:
+                            key, desc = links.get(track_id, (None, None))
+                            rec.person_key = key if key is not None else self._person_track_id(track_id)
+                            rec.appearance = desc if desc is not None else appearance_descriptor(*body)
+                        elif self._frame_count % settings.reid_refresh_frames == 0:
+                            rec.appearance = blend_descriptor(rec.appearance, appearance_descriptor(*body)) \
+                                if rec.appearance is not None else appearance_descriptor(*body)
+                        reid_time += perf() - t_reid
+                    elif is_new:
+                        rec.person_key = self._person_track_id(track_id)
+                    trajectories.add(rec.person_key, now, center[0] / width, center[1] / height)
 
                 # Objetos NAS MÃOS da pessoa (heurística)
                 objects_set: Set[str] = set()
@@ -332,30 +571,34 @@ class DetectionService:
 
                 # DB upsert person
                 if valid_id:
-                    person = db.query(Person).filter(Person.track_id == (track_id + os.getpid() * 100000)).first()
+                    person = db.query(Person).filter(Person.track_id == rec.person_key).first()
                     if person is None:
                         person = Person(
-                            track_id=(track_id + os.getpid() * 100000),
+                            track_id=rec.person_key,
                             top_color=top_color,
                             bottom_color=bottom_color,
                             last_action=action,
-                            first_seen=datetime.datetime.now(),
+                            first_seen=datetime.datetime.fromtimestamp(now),
                             last_x=center[0],
                             last_y=center[1],
                             holding_object=True if len(objects) > 0 else False,
                             object_description=", ".join(objects) if objects else None,
+                            objects=[PersonObject(name=n) for n in objects],
                         )
                         db.add(person)
-                        try:
-                            print(f"[det] create person track_id={track_id} action={action} colors={top_color}/{bottom_color} objects={person.object_description}")
-                        except Exception:
-                            pass
+                        logger.debug("create person track_id=%s action=%s colors=%s/%s objects=%s",
+                                     track_id, action, top_color, bottom_color, person.object_description)
                     else:
+                        # Religada pela re-identificação: continua a mesma permanência
+                        if person.last_seen is not None and rec.person_key != self._person_track_id(track_id):
+                            person.last_seen = None
                         # Se a pessoa foi marcada como saída, trate como nova aparição
                         if person.last_seen is not None:
-                            person.first_seen = datetime.datetime.now()
+                            person.first_seen = datetime.datetime.fromtimestamp(now)
                             person.last_seen = None
                             person.holding_object = False
+                            if person.object_description:
+                                person.objects.clear()
                             person.object_description = None
                         # Não sobrescrever cor conhecida com "unknown".
                         top_color_upd = top_color if top_color not in (None, "", "unknown") else None
@@ -372,41 +615,74 @@ class DetectionService:
                         if person.object_description:
                             prev_objs = [s.strip() for s in person.object_description.split(",") if s.strip()]
                         union = sorted(list(set(prev_objs).union(objects)))
+                        # Associação indexada: só toca a coleção quando surge objeto novo
+                        for name in set(objects).difference(prev_objs):
+                            person.objects.append(PersonObject(name=name))
                         person.object_description = ", ".join(union) if union else person.object_description
                         person.holding_object = True if (union and len(union) > 0) else person.holding_object
-                        try:
-                            print(f"[det] update person track_id={track_id} action={action} colors={person.top_color}/{person.bottom_color} objects={person.object_description}")
-                        except Exception:
-                            pass
+                        logger.debug("update person track_id=%s action=%s colors=%s/%s objects=%s",
+                                     track_id, action, person.top_color, person.bottom_color, person.object_description)
 
-                # ROI enter/exit events
-                inside = inside_roi(tuple(bbox), width, height)
+                # Eventos de zona (enter/exit/dwell)
                 if valid_id:
-                    prev_inside = self.track_inside_roi.get(track_id, False)
-                    if inside and not prev_inside:
-                        db.add(Event(event_type="enter_roi", track_id=track_id, roi_name="default", details=None))
-                    elif not inside and prev_inside:
-                        db.add(Event(event_type="exit_roi", track_id=track_id, roi_name="default", details=None))
-                    self.track_inside_roi[track_id] = inside
-
+                    self._zone_events(rec, zone_bits[k], zone_set, now)
+
+            stage_seconds.observe(color_time, "color_extraction")
+            stage_seconds.observe(reid_time, "reid")
+            # Heatmap: todos os centros do frame numa soma vetorizada
+            closed_bucket = heatmap.add(now, (kept[:, 0] + kept[:, 2]) / (2.0 * width),
+                                        (kept[:, 1] + kept[:, 3]) / (2.0 * height))
+            if closed_bucket is not None:
+                db.add(closed_bucket)
+            counters.checkpoint(db, now)
+            self._db_queue_depth.set(len(db.new) + len(db.dirty))
+            t_db = perf()
             db.commit()
+            db_time = perf() - t_db
             # Marca saídas: quem não apareceu por exit_timeout congela last_seen
-            now_ts = time.time()
-            for tid, last_ts in list(self.last_seen_times.items()):
-                if tid not in present_ids and (now_ts - last_ts) > self.exit_timeout:
-                    person = db.query(Person).filter(Person.track_id == (tid + os.getpid() * 100000)).first()
-                    if person and person.last_seen is None:
-                        person.last_seen = datetime.datetime.fromtimestamp(last_ts)
-                        db.commit()
-                    # Limpa estado dos rastros que saíram
-                    self.prev_speeds.pop(tid, None)
-                    prev_centers.pop(tid, None)
-                    prev_timestamps.pop(tid, None)
-                    self.track_inside_roi.pop(tid, None)
-                    self.last_seen_times.pop(tid, None)
+            # (só os tracks vencidos no heap; uma consulta para todos eles)
+            expired = self.tracks.pop_expired(self.clock())
+            if expired:
+                for r in expired:
+                    names = self._zone_names(r.zones, zone_set) if r.zone_gen == zone_set.generation else []
+                    # Quem pode voltar pelo re-ID só fecha a sessão quando sair da galeria
+                    if reid.remember(r.person_key, r.appearance, r.last_seen, r.first_seen):
+                        counters.track_paused(names, r.last_seen)
+                    else:
+                        counters.track_ended(r.last_seen - r.first_seen, names, r.last_seen)
+                t_db = perf()
+                last_seen_by_key = {r.person_key: r.last_seen for r in expired}
+                rows = (
+                    db.query(Person)
+                    .filter(Person.track_id.in_(list(last_seen_by_key)), Person.last_seen.is_(None))
+                    .all()
+                )
+                for person in rows:
+                    person.last_seen = datetime.datetime.fromtimestamp(last_seen_by_key[person.track_id])
+                # Trajetórias encerradas são simplificadas e gravadas de uma vez
+                paths = [trajectories.finish(key) for key in last_seen_by_key]
+                db.add_all([row for row in paths if row is not None])
+                if rows or db.new:
+                    db.commit()
+                db_time += perf() - t_db
+            # Sessões de quem saiu e não foi religado dentro de REID_MAX_AGE
+            for seconds in reid.expired_sessions(now):
+                counters.session_ended(seconds)
+            # Eventos do frame: cada sink grava agora ou acumula para o próximo lote
+            t_db = perf()
+            event_bus.flush(now)
+            db_time += perf() - t_db
+            # O mapa de identidade guarda só referências fracas a objetos limpos; se algo
+            # segurar objetos e ele passar do limite, a sessão é esvaziada (tudo já commitado)
+            if len(db.identity_map) > settings.session_identity_max:
+                logger.warning("mapa de identidade com %d objetos; liberando a sessão", len(db.identity_map))
+                db.expunge_all()
+            stage_seconds.observe(db_time, "db_flush")
             self.current_detections = items
+            self.state_version += 1
 
             # Draw overlay for stream
+            t = perf()
             overlay = frame.copy()
             for item in items:
                 x1, y1, x2, y2 = item.bbox
@@ -415,28 +691,60 @@ class DetectionService:
                 label = f"ID {item.track_id} {item.action or ''} {item.top_color or ''}/{item.bottom_color or ''}{obj_label}"
                 cv2.putText(overlay, label, (x1, max(y1 - 5, 0)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
 
-            # draw ROI
-            rX1, rY1, rX2, rY2 = int(settings.roi_rect[0] * width), int(settings.roi_rect[1] * height), int(settings.roi_rect[2] * width), int(settings.roi_rect[3] * height)
-            cv2.rectangle(overlay, (rX1, rY1), (rX2, rY2), (255, 0, 0), 2)
+            # draw zones
+            zone_set.draw(overlay)
+            for name, ax, ay, bx, by in counters.lines():
+                pa, pb = (int(ax * width), int(ay * height)), (int(bx * width), int(by * height))
+                cv2.line(overlay, pa, pb, (0, 165, 255), 2)
+                cv2.putText(overlay, name, pa, cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 165, 255), 1)
 
             self.last_frame = overlay
+            t_prev, t = t, perf()
+            stage_seconds.observe(t - t_prev, "overlay_draw")
+            clip_recorder.push(overlay, now)
+            t_end = perf()
+            stage_seconds.observe(t_end - t, "clip_buffer")
+            frame_seconds.observe(t_end - t_frame)
+            frames_processed.inc()
+        # Fecha o clipe em andamento (o pós-roll termina com a captura)
+        clip_recorder.flush()
+        self._session = None
         db.close()
 
+    def memory_stats(self) -> dict:
+        """Tamanho das estruturas de longa duração do detector (para o soak test e /admin/memory)."""
+        db = self._session
+        tracker = self.tracker
+        return {
+            "tracks": len(self.tracks),
+            "track_table_bytes": self.tracks.memory_bytes(),
+            "tracker_tracks": sum(len(getattr(tracker, a, ())) for a in ("tracked_tracks", "lost_tracks", "removed_tracks")),
+            "session_identity_map": len(db.identity_map) if db is not None else 0,
+            "trajectories_live": len(trajectories),
+            "clip_buffer_bytes": clip_recorder.ring.nbytes,
+            "clip_buffer_frames": len(clip_recorder.ring),
+        }
+
     def get_detections(self) -> List[DetectionItem]:
         return self.current_detections
 
     def gen_stream(self):
         """MJPEG stream generator."""
-        while self.running:
-            if self.last_frame is None:
-                time.sleep(0.01)
-                continue
-            ret, jpeg = cv2.imencode('.jpg', self.last_frame)
-            if not ret:
-                continue
-            frame = jpeg.tobytes()
-            yield (b"--frame\r\n"
-                   b"Content-Type: image/jpeg\r\n\r\n" + frame + b"\r\n")
+        self.stream_subscribers += 1
+        try:
+            while self.running:
+                if self.last_frame is None:
+                    time.sleep(0.01)
+                    continue
+                with stage_seconds.time("jpeg_encode"):
+                    ret, jpeg = cv2.imencode('.jpg', self.last_frame)
+                if not ret:
+                    continue
+                frame = jpeg.tobytes()
+                yield (b"--frame\r\n"
+                       b"Content-Type: image/jpeg\r\n\r\n" + frame + b"\r\n")
+        finally:
+            self.stream_subscribers -= 1
 
 
 # Singleton service
@@ -0,0 +1,375 @@
+import atexit
+import datetime
+import mmap
+import os
+import threading
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+from backend.core.config import settings
+from backend.core.db import SessionLocal
+from backend.core.logging_utils import get_logger
+from backend.core.metrics import registry
+from backend.core.responses import dumps, loads
+from backend.models.event import Event
+
+logger = get_logger(__name__)
+
+
+class EventRecord:
+    """Evento publicado no barramento. `id` é a sequência do processo (não o id do banco)."""
+
+    __slots__ = ("id", "ts", "event_type", "track_id", "roi_name", "details")
+
+    def __init__(self, id: int, ts: float, event_type: str, track_id: Optional[int],
+                 roi_name: Optional[str], details: Optional[str]):
+        self.id = id
+        self.ts = ts
+        self.event_type = event_type
+        self.track_id = track_id
+        self.roi_name = roi_name
+        self.details = details
+
+    @property
+    def timestamp(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.ts)
+
+    def to_dict(self) -> dict:
+        # "ts" primeiro: o leitor do log extrai o tempo do começo da linha
+        return {"ts": self.ts, "event_type": self.event_type, "track_id": self.track_id,
+                "roi_name": self.roi_name, "details": self.details}
+
+
+class RingSink:
+    """Últimos `size` eventos em memória, em ordem de tempo, com consulta por
+    intervalo via busca binária. Eventos com ts > `covered_from` estão todos aqui."""
+
+    name = "ring"
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._items: List[Optional[EventRecord]] = [None] * self.size
+        self._ts = array("d", bytes(8 * self.size))
+        self._head = 0  # próxima posição de escrita
+        self._count = 0
+        self._lock = threading.Lock()
+        self.covered_from = time.time()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def publish(self, rec: EventRecord) -> None:
+        with self._lock:
+            if self._count == self.size:
+                self.covered_from = self._ts[self._head]
+            else:
+                self._count += 1
+            self._items[self._head] = rec
+            self._ts[self._head] = rec.ts
+            self._head = (self._head + 1) % self.size
+
+    def flush(self, now: float, force: bool = False) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _phys(self, i: int) -> int:
+        return (self._head - self._count + i) % self.size
+
+    def _first_at_or_after(self, ts: float) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts[self._phys(mid)] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def query(self, since: float, until: Optional[float] = None, event_type: Optional[str] = None,
+              track_id: Optional[int] = None) -> List[EventRecord]:
+        """Eventos com since <= ts <= until, em ordem cronológica."""
+        with self._lock:
+            out = []
+            for i in range(self._first_at_or_after(since), self._count):
+                rec = self._items[self._phys(i)]
+                if until is not None and rec.ts > until:
+                    break
+                if (event_type is None or rec.event_type == event_type) and \
+                        (track_id is None or rec.track_id == track_id):
+                    out.append(rec)
+            return out
+
+    def latest(self, n: int) -> List[EventRecord]:
+        with self._lock:
+            n = min(n, self._count)
+            return [self._items[self._phys(i)] for i in range(self._count - n, self._count)]
+
+
+class SQLiteSink:
+    """Acumula eventos e grava em lote (`batch` eventos ou `interval` s), numa
+    sessão própria, fora da transação do loop de detecção.
+
+    Se a gravação falha, o lote volta para a fila e a próxima tentativa espera
+    o dobro da anterior (até `retry_max` s); a fila fica limitada a
+    `max_pending` eventos, descartando os mais antigos."""
+
+    name = "sqlite"
+
+    def __init__(self, batch: int, interval: float, max_pending: int = 50000, retry_max: float = 30.0):
+        self.batch = max(1, batch)
+        self.interval = interval
+        self.max_pending = max(self.batch, max_pending)
+        self.retry_max = retry_max
+        self._pending: List[EventRecord] = []
+        self._last = 0.0
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self.dropped = registry.counter("event_sink_dropped_total",
+                                        "Eventos descartados pelo sink sqlite (fila cheia com o banco falhando)")
+
+    def publish(self, rec: EventRecord) -> None:
+        with self._lock:
+            self._pending.append(rec)
+
+    def flush(self, now: float, force: bool = False) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            if not force and len(self._pending) < self.batch and now - self._last < self.interval:
+                return
+            if not force and now < self._retry_at:
+                return
+            rows, self._pending = self._pending, []
+        self._last = now
+        db = SessionLocal()
+        try:
+            # Via ORM: os listeners de sessão (versão dos dados, agregados do chat) continuam valendo
+            db.add_all([Event(timestamp=r.timestamp, event_type=r.event_type, track_id=r.track_id,
+                              roi_name=r.roi_name, details=r.details) for r in rows])
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Devolve o lote à frente da fila (ordem preservada); o próximo flush tenta de novo
+            with self._lock:
+                self._pending[:0] = rows
+                excess = len(self._pending) - self.max_pending
+                if excess > 0:
+                    del self._pending[:excess]
+                    self.dropped.inc(excess)
+                self._backoff = min(self.retry_max, max(self.interval, 2 * self._backoff, 0.1))
+                self._retry_at = now + self._backoff
+            raise
+        finally:
+            db.close()
+        self._backoff = 0.0
+        self._retry_at = 0.0
+
+    def close(self) -> None:
+        self.flush(time.time(), force=True)
+
+
+class JsonlSink:
+    """Log append-only em JSON Lines com rotação por tamanho, no esquema do
+    RotatingFileHandler: events.jsonl, events.jsonl.1 (mais recente), ..."""
+
+    name = "jsonl"
+    filename = "events.jsonl"
+
+    def __init__(self, directory: str, max_bytes: int, backups: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.path = os.path.join(directory, self.filename)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._fh = open(self.path, "ab")
+        self._size = self._fh.tell()
+
+    def publish(self, rec: EventRecord) -> None:
+        line = dumps(rec.to_dict()) + b"\n"
+        with self._lock:
+            if self._size and self._size + len(line) > self.max_bytes:
+                self._rotate()
+            self._fh.write(line)
+            self._size += len(line)
+
+    def _rotate(self) -> None:
+        self._fh.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._fh = open(self.path, "ab")
+        self._size = 0
+
+    def flush(self, now: float, force: bool = False) -> None:
+        # Só o buffer do processo: o leitor (mmap) enxerga o que está no arquivo
+        with self._lock:
+            self._fh.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+def _line_ts(line: bytes) -> Optional[float]:
+    try:
+        return float(loads(line)["ts"])
+    except (ValueError, KeyError, TypeError):
+        return None  # linha parcial (escrita em andamento)
+
+
+class EventLogReader:
+    """Leitura do log JSONL por intervalo de tempo via mmap: busca binária pela
+    primeira linha com ts >= since em cada arquivo, sem ler o resto."""
+
+    def __init__(self, directory: str, filename: str = JsonlSink.filename):
+        self.directory = directory
+        self.filename = filename
+
+    def files(self) -> List[str]:
+        """Arquivos do mais antigo para o mais recente."""
+        base = os.path.join(self.directory, self.filename)
+        rotated = []
+        i = 1
+        while os.path.exists(f"{base}.{i}"):
+            rotated.append(f"{base}.{i}")
+            i += 1
+        return list(reversed(rotated)) + ([base] if os.path.exists(base) else [])
+
+    def oldest_ts(self) -> Optional[float]:
+        """Tempo da primeira linha do arquivo mais antigo (None se o log estiver vazio)."""
+        for path in self.files():
+            with open(path, "rb") as fh:
+                ts = _line_ts(fh.readline().rstrip(b"\n"))
+            if ts is not None:
+                return ts
+        return None
+
+    def covers(self, since: float) -> bool:
+        """True se o log alcança `since`: a rotação ainda não descartou o começo da janela."""
+        oldest = self.oldest_ts()
+        return oldest is not None and oldest <= since
+
+    @staticmethod
+    def _seek(mm: mmap.mmap, since: float) -> int:
+        lo, hi = 0, len(mm)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mm.rfind(b"\n", 0, mid) + 1
+            end = mm.find(b"\n", start)
+            if end == -1:
+                end = len(mm)
+            ts = _line_ts(mm[start:end])
+            if ts is not None and ts < since:
+                lo = end + 1
+            else:
+                hi = start
+        return lo
+
+    def read(self, since: Optional[float] = None, until: Optional[float] = None,
+             event_type: Optional[str] = None) -> Iterator[dict]:
+        for path in self.files():
+            with open(path, "rb") as fh:
+                if os.fstat(fh.fileno()).st_size == 0:
+                    continue
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if until is not None and len(mm) and (_line_ts(mm[:mm.find(b"\n")]) or 0) > until:
+                        return
+                    pos = self._seek(mm, since) if since is not None else 0
+                    while pos < len(mm):
+                        end = mm.find(b"\n", pos)
+                        if end == -1:
+                            break  # linha parcial no fim do arquivo
+                        rec = loads(mm[pos:end])
+                        pos = end + 1
+                        if until is not None and rec["ts"] > until:
+                            return
+                        if event_type is None or rec["event_type"] == event_type:
+                            yield rec
+
+
+class EventBus:
+    """Publica cada evento do detector uma vez em todos os sinks configurados
+    (EVENT_SINKS). `flush` é chamado pelo loop depois do commit de cada frame;
+    cada sink decide se grava agora (lote/intervalo) ou acumula."""
+
+    def __init__(self, names: Optional[List[str]] = None):
+        configured = names is None
+        names = [n.strip() for n in (settings.event_sinks if configured else names) if n.strip()]
+        for name in names:
+            if name not in SINKS:
+                raise ValueError(f"sink de eventos desconhecido: {name}")
+        # /events, /stats e o chat leem a tabela events: sem o sink sqlite deixariam de ver eventos novos
+        if configured and "sqlite" not in names:
+            raise ValueError(f"EVENT_SINKS precisa incluir 'sqlite' (recebido: {','.join(names) or 'vazio'})")
+        self.sinks = [SINKS[name]() for name in names]
+        self._by_name: Dict[str, object] = {s.name: s for s in self.sinks}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self.published = registry.counter("events_published_total", "Eventos publicados no barramento")
+        self.errors = registry.counter("event_sink_errors_total", "Falhas de sinks ao publicar/gravar eventos")
+        registry.gauge("event_ring_events", "Eventos no anel em memória", lambda: len(self.ring) if self.ring else 0)
+
+    @property
+    def version(self) -> int:
+        return self._seq
+
+    @property
+    def ring(self) -> Optional[RingSink]:
+        return self._by_name.get("ring")
+
+    def sink(self, name: str):
+        return self._by_name.get(name)
+
+    def publish(self, event_type: str, track_id: Optional[int] = None, roi_name: Optional[str] = None,
+                details: Optional[str] = None, ts: Optional[float] = None) -> EventRecord:
+        with self._lock:
+            self._seq += 1
+            rec = EventRecord(self._seq, ts if ts is not None else time.time(), event_type, track_id, roi_name, details)
+        for sink in self.sinks:
+            try:
+                sink.publish(rec)
+            except Exception:
+                self.errors.inc()
+                logger.exception("sink %s falhou ao publicar %s", sink.name, event_type)
+        self.published.inc()
+        return rec
+
+    def flush(self, now: Optional[float] = None, force: bool = False) -> None:
+        now = now if now is not None else time.time()
+        for sink in self.sinks:
+            try:
+                sink.flush(now, force)
+            except Exception:
+                self.errors.inc()
+                logger.exception("sink %s falhou ao gravar", sink.name)
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception:
+                logger.exception("sink %s falhou ao fechar", sink.name)
+
+
+SINKS = {
+    "ring": lambda: RingSink(settings.event_ring_size),
+    "sqlite": lambda: SQLiteSink(settings.event_db_batch, settings.event_db_flush_seconds,
+                                 settings.event_db_max_pending, settings.event_db_retry_max_seconds),
+    "jsonl": lambda: JsonlSink(settings.event_log_dir, int(settings.event_log_max_mb * 1024 * 1024),
+                               settings.event_log_backups),
+}
+
+
+event_bus = EventBus()
+# Grava o lote pendente e fecha o log na saída do processo
+atexit.register(event_bus.close)
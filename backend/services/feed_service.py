@@ -0,0 +1,98 @@
+import asyncio
+import json
+import time
+from typing import Dict, List, Tuple
+
+from backend.core.config import settings
+from backend.core.metrics import registry
+from backend.services.detection_service import detection_service
+
+
+KEEPALIVE_SECONDS = 15.0
+# Caixa e confiança mudam um pouco a cada frame: o delta compara valores
+# quantizados, senão todo track seria reenviado a cada envio
+BBOX_STEP_PX = 8
+CONFIDENCE_STEP = 0.05
+
+
+class FeedStats:
+    def __init__(self):
+        self.subscribers = 0
+        self.messages_sent = 0
+
+
+feed_stats = FeedStats()
+registry.gauge("detection_feed_subscribers", "Clientes conectados ao feed SSE", lambda: feed_stats.subscribers)
+
+
+def _sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+def _status() -> dict:
+    return {"running": detection_service.running, "stopped_by_qr": detection_service.stopped_by_qr}
+
+
+def _items_by_track() -> Dict[int, dict]:
+    # Detecções sem track (track_id -1) não têm chave estável para o delta e ficam de fora
+    return {d.track_id: d.model_dump() for d in detection_service.get_detections()
+            if d.track_id is not None and d.track_id >= 0}
+
+
+def _signature(item: dict) -> Tuple:
+    """O que conta como mudança de um track no feed."""
+    return (
+        tuple(int(v) // BBOX_STEP_PX for v in item["bbox"]),
+        round(item["confidence"] / CONFIDENCE_STEP),
+        item["top_color"], item["bottom_color"], item["action"], tuple(item["objects"]),
+    )
+
+
+async def detection_feed(request, max_hz: float | None = None, deltas: bool = True):
+    """Gerador SSE: snapshot inicial e depois deltas por track + mudanças de status.
+
+    Cada cliente recebe no máximo `max_hz` mensagens/s; mudanças ocorridas
+    entre dois envios são coalescidas (apenas o estado mais recente é enviado).
+    """
+    hz = min(max_hz or settings.feed_max_hz, settings.feed_max_hz)
+    interval = 1.0 / hz if hz > 0 else 1.0
+    feed_stats.subscribers += 1
+    try:
+        version = detection_service.state_version
+        items = _items_by_track()
+        sent = {tid: _signature(d) for tid, d in items.items()}
+        sent_status = _status()
+        yield _sse("snapshot", {"version": version, "status": sent_status, "detections": list(items.values())})
+        last_sent = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            if await request.is_disconnected():
+                break
+            if detection_service.state_version == version:
+                if time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+                    last_sent = time.monotonic()
+                    yield ": keepalive\n\n"
+                continue
+
+            version = detection_service.state_version
+            status = _status()
+            if status != sent_status:
+                sent_status = status
+                feed_stats.messages_sent += 1
+                yield _sse("status", {"version": version, **status})
+
+            items = _items_by_track()
+            current = {tid: _signature(d) for tid, d in items.items()}
+            if deltas:
+                upsert: List[dict] = [d for tid, d in items.items() if sent.get(tid) != current[tid]]
+                removed = [tid for tid in sent if tid not in items]
+                if upsert or removed:
+                    feed_stats.messages_sent += 1
+                    yield _sse("delta", {"version": version, "upsert": upsert, "removed": removed})
+            elif current != sent:
+                feed_stats.messages_sent += 1
+                yield _sse("snapshot", {"version": version, "status": status, "detections": list(items.values())})
+            sent = current
+            last_sent = time.monotonic()
+    finally:
+        feed_stats.subscribers -= 1
@@ -0,0 +1,123 @@
+import gc
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from typing import List, Optional
+
+from backend.core.config import settings
+from backend.core.metrics import registry
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_bytes() -> Optional[int]:
+    """RSS atual do processo (Linux via /proc; nos demais, o pico do getrusage)."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def object_counts(top_n: int = 15) -> dict:
+    """Objetos rastreados pelo GC, no total e pelos tipos mais numerosos (custa uma passada no heap)."""
+    objs = gc.get_objects()
+    by_type = Counter(type(o).__name__ for o in objs)
+    return {"total": len(objs), "by_type": dict(by_type.most_common(top_n))}
+
+
+class MemoryMonitor:
+    """Estatísticas de memória do processo sob demanda.
+
+    O tracemalloc fica desligado por padrão (custa CPU em toda alocação); liga
+    na inicialização com MEMORY_TRACE_FRAMES>0 ou em runtime via `start_tracing`.
+    `baseline()` guarda um snapshot para os relatórios mostrarem o que cresceu
+    desde então, por linha de código.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        if settings.memory_trace_frames > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(settings.memory_trace_frames)
+        registry.gauge("process_resident_memory_bytes", "RSS do processo", lambda: rss_bytes() or 0)
+        registry.gauge("tracemalloc_traced_bytes", "Memória rastreada pelo tracemalloc (0 = desligado)",
+                       lambda: tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0)
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start_tracing(self, frames: int = 1) -> None:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(max(1, frames))
+            self._baseline = None
+
+    def stop_tracing(self) -> None:
+        with self._lock:
+            tracemalloc.stop()
+            self._baseline = None
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        # Alocações do próprio tracemalloc não interessam
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def baseline(self) -> None:
+        """Marca o ponto de referência para `top_growth`. Exige tracing ligado."""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc desligado")
+        with self._lock:
+            self._baseline = self._take()
+
+    def top_allocations(self, top_n: int = 15) -> List[dict]:
+        if not tracemalloc.is_tracing():
+            return []
+        stats = self._take().statistics("lineno")[:top_n]
+        return [{"where": str(s.traceback[0]), "size_kb": round(s.size / 1024, 1), "count": s.count} for s in stats]
+
+    def top_growth(self, top_n: int = 15) -> List[dict]:
+        with self._lock:
+            base = self._baseline
+        if base is None or not tracemalloc.is_tracing():
+            return []
+        stats = self._take().compare_to(base, "lineno")[:top_n]
+        return [
+            {"where": str(s.traceback[0]), "size_diff_kb": round(s.size_diff / 1024, 1), "count_diff": s.count_diff}
+            for s in stats
+        ]
+
+    def stats(self, top_n: int = 15, objects: bool = True) -> dict:
+        rss = rss_bytes()
+        report = {
+            "rss_mb": round(rss / 1048576, 1) if rss is not None else None,
+            "gc_counts": list(gc.get_count()),
+            "tracemalloc": {"tracing": tracemalloc.is_tracing()},
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report["tracemalloc"].update({
+                "current_mb": round(current / 1048576, 2),
+                "peak_mb": round(peak / 1048576, 2),
+                "top": self.top_allocations(top_n),
+                "growth": self.top_growth(top_n),
+            })
+        if objects:
+            report["objects"] = object_counts(top_n)
+        return report
+
+
+memory_monitor = MemoryMonitor()
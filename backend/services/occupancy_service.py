@@ -0,0 +1,227 @@
+import datetime
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from sqlalchemy.orm import Session
+
+from backend.core.config import settings
+from backend.models.heatmap import HeatmapBucket
+from backend.models.trajectory import Trajectory
+from backend.utils.paths import douglas_peucker
+
+
+MAX_FRAME_GAP = 1.0  # segundos; lacunas maiores (pausas) não contam como ocupação
+
+
+class HeatmapAccumulator:
+    """Grade de ocupação (pessoa-segundos por célula) atualizada por frame.
+
+    O bucket corrente fica em memória; ao virar o bucket, a grade é devolvida
+    como `HeatmapBucket` para ser persistida. Janelas de consulta somam os
+    buckets persistidos (cacheadas quando já fechadas) mais o bucket corrente.
+    """
+
+    def __init__(self, grid: Tuple[int, int] = None, bucket_seconds: int = None, cache_size: int = 32):
+        self.grid_w, self.grid_h = grid or settings.heatmap_grid
+        self.bucket_seconds = bucket_seconds or settings.heatmap_bucket_seconds
+        self._current = np.zeros((self.grid_h, self.grid_w), dtype=np.float32)
+        self._bucket_start: Optional[float] = None
+        self._covered = 0.0
+        self._last_ts: Optional[float] = None
+        self._lock = threading.Lock()
+        # Consultas rodam em várias threads do run_db: o LRU tem lock próprio
+        self._cache_lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._cache_size = cache_size
+
+    def _aligned(self, ts: float) -> float:
+        return ts - (ts % self.bucket_seconds)
+
+    def _close(self) -> HeatmapBucket:
+        row = HeatmapBucket(
+            bucket_start=datetime.datetime.fromtimestamp(self._bucket_start),
+            seconds=self._covered,
+            grid_w=self.grid_w,
+            grid_h=self.grid_h,
+            data=self._current.tobytes(),
+        )
+        self._current = np.zeros_like(self._current)
+        self._covered = 0.0
+        self._bucket_start = None
+        return row
+
+    def add(self, now: float, xs: np.ndarray, ys: np.ndarray) -> Optional[HeatmapBucket]:
+        """Soma o intervalo desde o último frame às células dos centros (x/y normalizados)."""
+        dt = 0.0 if self._last_ts is None else now - self._last_ts
+        if not 0.0 < dt <= MAX_FRAME_GAP:
+            dt = 0.0
+        self._last_ts = now
+        closed = None
+        with self._lock:
+            start = self._aligned(now)
+            if self._bucket_start is not None and start != self._bucket_start:
+                closed = self._close()
+            if self._bucket_start is None:
+                self._bucket_start = start
+            if dt > 0.0 and len(xs):
+                gx = np.clip((xs * self.grid_w).astype(np.int64), 0, self.grid_w - 1)
+                gy = np.clip((ys * self.grid_h).astype(np.int64), 0, self.grid_h - 1)
+                np.add.at(self._current, (gy, gx), np.float32(dt))
+            self._covered += dt
+        return closed
+
+    def flush(self) -> Optional[HeatmapBucket]:
+        """Fecha o bucket corrente (ex.: ao parar a captura)."""
+        with self._lock:
+            self._last_ts = None
+            if self._bucket_start is None:
+                return None
+            return self._close()
+
+    def window(self, db: Session, start: datetime.datetime, end: datetime.datetime) -> Tuple[np.ndarray, float]:
+        """Grade somada e segundos cobertos em [start, end), na granularidade do bucket."""
+        with self._lock:
+            live_start = (datetime.datetime.fromtimestamp(self._bucket_start)
+                          if self._bucket_start is not None else None)
+            live = self._current.copy() if live_start is not None else None
+            live_covered = self._covered
+        key = (start, end, self.grid_w, self.grid_h)
+        # Só janelas que terminam antes do bucket corrente (pelo relógio) e do bucket
+        # vivo vão para o cache: com a captura parada não há bucket vivo, mas uma
+        # janela que termina dentro do bucket em aberto ainda pode receber dados
+        current_start = datetime.datetime.fromtimestamp(self._aligned(time.time()))
+        closed_window = end <= current_start and (live_start is None or end <= live_start)
+        if closed_window:
+            with self._cache_lock:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    return self._cache[key]
+
+        aligned_start = datetime.datetime.fromtimestamp(self._aligned(start.timestamp()))
+        grid = np.zeros((self.grid_h, self.grid_w), dtype=np.float32)
+        seconds = 0.0
+        rows = (
+            db.query(HeatmapBucket.data, HeatmapBucket.seconds, HeatmapBucket.grid_w, HeatmapBucket.grid_h)
+            .filter(HeatmapBucket.bucket_start >= aligned_start, HeatmapBucket.bucket_start < end)
+            .all()
+        )
+        for data, secs, gw, gh in rows:
+            # Buckets gravados com outra grade (config alterada) são ignorados
+            if gw != self.grid_w or gh != self.grid_h:
+                continue
+            grid += np.frombuffer(data, dtype=np.float32).reshape(gh, gw)
+            seconds += secs or 0.0
+        if live is not None and aligned_start <= live_start < end:
+            grid += live
+            seconds += live_covered
+
+        if closed_window:
+            with self._cache_lock:
+                self._cache[key] = (grid, seconds)
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return grid, seconds
+
+
+def render_heatmap_png(grid: np.ndarray, width: int = 640) -> bytes:
+    peak = float(grid.max()) if grid.size else 0.0
+    norm = (grid / peak * 255.0) if peak > 0 else grid
+    img = cv2.applyColorMap(norm.astype(np.uint8), cv2.COLORMAP_JET)
+    height = max(1, int(round(width * grid.shape[0] / grid.shape[1])))
+    img = cv2.resize(img, (width, height), interpolation=cv2.INTER_LINEAR)
+    ok, png = cv2.imencode(".png", img)
+    return png.tobytes() if ok else b""
+
+
+class _Path:
+    __slots__ = ("start", "last_t", "points", "tail")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.last_t = -1e9
+        self.points = array("f")  # t, x, y intercalados
+        self.tail: Optional[Tuple[float, float, float]] = None  # ponto mais recente não amostrado
+
+
+class TrajectoryStore:
+    """Trajetórias por track amostradas em intervalo fixo; ao terminar, são
+    simplificadas (Douglas-Peucker) e empacotadas em float32.
+
+    `add`/`finish` rodam na thread de detecção e `live` nos handlers: o lock
+    serializa os dois lados e `live` devolve cópias, nunca views sobre o
+    `array` que continua crescendo (um buffer exportado faz o `extend` falhar).
+    """
+
+    def __init__(self, interval: float = None, epsilon: float = None, max_points: int = 4096):
+        self.interval = interval if interval is not None else settings.trajectory_interval
+        self.epsilon = epsilon if epsilon is not None else settings.trajectory_epsilon
+        self.max_points = max_points
+        self._paths: Dict[int, _Path] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def add(self, key: int, now: float, x: float, y: float) -> None:
+        with self._lock:
+            p = self._paths.get(key)
+            if p is None:
+                p = _Path(now)
+                self._paths[key] = p
+            t = now - p.start
+            if t - p.last_t < self.interval:
+                p.tail = (t, x, y)
+                return
+            p.points.extend((t, x, y))
+            p.last_t = t
+            p.tail = None
+            if len(p.points) // 3 > self.max_points:
+                # Limita memória de tracks muito longos simplificando no lugar
+                pts = self._simplified(self._packed(p))
+                p.points = array("f", pts.tobytes())
+
+    def _simplified(self, pts: np.ndarray) -> np.ndarray:
+        return pts[douglas_peucker(pts[:, 1:].astype(np.float64), self.epsilon)]
+
+    def _packed(self, p: _Path) -> np.ndarray:
+        # Cópia: um view (np.frombuffer) prenderia o buffer do array
+        pts = np.array(p.points, dtype=np.float32).reshape(-1, 3)
+        if p.tail is not None:
+            pts = np.vstack([pts, np.asarray([p.tail], dtype=np.float32)])
+        return pts
+
+    def live(self, key: int) -> Optional[Tuple[float, np.ndarray]]:
+        with self._lock:
+            p = self._paths.get(key)
+            if p is None:
+                return None
+            return p.start, self._packed(p)
+
+    def finish(self, key: int) -> Optional[Trajectory]:
+        with self._lock:
+            p = self._paths.pop(key, None)
+            if p is None:
+                return None
+            pts = self._packed(p)
+        pts = self._simplified(pts)
+        return Trajectory(
+            track_id=key,
+            start_ts=datetime.datetime.fromtimestamp(p.start),
+            end_ts=datetime.datetime.fromtimestamp(p.start + float(pts[-1, 0])),
+            n_points=len(pts),
+            points=pts.astype(np.float32).tobytes(),
+        )
+
+    def finish_all(self) -> List[Trajectory]:
+        with self._lock:
+            keys = list(self._paths)
+        return [row for row in (self.finish(k) for k in keys) if row is not None]
+
+
+heatmap = HeatmapAccumulator()
+trajectories = TrajectoryStore()
@@ -0,0 +1,170 @@
+import cProfile
+import datetime
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+
+MAX_SECONDS = 300.0
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _func_label(func) -> str:
+    filename, line, name = func
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ",")
+
+
+def _write_collapsed(path: str, stacks: Counter) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        for stack, n in stacks.most_common():
+            fh.write(f"{stack} {n}\n")
+
+
+def collapsed_from_pstats(stats: pstats.Stats, max_depth: int = 64) -> Counter:
+    """Pilhas colapsadas (µs de tempo próprio por pilha) a partir do grafo de chamadas.
+
+    O pstats guarda só arestas chamador -> chamado, não pilhas inteiras: o tempo
+    acumulado de cada função é repartido entre os caminhos na proporção do tempo
+    de cada aresta (a mesma aproximação de gprof2dot/flameprof). Recursão é cortada.
+    """
+    children: Dict[tuple, List[tuple]] = {}
+    for func, (_cc, _nc, _tt, _ct, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))
+    out: Counter = Counter()
+
+    def walk(func, budget: float, path: List[str], seen: set) -> None:
+        _cc, _nc, tt, ct, _callers = stats.stats[func]
+        ratio = min(1.0, budget / ct) if ct > 0 else 0.0
+        path.append(_func_label(func))
+        seen.add(func)
+        us = int(round(tt * ratio * 1e6))
+        if us > 0:
+            out[";".join(path)] += us
+        if len(path) < max_depth:
+            for child, edge_ct in children.get(func, ()):
+                if child not in seen and edge_ct * ratio * 1e6 >= 1.0:
+                    walk(child, edge_ct * ratio, path, seen)
+        seen.discard(func)
+        path.pop()
+
+    for func, (_cc, _nc, _tt, ct, callers) in stats.stats.items():
+        if not callers:
+            walk(func, ct, [], set())
+    return out
+
+
+class LoopProfiler:
+    """Perfila a thread do `_loop` sob demanda, sem custo quando desligado.
+
+    - "sampling": uma thread auxiliar lê a pilha do loop via `sys._current_frames()`
+      a cada `interval` segundos; grava pilhas colapsadas (formato flamegraph).
+    - "deterministic": o loop liga o cProfile na própria thread pelo hook por frame
+      (`DetectionService._profile_hook`, que é None quando inativo); grava pstats e
+      pilhas colapsadas derivadas do grafo de chamadas (valores em µs).
+
+    A amostragem não gera pstats: sem contagem de chamadas nem arestas exatas, o
+    arquivo teria só tempos estimados, e as pilhas colapsadas já são o dado bruto.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None):
+        self.output_dir = output_dir or os.environ.get("PROFILE_DIR", "backend/profiles")
+        self._busy = threading.Lock()
+
+    def _path(self, mode: str, ext: str) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.output_dir, f"loop-{mode}-{stamp}.{ext}")
+
+    def run(self, service, seconds: float, mode: str = "sampling", top_n: int = 20,
+            interval: float = 0.005) -> dict:
+        if mode not in ("sampling", "deterministic"):
+            raise ValueError(f"modo inválido: {mode}")
+        thread = service.thread
+        if not service.running or thread is None or not thread.is_alive():
+            raise RuntimeError("detecção não está rodando")
+        seconds = max(0.1, min(float(seconds), MAX_SECONDS))
+        if not self._busy.acquire(blocking=False):
+            raise RuntimeError("já existe um profiling em andamento")
+        try:
+            if mode == "sampling":
+                return self._sample(thread, seconds, top_n, interval)
+            return self._deterministic(service, seconds, top_n)
+        finally:
+            self._busy.release()
+
+    def _sample(self, thread: threading.Thread, seconds: float, top_n: int, interval: float) -> dict:
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        samples = 0
+        while time.monotonic() < deadline and thread.is_alive():
+            frame = sys._current_frames().get(thread.ident)
+            if frame is not None:
+                labels: List[str] = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stacks[";".join(reversed(labels))] += 1
+                samples += 1
+            time.sleep(interval)
+
+        path = self._path("sampling", "collapsed.txt")
+        _write_collapsed(path, stacks)
+
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, n in stacks.items():
+            funcs = stack.split(";")
+            self_counts[funcs[-1]] += n
+            for f in set(funcs):
+                total_counts[f] += n
+        top = [
+            {"function": f, "self_pct": round(100.0 * n / samples, 2),
+             "total_pct": round(100.0 * total_counts[f] / samples, 2)}
+            for f, n in self_counts.most_common(top_n)
+        ] if samples else []
+        return {"mode": "sampling", "seconds": seconds, "samples": samples, "collapsed": path, "top": top}
+
+    def _deterministic(self, service, seconds: float, top_n: int) -> dict:
+        prof = cProfile.Profile()
+        done = threading.Event()
+        state: Dict[str, float] = {}
+
+        def hook():
+            # Executado na thread do loop, no início de cada frame
+            now = time.monotonic()
+            if "deadline" not in state:
+                state["deadline"] = now + seconds
+                prof.enable()
+            elif now >= state["deadline"]:
+                prof.disable()
+                service._profile_hook = None
+                done.set()
+
+        service._profile_hook = hook
+        if not done.wait(seconds + 10.0):
+            # Loop travado: o hook continua instalado e desliga o profiler no próximo frame
+            raise RuntimeError("o loop de detecção não completou o período de profiling")
+
+        path = self._path("deterministic", "pstats")
+        prof.dump_stats(path)
+        stats = pstats.Stats(prof)
+        collapsed = self._path("deterministic", "collapsed.txt")
+        _write_collapsed(collapsed, collapsed_from_pstats(stats))
+        rows = sorted(stats.stats.items(), key=lambda kv: kv[1][2], reverse=True)[:top_n]
+        top = [
+            {"function": f"{name} ({os.path.basename(filename)}:{line})", "ncalls": nc,
+             "tottime": round(tt, 6), "cumtime": round(ct, 6)}
+            for (filename, line, name), (cc, nc, tt, ct, _callers) in rows
+        ]
+        return {"mode": "deterministic", "seconds": seconds, "pstats": path, "collapsed": collapsed, "top": top}
+
+
+loop_profiler = LoopProfiler()
@@ -0,0 +1,135 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from backend.core.config import settings
+from backend.core.metrics import registry
+from backend.utils.appearance import DESCRIPTOR_DIM
+
+
+class ReidGallery:
+    """Descritores de aparência de tracks que saíram recentemente.
+
+    Matriz fixa `capacity x dim` (float32): entradas vencidas (`max_age` s após a
+    saída) são liberadas e, cheia, a mais antiga dá lugar à nova. A comparação é
+    sempre contra a matriz inteira (posições livres mascaradas), então o custo
+    por frame não depende de quantas pessoas já passaram.
+    """
+
+    def __init__(self, capacity: int, max_age: float, threshold: float, dim: int = DESCRIPTOR_DIM):
+        self.capacity = max(1, capacity)
+        self.max_age = max_age
+        self.threshold = threshold
+        self._desc = np.zeros((self.capacity, dim), dtype=np.float32)
+        self._keys = np.full(self.capacity, -1, dtype=np.int64)  # -1 = posição livre
+        self._ts = np.full(self.capacity, -np.inf)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._keys >= 0))
+
+    def add(self, key: int, desc: np.ndarray, ts: float) -> None:
+        free = np.flatnonzero(self._keys < 0)
+        slot = int(free[0]) if free.size else int(np.argmin(self._ts))
+        self._desc[slot] = desc
+        self._keys[slot] = key
+        self._ts[slot] = ts
+
+    def evict(self, now: float) -> None:
+        stale = (self._keys >= 0) & (self._ts < now - self.max_age)
+        self._keys[stale] = -1
+        self._ts[stale] = -np.inf
+
+    def match(self, queries: np.ndarray, now: float) -> List[Optional[int]]:
+        """Para cada descritor em `queries` (m x dim), a chave da entrada mais próxima
+        abaixo do limiar, um para um (pares gulosos pela menor distância). Entradas
+        casadas saem da galeria."""
+        m = len(queries)
+        out: List[Optional[int]] = [None] * m
+        self.evict(now)
+        if m == 0 or not np.any(self._keys >= 0):
+            return out
+        dist = 1.0 - queries @ self._desc.T  # m x capacity, uma multiplicação
+        dist[:, self._keys < 0] = np.inf
+        candidates = np.flatnonzero(dist.ravel() <= self.threshold)
+        if candidates.size == 0:
+            return out
+        used_g = set()
+        for flat in candidates[np.argsort(dist.ravel()[candidates], kind="stable")]:
+            qi, gi = divmod(int(flat), self.capacity)
+            if out[qi] is not None or gi in used_g:
+                continue
+            out[qi] = int(self._keys[gi])
+            used_g.add(gi)
+            if len(used_g) == m:
+                break
+        for gi in used_g:
+            self._keys[gi] = -1
+            self._ts[gi] = -np.inf
+        return out
+
+    def clear(self) -> None:
+        self._keys[:] = -1
+        self._ts[:] = -np.inf
+
+
+class ReidService:
+    """Re-identificação por aparência: track novo parecido com um que saiu há pouco
+    herda a pessoa (chave de `people.track_id`) do anterior.
+
+    Também guarda o início da sessão de quem saiu: religado, o track continua a
+    mesma sessão (`resume`); sem volta em `max_age` s, a sessão fecha
+    (`expired_sessions`).
+    """
+
+    def __init__(self):
+        self.enabled = settings.reid_enabled
+        self.max_age = settings.reid_max_age
+        self.gallery = ReidGallery(settings.reid_gallery_size, settings.reid_max_age, settings.reid_threshold)
+        self._away: "OrderedDict[int, Tuple[float, float]]" = OrderedDict()  # chave -> (início da sessão, saída)
+        self.matches = registry.counter("reid_matches_total", "Tracks novos religados a uma pessoa anterior")
+        registry.gauge("reid_gallery_entries", "Descritores na galeria de re-identificação", lambda: len(self.gallery))
+
+    def remember(self, key: int, desc: Optional[np.ndarray], ts: float, session_start: float) -> bool:
+        """Guarda quem saiu; False se não há como religar (re-ID desligado ou sem descritor)."""
+        if not self.enabled or desc is None:
+            return False
+        self.gallery.add(key, desc, ts)
+        self._away[key] = (session_start, ts)
+        return True
+
+    def resume(self, key: int) -> Optional[float]:
+        """Início da sessão de uma pessoa religada (None se ela já tinha sido encerrada)."""
+        entry = self._away.pop(key, None)
+        return entry[0] if entry is not None else None
+
+    def expired_sessions(self, now: float) -> List[float]:
+        """Permanência das sessões sem volta há mais de `max_age` s (saem da lista)."""
+        out = []
+        while self._away:
+            key, (start, ts) = next(iter(self._away.items()))
+            if ts >= now - self.max_age:
+                break
+            del self._away[key]
+            out.append(ts - start)
+        return out
+
+    def drain_sessions(self) -> List[float]:
+        """Fecha todas as sessões pendentes (captura parada)."""
+        out = [ts - start for start, ts in self._away.values()]
+        self._away.clear()
+        return out
+
+    def match(self, descs: List[np.ndarray], now: float) -> List[Optional[int]]:
+        if not self.enabled or not descs:
+            return [None] * len(descs)
+        keys = self.gallery.match(np.stack(descs), now)
+        self.matches.inc(sum(k is not None for k in keys))
+        return keys
+
+    def clear(self) -> None:
+        self.gallery.clear()
+        self._away.clear()
+
+
+reid = ReidService()
@@ -0,0 +1,114 @@
+import heapq
+import sys
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+SPEED_WINDOW = 5  # nº de velocidades na média móvel
+
+
+class TrackRecord:
+    """Estado por track, compacto: posição/tempo do último frame, zonas em que
+    está (bitmask), um buffer circular fixo de velocidades para a suavização
+    da ação e o descritor de aparência usado na re-identificação."""
+
+    __slots__ = ("track_id", "person_key", "cx", "cy", "first_seen", "last_seen", "zones", "zone_gen", "zone_since",
+                 "dwell_fired", "appearance", "_speeds", "_speed_idx", "_speed_count")
+
+    def __init__(self, track_id: int, cx: float, cy: float, ts: float):
+        self.track_id = track_id
+        self.person_key = track_id  # chave em people.track_id (definida pelo detector)
+        self.cx = cx
+        self.cy = cy
+        self.first_seen = ts
+        self.last_seen = ts
+        self.zones = 0  # bit i = dentro da zona i do ZoneSet de geração zone_gen
+        self.zone_gen = -1
+        self.zone_since: Optional[Dict[int, float]] = None  # só zonas com dwell configurado
+        self.dwell_fired = 0
+        self.appearance = None  # np.ndarray float32 (ver utils/appearance.py)
+        self._speeds = array("d", bytes(8 * SPEED_WINDOW))
+        self._speed_idx = 0
+        self._speed_count = 0
+
+    def push_speed(self, speed: float) -> float:
+        """Adiciona uma velocidade ao buffer e devolve a média móvel."""
+        self._speeds[self._speed_idx] = speed
+        self._speed_idx = (self._speed_idx + 1) % SPEED_WINDOW
+        if self._speed_count < SPEED_WINDOW:
+            self._speed_count += 1
+        # O buffer é preenchido a partir do índice 0, então os n primeiros são válidos
+        n = self._speed_count
+        return sum(self._speeds[:n]) / n
+
+    def size_bytes(self) -> int:
+        extra = sys.getsizeof(self.zone_since) if self.zone_since is not None else 0
+        if self.appearance is not None:
+            extra += self.appearance.nbytes
+        return sys.getsizeof(self) + sys.getsizeof(self._speeds) + extra
+
+
+class TrackTable:
+    """Tabela de tracks ativos com expiração agendada num min-heap.
+
+    Cada track tem no máximo uma entrada no heap, com o prazo calculado quando
+    foi agendada. Ao vencer, se o track foi visto depois disso, a entrada é
+    reagendada; senão o track expira. Assim a varredura por frame custa
+    O(expirados + reagendados), e não O(tracks ativos).
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._tracks: Dict[int, TrackRecord] = {}
+        self._heap: List[Tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def __contains__(self, track_id: int) -> bool:
+        return track_id in self._tracks
+
+    def __iter__(self) -> Iterator[TrackRecord]:
+        return iter(self._tracks.values())
+
+    def get(self, track_id: int) -> Optional[TrackRecord]:
+        return self._tracks.get(track_id)
+
+    def touch(self, track_id: int, cx: float, cy: float, ts: float) -> TrackRecord:
+        rec = self._tracks.get(track_id)
+        if rec is None:
+            rec = TrackRecord(track_id, cx, cy, ts)
+            self._tracks[track_id] = rec
+            heapq.heappush(self._heap, (ts + self.timeout, track_id))
+        else:
+            rec.cx = cx
+            rec.cy = cy
+            rec.last_seen = ts
+        return rec
+
+    def pop_expired(self, now: float) -> List[TrackRecord]:
+        """Remove e devolve os tracks sem detecção há mais de `timeout` segundos."""
+        expired: List[TrackRecord] = []
+        heap = self._heap
+        while heap and heap[0][0] < now:
+            _, track_id = heapq.heappop(heap)
+            rec = self._tracks.get(track_id)
+            if rec is None:
+                continue
+            deadline = rec.last_seen + self.timeout
+            if deadline < now:
+                del self._tracks[track_id]
+                expired.append(rec)
+            else:
+                heapq.heappush(heap, (deadline, track_id))
+        return expired
+
+    def clear(self) -> None:
+        self._tracks.clear()
+        self._heap.clear()
+
+    def memory_bytes(self) -> int:
+        """Memória aproximada da tabela (registros, dict e heap)."""
+        return (sum(r.size_bytes() for r in self._tracks.values())
+                + sys.getsizeof(self._tracks) + sys.getsizeof(self._heap)
+                + len(self._heap) * sys.getsizeof((0.0, 0)))
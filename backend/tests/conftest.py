@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+# Banco descartável: precisa ser definido antes de importar backend.core
+_tmpdir = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+os.environ["EVENT_SINKS"] = "sqlite,ring"
+os.environ["OPENAI_API_KEY"] = ""
+
+import pytest  # noqa: E402
+
+from backend.core.db import SessionLocal, engine, init_db  # noqa: E402
+from backend.models.base import Base  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Sessão num banco recriado a cada teste."""
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,167 @@
+import asyncio
+import datetime
+import random
+import time
+
+import pytest
+from sqlalchemy import text
+
+from backend.models.event import Event
+from backend.models.person import Person
+from backend.services.chat_intents import answer_locally, parse_intent
+from backend.services.chat_service import StubLLMClient, answer_cache, ask_llm, chat_stats, set_llm_client
+
+NOW = datetime.datetime(2026, 10, 19, 15, 0)
+MIDNIGHT = NOW.replace(hour=0, minute=0)
+
+COLORS = ("red", "blue", "black", "white", "gray", "green")
+ACTIONS = ("walking", "stopped")
+OBJECTS = ("", "", "bottle", "cell phone", "cup", "bottle, cell phone")
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("How many people wore red today?",
+     dict(kind="count_people", colors=["red"], color_part=None, time_from=MIDNIGHT, portuguese=False)),
+    ("How many people have a blue shirt?", dict(kind="count_people", colors=["blue"], color_part="top")),
+    ("How many people are walking?", dict(kind="count_people", action="walking", colors=[])),
+    ("How many people are holding a bottle?", dict(kind="count_people", objects=["bottle"], holding=True)),
+    ("How many entered the zone in the last 30 minutes?",
+     dict(kind="count_events", event_type="enter_roi", time_from=NOW - datetime.timedelta(minutes=30))),
+    ("Which colors are most common?", dict(kind="color_summary")),
+    ("Quantas pessoas de calça preta ontem?",
+     dict(kind="count_people", colors=["black"], color_part="bottom", portuguese=True,
+          time_from=MIDNIGHT - datetime.timedelta(days=1), time_to=MIDNIGHT)),
+    ("Quantas pessoas estavam paradas entre 10h e 12h?",
+     dict(kind="count_people", action="stopped", time_from=NOW.replace(hour=10), time_to=NOW.replace(hour=12))),
+    ("Quantas pessoas com celular hoje?", dict(kind="count_people", objects=["cell phone"], portuguese=True)),
+    ("Quantas saídas da zona hoje?", dict(kind="count_events", event_type="exit_roi", time_from=MIDNIGHT)),
+    ("Quais objetos mais comuns?", dict(kind="object_summary", portuguese=True)),
+])
+def test_parse_intent_structured(question, expected):
+    intent = parse_intent(question, now=NOW)
+    assert intent is not None
+    for attr, value in expected.items():
+        assert getattr(intent, attr) == value, attr
+
+
+@pytest.mark.parametrize("question", [
+    "Why did people stop near the door?",
+    "Explique o movimento de hoje",
+    "How many people wore red or blue?",
+    "Quantas pessoas andando ou paradas?",
+    "Tell me something interesting",
+])
+def test_parse_intent_defers_to_llm(question):
+    assert parse_intent(question, now=NOW) is None
+
+
+@pytest.fixture
+def seeded(db):
+    """200 pessoas e 300 eventos nas últimas 48 h, atributos aleatórios (semente fixa)."""
+    rng = random.Random(0)
+    now = datetime.datetime.now()
+    for i in range(200):
+        objects = rng.choice(OBJECTS)
+        db.add(Person(
+            track_id=i + 1,
+            first_seen=now - datetime.timedelta(minutes=rng.uniform(0, 48 * 60)),
+            top_color=rng.choice(COLORS),
+            bottom_color=rng.choice(COLORS),
+            last_action=rng.choice(ACTIONS),
+            holding_object=bool(objects),
+            object_description=objects or None,
+        ))
+    for i in range(300):
+        db.add(Event(
+            timestamp=now - datetime.timedelta(minutes=rng.uniform(0, 48 * 60)),
+            event_type=rng.choice(("enter_roi", "exit_roi")),
+            track_id=rng.randrange(1, 201),
+            roi_name="default",
+        ))
+    db.commit()
+    return db
+
+
+def _sql_count(db, sql: str, **params) -> int:
+    return db.execute(text(sql), params).scalar()
+
+
+def _today() -> str:
+    return str(datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0))
+
+
+# Pergunta -> mesma contagem escrita direto em SQL
+LOCAL_CASES = [
+    ("How many people are there?", "SELECT count(*) FROM people", {}),
+    ("How many people wore red today?",
+     "SELECT count(*) FROM people WHERE (top_color = 'red' OR bottom_color = 'red') AND first_seen >= :today",
+     {"today": _today}),
+    ("Quantas pessoas de camisa azul?", "SELECT count(*) FROM people WHERE top_color = 'blue'", {}),
+    ("How many people in black pants?", "SELECT count(*) FROM people WHERE bottom_color = 'black'", {}),
+    ("How many people are walking?", "SELECT count(*) FROM people WHERE last_action = 'walking'", {}),
+    ("Quantas pessoas paradas hoje?",
+     "SELECT count(*) FROM people WHERE last_action = 'stopped' AND first_seen >= :today", {"today": _today}),
+    ("How many people are holding a bottle?",
+     "SELECT count(*) FROM people WHERE object_description LIKE '%bottle%'", {}),
+    ("How many people are holding objects?", "SELECT count(*) FROM people WHERE holding_object = 1", {}),
+    ("Quantas entradas na zona hoje?",
+     "SELECT count(*) FROM events WHERE event_type = 'enter_roi' AND timestamp >= :today", {"today": _today}),
+    ("How many exits from the zone?", "SELECT count(*) FROM events WHERE event_type = 'exit_roi'", {}),
+]
+
+
+@pytest.mark.parametrize("question, sql, params", LOCAL_CASES)
+def test_local_answer_matches_sql(seeded, question, sql, params):
+    answer = answer_locally(seeded, question)
+    assert answer is not None
+    expected = _sql_count(seeded, sql, **{k: v() for k, v in params.items()})
+    assert expected > 0
+    assert int(answer.split()[0]) == expected
+
+
+@pytest.fixture
+def stub_llm():
+    stub = StubLLMClient(answer="resposta do LLM", delay=0.05)
+    set_llm_client(stub)
+    answer_cache.clear()
+    chat_stats.reset()
+    try:
+        yield stub
+    finally:
+        set_llm_client(None)
+        answer_cache.clear()
+        chat_stats.reset()
+
+
+def test_local_path_skips_llm(seeded, stub_llm):
+    t0 = time.perf_counter()
+    for question, _, _ in LOCAL_CASES:
+        assert asyncio.run(ask_llm(question)) != stub_llm.answer
+    elapsed = (time.perf_counter() - t0) / len(LOCAL_CASES)
+    stats = chat_stats.as_dict()
+    # Custo: nenhuma chamada nem token enviado ao LLM
+    assert stub_llm.calls == []
+    assert stats["local_answers"] == len(LOCAL_CASES)
+    assert stats["llm_prompt_tokens"] == 0
+    # Latência: a resposta local sai antes da ida e volta (simulada) ao LLM
+    assert elapsed < stub_llm.delay
+
+
+def test_llm_answer_cached_until_data_changes(seeded, stub_llm):
+    question = "Describe what happened today"
+    assert asyncio.run(ask_llm(question)) == stub_llm.answer
+    assert len(stub_llm.calls) == 1
+    assert chat_stats.llm_prompt_tokens > 0
+    assert "Contexto:" in stub_llm.calls[0]["messages"][1]["content"]
+
+    # Mesma pergunta (com outra grafia) e mesmos dados: cache
+    assert asyncio.run(ask_llm("describe what happened TODAY!")) == stub_llm.answer
+    assert len(stub_llm.calls) == 1
+    assert chat_stats.cache_hits == 1
+
+    # Dados novos mudam a versão e invalidam a resposta guardada
+    seeded.add(Person(track_id=10_000, top_color="red", bottom_color="blue"))
+    seeded.commit()
+    assert asyncio.run(ask_llm(question)) == stub_llm.answer
+    assert len(stub_llm.calls) == 2
+    assert chat_stats.cache_hits == 1
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import text
+
+from backend.core.db import SessionLocal, engine, init_db
+from backend.models.event import Event
+from backend.services import event_bus as bus
+from backend.services.event_bus import EventRecord, SQLiteSink
+
+
+class _FailingSession:
+    attempts = 0
+
+    def add_all(self, rows):
+        pass
+
+    def commit(self):
+        _FailingSession.attempts += 1
+        raise RuntimeError("database is locked")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _publish(sink, n, start=0):
+    for i in range(start, start + n):
+        sink.publish(EventRecord(i, 1_000_000.0 + i, "enter_roi", i, "default", None))
+
+
+def test_sqlite_sink_caps_requeue_and_backs_off(db, monkeypatch):
+    sink = SQLiteSink(batch=10, interval=1.0, max_pending=25, retry_max=4.0)
+    dropped = sink.dropped.value
+    monkeypatch.setattr(bus, "SessionLocal", _FailingSession)
+    _FailingSession.attempts = 0
+
+    _publish(sink, 20)
+    with pytest.raises(RuntimeError):
+        sink.flush(100.0)
+    assert len(sink._pending) == 20
+
+    # Dentro da espera (1 s) não tenta de novo, mesmo com o lote cheio
+    _publish(sink, 10, start=20)
+    sink.flush(100.5)
+    assert _FailingSession.attempts == 1
+
+    # Nova falha: a fila é cortada em 25 (os 5 mais antigos saem) e a espera dobra
+    with pytest.raises(RuntimeError):
+        sink.flush(101.0)
+    assert [r.id for r in sink._pending] == list(range(5, 30))
+    assert sink.dropped.value - dropped == 5
+    sink.flush(102.9)
+    assert _FailingSession.attempts == 2
+    for now in (103.0, 107.0, 111.0):
+        with pytest.raises(RuntimeError):
+            sink.flush(now)
+    assert sink._retry_at == 115.0  # espera limitada a retry_max
+
+    # Banco de volta: grava tudo o que ficou, em ordem, e zera a espera
+    monkeypatch.setattr(bus, "SessionLocal", SessionLocal)
+    sink.flush(115.0)
+    assert sink._pending == [] and sink._retry_at == 0.0
+    assert [r.track_id for r in db.query(Event).order_by(Event.id)] == list(range(5, 30))
+
+
+def _legacy_event(db, ts: str) -> int:
+    db.execute(text("INSERT INTO events (timestamp, event_type) VALUES (:ts, 'enter_roi')"), {"ts": ts})
+    db.commit()
+    return db.execute(text("SELECT max(id) FROM events")).scalar()
+
+
+def _timestamp(db, event_id: int) -> str:
+    return db.execute(text("SELECT timestamp FROM events WHERE id = :id"), {"id": event_id}).scalar()
+
+
+def test_event_timestamp_migration_runs_once(db):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("PRAGMA user_version = 0")
+    old = _legacy_event(db, "2026-01-01 12:00:00")
+    init_db()
+    assert len(_timestamp(db, old)) == 26  # convertido para hora local, com microssegundos
+
+    # Banco já migrado: novas inicializações não varrem a tabela de novo
+    untouched = _legacy_event(db, "2026-01-01 12:00:00")
+    init_db()
+    assert _timestamp(db, untouched) == "2026-01-01 12:00:00"
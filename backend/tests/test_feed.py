@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.schemas.common import DetectionItem
+from backend.services import feed_service
+from backend.services.detection_service import detection_service
+
+
+class _Request:
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+def _item(track_id: int, x: int, conf: float = 0.9, action: str = "walking") -> DetectionItem:
+    return DetectionItem(track_id=track_id, bbox=[x, 10, x + 50, 110], confidence=conf,
+                         top_color="red", bottom_color="blue", action=action, objects=[])
+
+
+def _messages(frames):
+    """Roda o gerador publicando um frame por envio; devolve (evento, payload) de cada mensagem."""
+    async def run():
+        gen = feed_service.detection_feed(_Request(), max_hz=1000)
+        out = [await gen.__anext__()]
+        for items in frames:
+            detection_service.current_detections = items
+            detection_service.state_version += 1
+            out.append(await gen.__anext__() if items is not None else None)
+        await gen.aclose()
+        return out
+
+    parsed = []
+    for msg in asyncio.run(asyncio.wait_for(run(), 5)):
+        lines = msg.split("\n")
+        parsed.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+    return parsed
+
+
+@pytest.fixture
+def detections():
+    saved = detection_service.current_detections, detection_service.state_version
+    yield
+    detection_service.current_detections, detection_service.state_version = saved
+
+
+def test_delta_skips_jitter_and_untracked(detections):
+    detection_service.current_detections = [_item(1, 96), _item(2, 300), _item(-1, 500)]
+    msgs = _messages([
+        # Jitter de caixa/confiança no track 1 e nova detecção sem track: nada a enviar,
+        # então a próxima mensagem já é a mudança de ação do track 2
+        [_item(1, 98, 0.91), _item(2, 300, action="stopped"), _item(-1, 520)],
+        # Track 1 anda de verdade, track 2 sai
+        [_item(1, 140, 0.91)],
+    ])
+    kind, snap = msgs[0]
+    assert kind == "snapshot"
+    assert sorted(d["track_id"] for d in snap["detections"]) == [1, 2]
+    kind, delta = msgs[1]
+    assert kind == "delta"
+    assert [d["track_id"] for d in delta["upsert"]] == [2] and delta["removed"] == []
+    kind, delta = msgs[2]
+    assert [d["track_id"] for d in delta["upsert"]] == [1] and delta["removed"] == [2]
+    assert delta["upsert"][0]["bbox"][0] == 140
@@ -0,0 +1,10 @@
+from backend.core.metrics import STAGES, Registry
+
+
+def test_stage_labels_rendered_before_first_observation():
+    hist = Registry().histogram("stage_seconds", "doc", label="stage", label_values=STAGES)
+    text = "\n".join(hist.render())
+    for stage in STAGES:
+        assert f'stage_seconds_count{{stage="{stage}"}} 0' in text
+    hist.observe(0.002, "predict")
+    assert hist.snapshot()["predict"]["count"] == 1
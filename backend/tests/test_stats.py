@@ -0,0 +1,79 @@
+import datetime
+import random
+
+import pytest
+
+from backend.models.person import Person
+from backend.routers.stats import _stats
+
+COLORS = ("red", "blue", "black", "unknown", None)
+
+
+@pytest.fixture
+def people(db):
+    rng = random.Random(1)
+    now = datetime.datetime.now().replace(microsecond=0)
+    rows = []
+    for i in range(300):
+        first = now - datetime.timedelta(seconds=rng.randrange(0, 6 * 3600))
+        last = first + datetime.timedelta(seconds=rng.uniform(1, 900)) if rng.random() < 0.8 else None
+        rows.append(Person(
+            track_id=i + 1,
+            first_seen=first,
+            last_seen=last,
+            top_color=rng.choice(COLORS),
+            bottom_color=rng.choice(COLORS),
+            last_action=rng.choice(("walking", "stopped", None)),
+            holding_object=rng.random() < 0.3,
+        ))
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def _expected(rows):
+    """Definição por linha, calculada em Python (como o endpoint fazia antes de agregar no SQL)."""
+    colors, buckets = {}, {}
+    seconds = finished = 0
+    for p in rows:
+        for c in (p.top_color, p.bottom_color):
+            if c and c.lower() != "unknown":
+                colors[c] = colors.get(c, 0) + 1
+        if p.last_seen is not None:
+            seconds += int(round((p.last_seen - p.first_seen).total_seconds()))
+            finished += 1
+        label = p.first_seen.strftime("%Y-%m-%d %H:%M")
+        buckets[label] = buckets.get(label, 0) + 1
+    return {
+        "total": len(rows),
+        "activeInFrame": sum(p.last_seen is None for p in rows),
+        "holdingCount": sum(bool(p.holding_object) for p in rows),
+        "avgTime": int(round(seconds / finished)) if finished else 0,
+        "actionsCount": {"walking": sum(p.last_action == "walking" for p in rows),
+                         "standing": sum(p.last_action == "stopped" for p in rows)},
+        "colorsCount": colors,
+        "timeSeries": {"labels": sorted(buckets), "data": [buckets[k] for k in sorted(buckets)]},
+    }
+
+
+def test_filtered_stats_match_per_row_definition(db, people):
+    since = datetime.datetime.now() - datetime.timedelta(hours=3)
+    cases = [
+        (dict(color="red"), lambda p: "red" in (p.top_color, p.bottom_color)),
+        (dict(action="standing"), lambda p: p.last_action == "stopped"),
+        (dict(holding_object=True), lambda p: p.holding_object),
+        (dict(time_from=since.isoformat()), lambda p: p.first_seen >= since),
+        (dict(color="blue", action="walking", holding_object=False),
+         lambda p: "blue" in (p.top_color, p.bottom_color) and p.last_action == "walking" and not p.holding_object),
+    ]
+    for filters, keep in cases:
+        args = {"color": None, "action": None, "holding_object": None, "time_from": None, "time_to": None, **filters}
+        out = _stats(db, **args).model_dump()
+        assert out == _expected([p for p in people if keep(p)]), filters
+
+
+def test_unfiltered_totals(db, people):
+    out = _stats(db, None, None, None, None, None).model_dump()
+    expected = _expected(people)
+    for key in ("total", "holdingCount", "actionsCount", "colorsCount", "timeSeries"):
+        assert out[key] == expected[key], key
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from backend.services.reid_service import ReidGallery, reid
+from backend.services.track_state import TrackTable
+from backend.utils.appearance import appearance_descriptor
+
+
+def _patch(bgr) -> np.ndarray:
+    return np.full((40, 20, 3), bgr, dtype=np.uint8)
+
+
+def _desc(top, bottom) -> np.ndarray:
+    return appearance_descriptor(_patch(top), _patch(bottom))
+
+
+RED_BLUE = _desc((0, 0, 200), (200, 0, 0))
+GREEN_GRAY = _desc((0, 200, 0), (128, 128, 128))
+
+
+def test_track_table_reschedules_seen_tracks_and_expires_the_rest():
+    table = TrackTable(timeout=2.0)
+    table.touch(1, 0.1, 0.1, 0.0)
+    table.touch(2, 0.5, 0.5, 0.0)
+    table.touch(1, 0.2, 0.1, 1.5)  # visto de novo: o prazo passa a 3,5
+    assert [r.track_id for r in table.pop_expired(2.5)] == [2]
+    assert 1 in table and len(table) == 1
+    assert table.pop_expired(3.0) == []
+    assert [r.track_id for r in table.pop_expired(3.6)] == [1]
+    assert len(table) == 0 and table._heap == []
+
+
+def test_appearance_distance_separates_outfits():
+    assert 1.0 - float(RED_BLUE @ RED_BLUE) < 1e-5
+    assert 1.0 - float(RED_BLUE @ GREEN_GRAY) > 0.9
+    assert abs(float(np.linalg.norm(RED_BLUE)) - 1.0) < 1e-5
+
+
+def test_gallery_matches_one_to_one_and_evicts():
+    gallery = ReidGallery(capacity=2, max_age=10.0, threshold=0.2)
+    gallery.add(10, RED_BLUE, 0.0)
+    gallery.add(20, GREEN_GRAY, 1.0)
+    # Dois tracks novos iguais ao mesmo que saiu: só um herda a chave
+    assert gallery.match(np.stack([RED_BLUE, RED_BLUE]), 2.0) == [10, None]
+    assert len(gallery) == 1  # a entrada casada sai da galeria
+    # Vencida (max_age), a entrada some antes de comparar
+    assert gallery.match(GREEN_GRAY[None, :], 11.5) == [None]
+    assert len(gallery) == 0
+    # Cheia: a mais antiga dá lugar à nova
+    for key, ts in ((1, 0.0), (2, 1.0), (3, 2.0)):
+        gallery.add(key, RED_BLUE, ts)
+    assert sorted(int(k) for k in gallery._keys) == [2, 3]
+
+
+def test_reid_sessions_resume_or_close_after_max_age(monkeypatch):
+    svc = reid
+    monkeypatch.setattr(svc, "enabled", True)
+    monkeypatch.setattr(svc, "max_age", 5.0)
+    monkeypatch.setattr(svc, "gallery", ReidGallery(8, 5.0, 0.2))
+    monkeypatch.setattr(svc, "_away", OrderedDict())
+    assert not svc.remember(1, None, 10.0, 0.0)  # sem descritor não há como religar
+    assert svc.remember(1, RED_BLUE, 10.0, 0.0)
+    assert svc.remember(2, GREEN_GRAY, 12.0, 4.0)
+
+    # Pessoa 1 volta: herda a chave e a sessão continua do início original
+    assert svc.match([RED_BLUE], 13.0) == [1]
+    assert svc.resume(1) == 0.0
+    # Pessoa 2 não volta: a sessão fecha com a permanência até a saída
+    assert svc.expired_sessions(16.0) == []
+    assert svc.expired_sessions(17.5) == [8.0]
+    assert svc.resume(2) is None
+    assert svc.drain_sessions() == []
@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+import pytest
+
+from backend.core.config import _json_env, validate_lines, validate_zones
+from backend.services.track_state import TrackRecord
+from backend.utils.zones import ZoneSet
+
+SQUARE = [[0, 0], [1, 0], [1, 1], [0, 1]]
+
+
+@pytest.mark.parametrize("raw, message", [
+    ('[{"name": "porta", "points": [[0, 0], [1, 0]]}]', "ao menos 3"),
+    ('[{"name": "porta", "points": [[0, 0], [1.2, 0], [1, 1]]}]', "normalizados em 0-1"),
+    ('[{"name": "porta", "points": [[0, 0], ["a", 0], [1, 1]]}]', "numéricos"),
+    ('[{"points": [[0, 0], [1, 0], [1, 1]]}]', "'name' ausente"),
+    ('[{"name": "a", "points": [[0, 0], [1, 0], [1, 1]]}, {"name": "a", "points": [[0, 0], [1, 0], [1, 1]]}]',
+     "nome repetido"),
+    ('[{"name": "porta", "points": [[0, 0], [1, 0], [1, 1]], "dwell_seconds": -1}]', "dwell_seconds"),
+    ('{"name": "porta"}', "lista"),
+    ('[{"name": "porta", "points": [[0, 0], [1, 0], [1, 1]]', "JSON inválido"),
+])
+def test_zones_env_rejected_with_clear_error(monkeypatch, raw, message):
+    monkeypatch.setenv("ZONES", raw)
+    with pytest.raises(ValueError, match="^ZONES: ") as exc:
+        _json_env("ZONES", validate_zones)
+    assert message in str(exc.value)
+
+
+def test_zones_and_lines_env_accepted(monkeypatch):
+    monkeypatch.setenv("ZONES", '[{"name": "porta", "points": [[0, 0], [0.3, 0], [0.3, 1]], "dwell_seconds": 0}]')
+    monkeypatch.setenv("LINES", '[{"name": "entrada", "points": [[0, 0.6], [1, 0.6]]}]')
+    zones = _json_env("ZONES", validate_zones)
+    assert zones == [{"name": "porta", "points": [(0.0, 0.0), (0.3, 0.0), (0.3, 1.0)], "dwell_seconds": 0.0}]
+    assert _json_env("LINES", validate_lines) == [{"name": "entrada", "points": [(0.0, 0.6), (1.0, 0.6)]}]
+    with pytest.raises(ValueError, match="precisa de 2 pontos"):
+        validate_lines([{"name": "entrada", "points": [[0, 0], [1, 0], [1, 1]]}])
+
+
+def test_dwell_zero_fires_on_entry_and_none_disables(db, monkeypatch):
+    from backend.services.detection_service import clip_recorder, detection_service
+    from backend.services.event_bus import event_bus
+
+    monkeypatch.setattr(clip_recorder, "trigger", lambda *args: None)
+    zone_set = ZoneSet(validate_zones([
+        {"name": "imediata", "points": SQUARE, "dwell_seconds": 0},
+        {"name": "sem_dwell", "points": SQUARE, "dwell_seconds": None},
+    ]), 100, 100, generation=1)
+    now = time.time() + 10_000  # fora do alcance de eventos de outros testes
+    rec = TrackRecord(7, 50.0, 50.0, now)
+    bits = zone_set.membership(np.array([50.0]), np.array([50.0]))[0]
+    detection_service._zone_events(rec, bits, zone_set, now)
+
+    events = [(e.event_type, e.roi_name) for e in event_bus.ring.query(now)]
+    assert ("dwell_roi", "imediata") in events
+    assert ("dwell_roi", "sem_dwell") not in events
+    assert ("enter_roi", "sem_dwell") in events
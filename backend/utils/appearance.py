@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+
+
+# Histograma HSV conjunto por metade do corpo (parte de cima / de baixo)
+H_BINS, S_BINS, V_BINS = 8, 4, 4
+HALF_DIM = H_BINS * S_BINS * V_BINS
+DESCRIPTOR_DIM = 2 * HALF_DIM
+
+
+def hsv_histogram(bgr_img: np.ndarray) -> np.ndarray:
+    """Histograma HSV normalizado (soma 1) com HALF_DIM bins; zeros se o recorte for vazio."""
+    if bgr_img is None or bgr_img.size == 0:
+        return np.zeros(HALF_DIM, dtype=np.float32)
+    hsv = cv2.cvtColor(bgr_img, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1, 2], None, [H_BINS, S_BINS, V_BINS], [0, 180, 0, 256, 0, 256]).reshape(-1)
+    total = float(hist.sum())
+    return hist / total if total > 0 else hist
+
+
+def appearance_descriptor(top: np.ndarray, bottom: np.ndarray) -> np.ndarray:
+    """Descritor de aparência (float32, DESCRIPTOR_DIM) com norma L2 = 1.
+
+    Guarda a raiz dos histogramas de cada metade (escalada por 1/sqrt(2)): o
+    produto escalar entre dois descritores é a média do coeficiente de
+    Bhattacharyya das duas metades, então 1 - dot é uma distância em [0, 1].
+    """
+    desc = np.sqrt(np.concatenate((hsv_histogram(top), hsv_histogram(bottom)))) * np.float32(np.sqrt(0.5))
+    return desc.astype(np.float32, copy=False)
+
+
+def blend_descriptor(old: np.ndarray, new: np.ndarray, alpha: float = 0.3) -> np.ndarray:
+    """Média móvel exponencial de descritores, renormalizada."""
+    out = (1.0 - alpha) * old + alpha * new
+    norm = float(np.linalg.norm(out))
+    return (out / norm).astype(np.float32, copy=False) if norm > 0 else out.astype(np.float32, copy=False)
@@ -0,0 +1,33 @@
+import numpy as np
+
+
+def douglas_peucker(xy: np.ndarray, epsilon: float) -> np.ndarray:
+    """Índices dos pontos mantidos pela simplificação de Douglas-Peucker.
+
+    Versão iterativa (sem recursão), vetorizada em cada segmento.
+    """
+    n = len(xy)
+    if n <= 2:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        p, q = xy[a], xy[b]
+        seg = q - p
+        pts = xy[a + 1:b] - p
+        norm = float(np.hypot(seg[0], seg[1]))
+        if norm == 0.0:
+            dist = np.hypot(pts[:, 0], pts[:, 1])
+        else:
+            dist = np.abs(seg[0] * pts[:, 1] - seg[1] * pts[:, 0]) / norm
+        k = int(np.argmax(dist))
+        if dist[k] > epsilon:
+            idx = a + 1 + k
+            keep[idx] = True
+            stack.append((a, idx))
+            stack.append((idx, b))
+    return np.nonzero(keep)[0]
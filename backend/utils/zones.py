@@ -0,0 +1,95 @@
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from backend.core.config import settings
+
+
+MAX_MASK_ZONES = 64  # bits do rótulo uint64 por pixel
+
+
+def effective_zones() -> List[dict]:
+    """Zonas configuradas; sem configuração, a ROI retangular vira a zona "default"."""
+    if settings.zones:
+        return settings.zones
+    x1, y1, x2, y2 = settings.roi_rect
+    return [{"name": "default", "points": [(x1, y1), (x2, y1), (x2, y2), (x1, y2)], "dwell_seconds": None}]
+
+
+def points_in_polygon(px: np.ndarray, py: np.ndarray, poly: np.ndarray) -> np.ndarray:
+    """Ray casting vetorizado: todos os pontos contra um polígono (K, 2)."""
+    inside = np.zeros(px.shape, dtype=bool)
+    xj, yj = poly[-1]
+    for xi, yi in poly:
+        crosses = ((yi > py) != (yj > py)) & (px < (xj - xi) * (py - yi) / ((yj - yi) or 1e-12) + xi)
+        inside ^= crosses
+        xj, yj = xi, yi
+    return inside
+
+
+class ZoneSet:
+    """Zonas poligonais em pixels para um tamanho de frame.
+
+    Até 64 zonas: um rótulo uint64 por pixel (bit i = zona i), pré-computado
+    uma vez; a pertinência de todos os centros é uma única indexação do array.
+    Acima disso, point-in-polygon vetorizado sobre os arrays de centros.
+    """
+
+    def __init__(self, zones: Sequence[dict], width: int, height: int, generation: int = 0):
+        # Muda sempre que o conjunto é reconstruído: índices de bit antigos deixam de valer
+        self.generation = generation
+        self.width = width
+        self.height = height
+        self.names: List[str] = [z["name"] for z in zones]
+        self.dwell: List[Optional[float]] = [z.get("dwell_seconds") for z in zones]
+        self.polygons: List[np.ndarray] = [
+            np.round(np.asarray(z["points"], dtype=np.float64) * (width, height)).astype(np.int32) for z in zones
+        ]
+        self.mask: Optional[np.ndarray] = None
+        if len(zones) <= MAX_MASK_ZONES:
+            self.mask = np.zeros((height, width), dtype=np.uint64)
+            tmp = np.zeros((height, width), dtype=np.uint8)
+            for i, poly in enumerate(self.polygons):
+                tmp[:] = 0
+                cv2.fillPoly(tmp, [poly], 1)
+                self.mask[tmp.astype(bool)] |= np.uint64(1 << i)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def membership(self, cx: np.ndarray, cy: np.ndarray) -> List[int]:
+        """Bitmask de zonas (int Python) para cada centro."""
+        if len(cx) == 0:
+            return []
+        if self.mask is not None:
+            xi = np.clip(cx.astype(np.int64), 0, self.width - 1)
+            yi = np.clip(cy.astype(np.int64), 0, self.height - 1)
+            return [int(b) for b in self.mask[yi, xi]]
+        bits = [0] * len(cx)
+        for i, poly in enumerate(self.polygons):
+            for k in np.nonzero(points_in_polygon(cx, cy, poly))[0]:
+                bits[k] |= 1 << i
+        return bits
+
+    def draw(self, img: np.ndarray, color: Tuple[int, int, int] = (255, 0, 0)) -> None:
+        cv2.polylines(img, self.polygons, True, color, 2)
+        for name, poly in zip(self.names, self.polygons):
+            x, y = poly.min(axis=0)
+            cv2.putText(img, name, (int(x) + 3, int(y) + 14), cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1)
+
+
+_cache_key = None
+_cache: Optional[ZoneSet] = None
+_generation = 0
+
+
+def zones_for_frame(width: int, height: int) -> ZoneSet:
+    """ZoneSet cacheado; reconstruído só quando o tamanho do frame ou a config mudam."""
+    global _cache_key, _cache, _generation
+    key = (repr(settings.zones), settings.roi_rect, width, height)
+    if _cache is None or key != _cache_key:
+        _generation += 1
+        _cache = ZoneSet(effective_zones(), width, height, _generation)
+        _cache_key = key
+    return _cache
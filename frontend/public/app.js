@@ -4,6 +4,20 @@ let startTime = null;
 let currentFilters = {};
 let timeInterval = null;
 let qrStopNotified = false
+let feedSource = null;
+let statusPollInterval = null;
+let dashboardPollInterval = null;
+let dashboardRefreshTimer = null;
+let lastDashboardRefresh = 0;
+// detecções atuais por track_id, mantidas pelo feed push
+let currentDetections = {};
+
+// Com o feed conectado, o dashboard recarrega quando tracks entram/saem (no máximo
+// a cada DASHBOARD_MIN_INTERVAL_MS) e, por segurança, a cada DASHBOARD_IDLE_REFRESH_MS;
+// sem o feed, volta ao polling a cada DASHBOARD_POLL_MS
+const DASHBOARD_MIN_INTERVAL_MS = 2000;
+const DASHBOARD_IDLE_REFRESH_MS = 60000;
+const DASHBOARD_POLL_MS = 8000;
 
 // elementos DOM
 const videoFeed = document.getElementById('video-feed');
@@ -69,10 +83,12 @@ function init() {
 
     // Inicializa gráficos e carrega dados iniciais
     refreshDashboard({});
-    // Atualiza dashboard a cada 8 segundos
-    setInterval(() => refreshDashboard(currentFilters), 8000);
-    // Poll backend para verificar status de detecção a cada 2 segundos
-    setInterval(() => pollDetectionStatus(), 2000);
+    // Recarga de segurança do dashboard (o feed dispara as recargas normais)
+    setInterval(() => {
+        if (Date.now() - lastDashboardRefresh >= DASHBOARD_IDLE_REFRESH_MS) refreshDashboard(currentFilters);
+    }, DASHBOARD_IDLE_REFRESH_MS);
+    // Status/detecções via feed push (SSE); polling de status e dashboard só como fallback
+    connectDetectionFeed();
 
     // Auto-inicia detecção quando o sistema (página) carregar
     startDetection();
@@ -94,24 +110,89 @@ async function startDetection() {
     }
 }
 
+function handleDetectionStatus(st) {
+    if (st && st.stopped_by_qr && !qrStopNotified) {
+        qrStopNotified = true;
+        handleQRStopUI();
+    }
+    if (st && st.running === false && isConnected) {
+        isConnected = false;
+        clearInterval(timeInterval);
+        videoFeed.src = createPlaceholder();
+    }
+}
+
 async function pollDetectionStatus() {
     try {
         const res = await fetch(`${API_URL}/detections/status`);
         if (!res.ok) return;
-        const st = await res.json();
-        if (st && st.stopped_by_qr && !qrStopNotified) {
-            qrStopNotified = true;
-            handleQRStopUI();
-        }
-        if (st && st.running === false && isConnected) {
-            isConnected = false;
-            clearInterval(timeInterval);
-            videoFeed.src = createPlaceholder();
-        }
+        handleDetectionStatus(await res.json());
     } catch (e) { /* noop */ }
     // Ignora erros de polling
 }
 
+function startStatusPolling() {
+    if (statusPollInterval) return;
+    statusPollInterval = setInterval(() => pollDetectionStatus(), 2000);
+    dashboardPollInterval = setInterval(() => refreshDashboard(currentFilters), DASHBOARD_POLL_MS);
+}
+
+function stopStatusPolling() {
+    if (!statusPollInterval) return;
+    clearInterval(statusPollInterval);
+    clearInterval(dashboardPollInterval);
+    statusPollInterval = null;
+    dashboardPollInterval = null;
+}
+
+// Recarga do dashboard agrupada: várias mudanças seguidas viram uma requisição
+function scheduleDashboardRefresh() {
+    if (dashboardRefreshTimer) return;
+    const wait = Math.max(0, DASHBOARD_MIN_INTERVAL_MS - (Date.now() - lastDashboardRefresh));
+    dashboardRefreshTimer = setTimeout(() => {
+        dashboardRefreshTimer = null;
+        refreshDashboard(currentFilters);
+    }, wait);
+}
+
+// Aplica as detecções do feed: contagem ao vivo no card e, se o conjunto de
+// tracks mudou (pessoa nova ou saída), recarga de stats e tabela
+function applyDetections(tracksChanged) {
+    if (activeInFrameEl) activeInFrameEl.textContent = Object.keys(currentDetections).length;
+    if (tracksChanged) scheduleDashboardRefresh();
+}
+
+// Feed push: snapshot inicial, depois deltas por track e mudanças de status
+function connectDetectionFeed() {
+    if (typeof EventSource === 'undefined') {
+        startStatusPolling();
+        return;
+    }
+    feedSource = new EventSource(`${API_URL}/detections/feed`);
+    feedSource.onopen = () => stopStatusPolling();
+    // EventSource reconecta sozinho; enquanto isso, volta ao polling
+    feedSource.onerror = () => startStatusPolling();
+    feedSource.addEventListener('snapshot', (e) => {
+        const msg = JSON.parse(e.data);
+        currentDetections = {};
+        (msg.detections || []).forEach(d => { currentDetections[d.track_id] = d; });
+        if (msg.status) handleDetectionStatus(msg.status);
+        applyDetections(true);
+    });
+    feedSource.addEventListener('delta', (e) => {
+        const msg = JSON.parse(e.data);
+        const removed = msg.removed || [];
+        let tracksChanged = removed.length > 0;
+        removed.forEach(id => { delete currentDetections[id]; });
+        (msg.upsert || []).forEach(d => {
+            if (!(d.track_id in currentDetections)) tracksChanged = true;
+            currentDetections[d.track_id] = d;
+        });
+        applyDetections(tracksChanged);
+    });
+    feedSource.addEventListener('status', (e) => handleDetectionStatus(JSON.parse(e.data)));
+}
+
 // Atualiza o display de tracking de tempo
 function updateTimeTracking() {
     if (!startTime) return;
@@ -216,6 +297,7 @@ function updateCharts(stats) {
 
 // Alterado: refresh agora usa /api/stats para métricas e gráficos
 async function refreshDashboard(filters = {}) {
+    lastDashboardRefresh = Date.now();
     const [stats, persons] = await Promise.all([
         fetchStats(filters),
         fetchPersons(filters)